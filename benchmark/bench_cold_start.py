@@ -0,0 +1,179 @@
+"""
+両Lambdaハンドラのコールドスタートを計測します。
+ダミーの環境変数とローカルの代替サービス（benchmark/fakes.py）を使用するため、外部への通信は発生しません。
+
+    python -m benchmark.bench_cold_start [--samples 5] [--warm-invocations 20] [--output PATH]
+
+計測内容（ハンドラごと）:
+    - モジュールごとのimport時間（python -X importtime と同じ値）
+    - ハンドラモジュールのimport時間
+    - プロセス起動から最初の応答までの時間
+    - コールド / ウォーム時の呼び出しレイテンシ
+結果はJSONで出力され、コミット間で比較できます。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmark.cold_start_runner import HANDLER_MODULES
+from benchmark.fakes import STUB_ENVIRONMENT_VARIABLES
+
+DEFAULT_OUTPUT_DIR = "benchmark/results"
+TOP_MODULES = 25
+
+
+def parse_importtime(stderr: str) -> dict[str, dict[str, int]]:
+    """
+    -X importtime の出力をモジュールごとの時間（マイクロ秒）に変換します。
+    Args:
+        stderr: 標準エラー出力
+    Returns:
+        {モジュール名: {"self_us": 自身の時間, "cumulative_us": 累積時間}}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = {
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        }
+    return modules
+
+
+def run_cold_start(handler_name: str, warm_invocations: int) -> dict:
+    """
+    新しいプロセスでハンドラを1回コールドスタートさせ、計測結果を返します。
+    """
+    env = {**os.environ, **STUB_ENVIRONMENT_VARIABLES}
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-m",
+            "benchmark.cold_start_runner",
+            handler_name,
+            str(warm_invocations),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    process_seconds = time.perf_counter() - started_at
+    # ハンドラのログも標準出力に出るため、最後の行を計測結果として扱う
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = process_seconds
+    result["modules"] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(handler_name: str, samples: list[dict]) -> dict:
+    """
+    複数回のコールドスタートの計測結果を集計します。
+    """
+
+    def median_of(key: str) -> float:
+        return statistics.median(s[key] for s in samples)
+
+    warm = [seconds for s in samples for seconds in s["warm_invocation_seconds"]]
+    module_names = set().union(*(s["modules"].keys() for s in samples))
+    modules = {
+        name: {
+            key: statistics.median(
+                s["modules"].get(name, {}).get(key, 0) for s in samples
+            )
+            for key in ("self_us", "cumulative_us")
+        }
+        for name in module_names
+    }
+    top_modules = dict(
+        sorted(modules.items(), key=lambda m: m[1]["self_us"], reverse=True)[
+            :TOP_MODULES
+        ]
+    )
+    return {
+        "module": HANDLER_MODULES[handler_name],
+        "samples": len(samples),
+        "import_seconds": median_of("import_seconds"),
+        "handler_module_import_us": modules.get(HANDLER_MODULES[handler_name], {}).get(
+            "cumulative_us"
+        ),
+        "first_response_seconds": median_of("first_response_seconds"),
+        "process_seconds": median_of("process_seconds"),
+        "cold_invocation_seconds": median_of("cold_invocation_seconds"),
+        "warm_invocation_seconds": {
+            "median": statistics.median(warm),
+            "p90": statistics.quantiles(warm, n=10)[-1] if len(warm) > 1 else warm[0],
+            "count": len(warm),
+        },
+        "imported_modules": len(module_names),
+        "top_modules_by_self_time": top_modules,
+    }
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--warm-invocations", type=int, default=20)
+    parser.add_argument(
+        "--handler", choices=list(HANDLER_MODULES), action="append", default=None
+    )
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    commit = get_commit()
+    results = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "handlers": {},
+    }
+    for handler_name in args.handler or list(HANDLER_MODULES):
+        samples = [
+            run_cold_start(handler_name, args.warm_invocations)
+            for _ in range(args.samples)
+        ]
+        summary = summarize(handler_name, samples)
+        results["handlers"][handler_name] = summary
+        print(
+            f"{handler_name:<18} import {summary['import_seconds'] * 1000:8.1f} ms"
+            f" | first response {summary['first_response_seconds'] * 1000:8.1f} ms"
+            f" | cold {summary['cold_invocation_seconds'] * 1000:7.1f} ms"
+            f" | warm p50 {summary['warm_invocation_seconds']['median'] * 1000:6.1f} ms"
+        )
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"cold_start_{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
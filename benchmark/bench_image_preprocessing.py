@@ -0,0 +1,186 @@
+"""
+解析前の画像加工による送信量と処理時間の変化を計測します。
+    python -m benchmark.bench_image_preprocessing [--bandwidth-mbps 20] [--concurrency 4] [--azure]
+
+スマートフォンで撮影したレシートを想定した画像を生成し、解像度ごとに以下を出力します。
+    - 加工前後のバイト数と削減量
+    - 加工時間
+    - 解析処理全体の最大RSS（Linuxのみ）。別プロセスでanalyze_receiptハンドラをimportし、
+      外部サービスを代替に差し替えたうえで、並行数と同じ枚数の画像を1回の呼び出しで解析する
+    - 指定した帯域での送信時間の差
+--azure を指定した場合は、環境変数のAzure Document Intelligenceに実際に送信し、解析時間の差も計測します。
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from src.app.adaptor.image_processing import preprocess_image
+
+# (幅, 高さ, JPEG品質)。一般的なスマートフォンのカメラの解像度
+CASES = [(1512, 2016, 90), (3024, 4032, 92), (4284, 5712, 92)]
+
+
+def create_receipt_photo(width: int, height: int, quality: int) -> bytes:
+    """
+    レシートを撮影したような画像（背景のノイズ、行ごとの文字、EXIF付き）を作成します。
+    """
+    image = Image.effect_noise((width, height), 24).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    margin = width // 6
+    draw.rectangle((margin, 0, width - margin, height), fill=(235, 232, 222))
+    font_size = max(12, width // 60)
+    for i, y in enumerate(range(font_size * 4, height - font_size * 2, font_size * 2)):
+        draw.text(
+            (margin + font_size, y),
+            f"ITEM {i:03d}  SAMPLE PRODUCT NAME   {i * 37 % 1000:>5,} YEN",
+            fill=(30, 30, 30),
+            font_size=font_size,
+        )
+    exif = Image.Exif()
+    exif[0x010F] = "Benchmark Phone"
+    exif[0x0112] = 1
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, exif=exif)
+    return output.getvalue()
+
+
+def measure_peak_rss_mb(data: bytes, concurrency: int) -> dict:
+    """
+    新しいプロセスでanalyze_receiptハンドラを実行し、importと解析処理全体の最大RSSを返します。
+    """
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as f:
+        f.write(data)
+        f.flush()
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmark.bench_image_preprocessing",
+                "--memory-of",
+                f.name,
+                "--concurrency",
+                str(concurrency),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def read_proc_status_kb(name: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{name}:"):
+                return int(line.split()[1])
+    raise KeyError(name)
+
+
+def print_peak_rss(path: str, concurrency: int):
+    from benchmark import fakes as benchmark_fakes
+    from benchmark.fakes import install_fakes, set_stub_environment_variables
+
+    os.environ["ANALYZE_RECEIPT_CONCURRENCY"] = str(concurrency)
+    set_stub_environment_variables()
+    from src.app.functions import analyze_receipt
+    from src.app.model import db_model as db
+
+    with open(path, "rb") as f:
+        data = f.read()
+    fakes = install_fakes()
+    fake_request = benchmark_fakes.fake_line_pool_manager_request
+
+    def request(self, method: str, url: str, *args, **kwargs):
+        response = fake_request(self, method, url, *args, **kwargs)
+        if "/content" in url:
+            import urllib3
+
+            # JPEGの終端以降は無視されるため、画像ごとにハッシュを変えて解析結果のキャッシュに当たらないようにする
+            return urllib3.HTTPResponse(
+                body=data + url.encode(),
+                status=200,
+                headers={"content-type": "image/jpeg"},
+                preload_content=True,
+            )
+        return response
+
+    import urllib3
+
+    urllib3.PoolManager.request = request
+    import_rss = read_proc_status_kb("VmRSS")
+
+    records = []
+    table = fakes.dynamodb.Table(db.TemporalExpenditure.get_name())
+    for i in range(concurrency):
+        record = db.TemporalExpenditure(
+            line_user_id="Ubenchmark",
+            line_image_id=f"image{i}",
+            status=db.TemporalExpenditure.Status.ANALYZING,
+        )
+        table.put_item(Item=record.model_dump())
+        records.append(
+            {"messageId": str(i), "receiptHandle": str(i), "body": record.id}
+        )
+    analyze_receipt.lambda_handler({"Records": records}, None)
+    peak = read_proc_status_kb("VmHWM")
+    print(json.dumps({"import_rss_mb": import_rss / 1024, "peak_rss_mb": peak / 1024}))
+
+
+def measure_analysis_seconds(data: bytes) -> float:
+    from src.app.adaptor.azure_ducument_intelligence_client import analyze_receipt
+
+    started_at = time.perf_counter()
+    analyze_receipt(data)
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.environ.get("ANALYZE_RECEIPT_CONCURRENCY", 4)),
+    )
+    parser.add_argument("--azure", action="store_true")
+    parser.add_argument("--memory-of", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.memory_of:
+        print_peak_rss(args.memory_of, args.concurrency)
+        return
+    bytes_per_second = args.bandwidth_mbps * 1_000_000 / 8
+
+    for width, height, quality in CASES:
+        data = create_receipt_photo(width, height, quality)
+        result = preprocess_image(data)
+        rss = measure_peak_rss_mb(data, args.concurrency)
+        upload_delta_ms = result.saved_bytes / bytes_per_second * 1000
+        line = (
+            f"{width}x{height}: {result.original_bytes / 1024:8.0f} KB -> "
+            f"{result.processed_bytes / 1024:6.0f} KB"
+            f" ({result.saved_bytes / result.original_bytes:6.1%} saved)"
+            f" | preprocess {result.elapsed_ms:6.1f} ms"
+            f" | peak rss {rss['peak_rss_mb']:5.1f} MB"
+            f" (import {rss['import_rss_mb']:5.1f} MB, concurrency {args.concurrency})"
+            f" | upload -{upload_delta_ms:6.1f} ms @ {args.bandwidth_mbps:g} Mbps"
+        )
+        if args.azure:
+            original_seconds = measure_analysis_seconds(data)
+            processed_seconds = measure_analysis_seconds(result.data)
+            line += (
+                f" | analysis {original_seconds * 1000:7.0f} ms -> "
+                f"{processed_seconds * 1000:7.0f} ms"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+LINE Messaging APIのクライアントを呼び出しごとに作成する場合と、共有する場合のレイテンシを比較します。
+    python -m benchmark.bench_line_api_client [--rtt-ms 20] [--iterations 20]
+
+ローカルに自己署名証明書のHTTPSサーバーを起動し、api.line.me への接続をそこへ向けます。
+1回のWebhookで行う「ローディング表示 + 応答メッセージ」の、応答が送信されるまでの時間を計測します。
+background_loading はローディング表示をバックグラウンドで行う場合で、処理が短いため表示は省略されます。
+サーバーは実際のネットワークを模擬するため、新しい接続ごとに2RTT（TCP + TLS）、
+リクエストごとに1RTT待機してから応答します。TLSの暗号処理は実際に行われます。
+"""
+
+import argparse
+import http.server
+import json
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+import urllib3.util.connection
+
+from benchmark.fakes import set_stub_environment_variables
+
+LINE_HOSTS = ("api.line.me", "api-data.line.me")
+
+
+class LineApiRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rtt_seconds = 0.0
+
+    def setup(self):
+        # TCPとTLSの接続確立にかかる往復
+        time.sleep(self.rtt_seconds * 2)
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection.do_handshake()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.rtt_seconds)
+        if self.path.endswith("/reply"):
+            body = b'{"sentMessages": [{"id": "0", "quoteToken": "q"}]}'
+        else:
+            body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_certificate(directory: str) -> tuple[str, str]:
+    """
+    LINEのホスト名で検証できる自己署名証明書を作成します。
+    """
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=api.line.me",
+            "-addext", "subjectAltName=" + ",".join(f"DNS:{h}" for h in LINE_HOSTS),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    return cert, key
+
+
+def start_server(cert: str, key: str, rtt_seconds: float) -> int:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    LineApiRequestHandler.rtt_seconds = rtt_seconds
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), LineApiRequestHandler)
+    server.socket = context.wrap_socket(
+        server.socket, server_side=True, do_handshake_on_connect=False
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def route_line_hosts_to(port: int):
+    """
+    api.line.me への接続を、ローカルのサーバーへ向けます。
+    """
+    create_connection = urllib3.util.connection.create_connection
+
+    def _create_connection(address, *args, **kwargs):
+        host, _ = address
+        if host in LINE_HOSTS:
+            address = ("127.0.0.1", port)
+        return create_connection(address, *args, **kwargs)
+
+    urllib3.util.connection.create_connection = _create_connection
+    urllib3.connection.connection.create_connection = _create_connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    set_stub_environment_variables()
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = create_certificate(directory)
+        port = start_server(cert, key, args.rtt_ms / 1000)
+        route_line_hosts_to(port)
+
+        from linebot.v3.messaging import (
+            ApiClient,
+            MessagingApi,
+            ReplyMessageRequest,
+            ShowLoadingAnimationRequest,
+            TextMessage,
+        )
+
+        from src.app.adaptor.line_messaging_api_adaptor import show_loading_animation
+        from src.app.config.clients import get_line_configuration
+        from src.app.handler.line_messaging_api_handler import (
+            LoadingAnimation,
+            reply_message,
+        )
+
+        get_line_configuration().ssl_ca_cert = cert
+        messages = [TextMessage(text="ベンチマーク")]
+
+        def per_call_clients():
+            # 変更前: 呼び出しごとにApiClient（urllib3のプール）を作成していた
+            with ApiClient(get_line_configuration()) as api_client:
+                MessagingApi(api_client).show_loading_animation(
+                    ShowLoadingAnimationRequest(chat_id="U0", loading_seconds=10)
+                )
+            with ApiClient(get_line_configuration()) as api_client:
+                MessagingApi(api_client).reply_message_with_http_info(
+                    ReplyMessageRequest(reply_token="token", messages=messages)
+                )
+
+        def shared_client():
+            show_loading_animation("U0")
+            reply_message("token", messages)
+
+        def background_loading():
+            with LoadingAnimation("U0") as loading:
+                pass
+            reply_message("token", messages)
+            return loading
+
+        results = {}
+        for name, case in (
+            ("per_call_clients", per_call_clients),
+            ("shared_client", shared_client),
+            ("background_loading", background_loading),
+        ):
+            case()  # 初回の接続やimportは除外する
+            seconds = []
+            for _ in range(args.iterations):
+                started_at = time.perf_counter()
+                loading = case()
+                seconds.append(time.perf_counter() - started_at)
+                if loading is not None:
+                    loading.wait()
+            results[name] = statistics.median(seconds) * 1000
+            print(
+                f"{name:<18} until reply p50 {results[name]:7.1f} ms"
+                f" (rtt {args.rtt_ms:g} ms, {args.iterations} iterations)"
+            )
+        print(
+            json.dumps(
+                {
+                    "shared_client_saved_ms": results["per_call_clients"]
+                    - results["shared_client"],
+                    "background_loading_saved_ms": results["shared_client"]
+                    - results["background_loading"],
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+ログ出力の1秒あたりの処理件数を計測します。
+    python -m benchmark.bench_logging
+"""
+
+import io
+import logging
+import time
+from datetime import datetime
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+
+from src.app.config.logger import (
+    CustomFormatter,
+    LogContext,
+    PreformattedFormatter,
+    PreformattedQueueHandler,
+)
+from src.app.model.common_model import LogMessage
+
+NUMBER = 20000
+# 出力先が詰まっている場合（CloudWatchへのパイプが遅い場合など）を再現する書き込み遅延
+SLOW_WRITE_SECONDS = 0.0001
+
+
+class SlowStream(io.StringIO):
+    def write(self, s: str) -> int:
+        time.sleep(SLOW_WRITE_SECONDS)
+        return super().write(s)
+
+
+class PydanticFormatter(logging.Formatter):
+    # 変更前: ログ1件ごとにLogMessageモデルを作成し、model_dump_jsonを実行していた
+    def format(self, record):
+        message = LogMessage(
+            timestamp=datetime.fromtimestamp(record.created).isoformat(),
+            level=record.levelname,
+            message=record.getMessage(),
+            file=record.filename,
+            line=record.lineno,
+            function=record.funcName,
+            extra_info=LogContext.context.get(),
+        )
+        return message.model_dump_json(exclude_none=True)
+
+
+def create_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"benchmark.{name.replace(' ', '_')}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def measure(logger: logging.Logger) -> float:
+    started_at = time.perf_counter()
+    for i in range(NUMBER):
+        logger.info("Item found, table name = %s, index = %d", "users", i)
+    return NUMBER / (time.perf_counter() - started_at)
+
+
+def main():
+    LogContext.set(lambda_function_name="benchmark", line_user_id="U0000")
+
+    def create_handler(formatter: logging.Formatter, stream: io.StringIO):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(formatter)
+        return handler
+
+    def create_queue_handler(stream: io.StringIO):
+        queue = SimpleQueue()
+        queue_handler = PreformattedQueueHandler(queue)
+        queue_handler.setFormatter(CustomFormatter())
+        listener = QueueListener(queue, create_handler(PreformattedFormatter(), stream))
+        listener.start()
+        listeners.append(listener)
+        return queue_handler
+
+    listeners: list[QueueListener] = []
+    cases = {
+        "pydantic_formatter (before)": create_handler(
+            PydanticFormatter(), io.StringIO()
+        ),
+        "json_formatter": create_handler(CustomFormatter(), io.StringIO()),
+        "json_formatter + queue": create_queue_handler(io.StringIO()),
+        "slow sink: json_formatter": create_handler(CustomFormatter(), SlowStream()),
+        "slow sink: json_formatter + queue": create_queue_handler(SlowStream()),
+    }
+    cases = {name: create_logger(name, handler) for name, handler in cases.items()}
+    for name, logger in cases.items():
+        print(f"{name:<36} {measure(logger):>12,.0f} records/s (caller side)")
+    for listener in listeners:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
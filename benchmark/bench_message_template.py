@@ -0,0 +1,48 @@
+"""
+メッセージテンプレートの1回あたりの描画コストを計測します。
+    python -m benchmark.bench_message_template
+"""
+
+import copy
+import json
+import timeit
+
+from src.app.repository.messages_repository import (
+    MESSAGE_JSON_PATH,
+    MessagesRepository,
+)
+
+NUMBER = 2000
+
+
+def reload_json():
+    # 変更前: MessagesRepository()の生成ごとにJSONを読み込んでいた
+    with open(MESSAGE_JSON_PATH, "r") as f:
+        return json.load(f)["[confirm_expenditure]"]
+
+
+def deepcopy_pool(pool: dict):
+    # 共有テンプレートを守るために、プール全体をdeepcopyする場合
+    return copy.deepcopy(pool)["[confirm_expenditure]"]
+
+
+def main():
+    with open(MESSAGE_JSON_PATH, "r") as f:
+        pool = json.load(f)
+    repository = MessagesRepository()
+    cases = {
+        "reload_json": reload_json,
+        "deepcopy_pool": lambda: deepcopy_pool(pool),
+        "render": lambda: repository.get_message("[confirm_expenditure]"),
+        "render_with_params": lambda: repository.get_follow_message("テスト"),
+        "repository_init_and_render": lambda: MessagesRepository().get_message(
+            "[confirm_expenditure]"
+        ),
+    }
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=5)) / NUMBER
+        print(f"{name:<28} {seconds * 1_000_000:>10.2f} us/render")
+
+
+if __name__ == "__main__":
+    main()
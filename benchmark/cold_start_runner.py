@@ -0,0 +1,176 @@
+"""
+1つのLambdaハンドラをコールドスタートから実行し、計測結果をJSONで標準出力に書き出します。
+bench_cold_start.py から `python -X importtime -m benchmark.cold_start_runner <handler>` として起動されます。
+"""
+
+import time
+
+PROCESS_STARTED_AT = time.perf_counter()
+
+import base64  # noqa: E402
+import hashlib  # noqa: E402
+import hmac  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+
+from benchmark.fakes import install_fakes, set_stub_environment_variables  # noqa: E402
+
+HANDLER_MODULES = {
+    "line_bot_handler": "src.app.functions.line_bot_handler",
+    "analyze_receipt": "src.app.functions.analyze_receipt",
+}
+LINE_USER_ID = "Ubenchmark0000000000000000000000"
+
+
+def create_line_webhook_event(event: dict) -> dict:
+    """
+    署名付きのLINE Webhookイベント（Lambda関数URLの形式）を作成します。
+    """
+    import os
+
+    body = json.dumps({"destination": "benchmark", "events": [event]})
+    signature = base64.b64encode(
+        hmac.new(
+            os.environ["CHANNEL_SECRET"].encode(), body.encode(), hashlib.sha256
+        ).digest()
+    ).decode()
+    return {"headers": {"x-line-signature": signature}, "body": body}
+
+
+def line_event_base(reply_token: str) -> dict:
+    return {
+        "replyToken": reply_token,
+        "mode": "active",
+        "timestamp": int(time.time() * 1000),
+        "source": {"type": "user", "userId": LINE_USER_ID},
+        "webhookEventId": reply_token,
+        "deliveryContext": {"isRedelivery": False},
+    }
+
+
+def create_line_bot_events(index: int) -> list[dict]:
+    """
+    line_bot_handlerの1回の呼び出しで処理するイベントを作成します。
+    テキスト（一覧表示）、画像、ポストバック（支払い者変更）の順に送信します。
+    """
+    text_event = {
+        **line_event_base(f"text{index}"),
+        "type": "message",
+        "message": {
+            "id": f"text{index}",
+            "type": "text",
+            "quoteToken": "q",
+            "text": "登録途中のレシート一覧",
+        },
+    }
+    image_event = {
+        **line_event_base(f"image{index}"),
+        "type": "message",
+        "message": {
+            "id": f"image{index}",
+            "type": "image",
+            "quoteToken": "q",
+            "contentProvider": {"type": "line"},
+        },
+    }
+    postback_event = {
+        **line_event_base(f"postback{index}"),
+        "type": "postback",
+        "postback": {
+            "data": json.dumps({"type": "change_payer", "id": "benchmark"}),
+        },
+    }
+    return [
+        create_line_webhook_event(e) for e in (text_event, image_event, postback_event)
+    ]
+
+
+def create_analyze_receipt_events(fakes, index: int) -> list[dict]:
+    """
+    analyze_receiptの1回の呼び出しで処理するSQSイベントを作成します。
+    """
+    from src.app.model import db_model as db
+
+    record = db.TemporalExpenditure(
+        line_user_id=LINE_USER_ID,
+        line_image_id=f"image{index}",
+        status=db.TemporalExpenditure.Status.ANALYZING,
+    )
+    fakes.dynamodb.Table(db.TemporalExpenditure.get_name()).put_item(
+        Item=record.model_dump()
+    )
+    return [
+        {
+            "Records": [
+                {
+                    "messageId": f"message{index}",
+                    "receiptHandle": f"handle{index}",
+                    "body": record.id,
+                }
+            ]
+        }
+    ]
+
+
+def seed(fakes):
+    """
+    ハンドラが参照するテーブルに初期データを登録します。
+    """
+    from src.app.model import db_model as db
+
+    fakes.dynamodb.Table(db.User.get_name()).put_item(
+        Item=db.User(line_user_id=LINE_USER_ID, name="ベンチマーク").model_dump()
+    )
+    fakes.dynamodb.Table(db.TemporalExpenditure.get_name()).put_item(
+        Item=db.TemporalExpenditure(
+            id="benchmark",
+            line_user_id=LINE_USER_ID,
+            status=db.TemporalExpenditure.Status.ANALYZED,
+        ).model_dump()
+    )
+
+
+def invoke(lambda_handler, events: list[dict]) -> float:
+    started_at = time.perf_counter()
+    for event in events:
+        lambda_handler(event, None)
+    return time.perf_counter() - started_at
+
+
+def main(handler_name: str, warm_invocations: int):
+    set_stub_environment_variables()
+
+    import_started_at = time.perf_counter()
+    # NOTE: importlib.import_moduleは -X importtime の計測対象にならないため、__import__を使用する
+    __import__(HANDLER_MODULES[handler_name])
+    module = sys.modules[HANDLER_MODULES[handler_name]]
+    import_seconds = time.perf_counter() - import_started_at
+
+    fakes = install_fakes()
+    seed(fakes)
+
+    def create_events(index: int) -> list[dict]:
+        if handler_name == "line_bot_handler":
+            return create_line_bot_events(index)
+        return create_analyze_receipt_events(fakes, index)
+
+    cold_invocation_seconds = invoke(module.lambda_handler, create_events(0))
+    first_response_seconds = time.perf_counter() - PROCESS_STARTED_AT
+    warm_invocation_seconds = [
+        invoke(module.lambda_handler, create_events(i))
+        for i in range(1, warm_invocations + 1)
+    ]
+    print(
+        json.dumps(
+            {
+                "import_seconds": import_seconds,
+                "cold_invocation_seconds": cold_invocation_seconds,
+                "first_response_seconds": first_response_seconds,
+                "warm_invocation_seconds": warm_invocation_seconds,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10)
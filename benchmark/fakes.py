@@ -0,0 +1,469 @@
+"""
+ベンチマーク用の外部サービス（AWS, LINE, Azure, Google Sheets）のローカル代替です。
+ネットワーク通信は行わず、指定した場合は応答までの遅延のみを再現します。
+"""
+
+import json
+import os
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from boto3.dynamodb.conditions import ConditionBase
+
+STUB_ENVIRONMENT_VARIABLES = {
+    "CHANNEL_ACCESS_TOKEN": "benchmark-channel-access-token",
+    "CHANNEL_SECRET": "benchmark-channel-secret",
+    "SQS_QUEUE_URL": "https://sqs.ap-northeast-1.amazonaws.com/000000000000/benchmark",
+    "SPREADSHEET_ID": "benchmark-spreadsheet-id",
+    "EXPENDITURE_SHEET_NAME": "benchmark-sheet",
+    "AZURE_DOCUMENT_INTEIGENCE_ENDPOINT": "https://benchmark.cognitiveservices.azure.com/",
+    "AZURE_KEY_CREDENTIAL": "benchmark-key",
+    "AWS_DEFAULT_REGION": "ap-northeast-1",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+}
+
+
+def set_stub_environment_variables():
+    """
+    ハンドラのimport前に、ダミーの環境変数を設定します。
+    """
+    for key, value in STUB_ENVIRONMENT_VARIABLES.items():
+        os.environ.setdefault(key, value)
+
+
+def simulate_latency(service: str):
+    """
+    BENCHMARK_<SERVICE>_LATENCY_MS で指定されたミリ秒だけ待機し、通信遅延を再現します。
+    """
+    latency_ms = float(os.environ.get(f"BENCHMARK_{service}_LATENCY_MS", "0"))
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+
+# ---------------- DynamoDB ----------------
+
+
+def split_top_level(expression: str, separator: str = ",") -> list[str]:
+    """
+    括弧の外側にある区切り文字で式を分割します。
+    """
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == separator and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def project(
+    item: dict, projection_expression: Optional[str], names: Optional[dict]
+) -> dict:
+    """
+    ProjectionExpressionで指定された属性のみを取り出します。ネストした属性にも対応します。
+    """
+    if projection_expression is None:
+        return item
+    names = names or {}
+    result = {}
+    for path in split_top_level(projection_expression):
+        keys = [names.get(key, key) for key in path.split(".")]
+        source, target = item, result
+        for key in keys[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = source[keys[-1]]
+    return result
+
+
+class FakeTable:
+    def __init__(self, name: str, key_names: list[str], indexes: dict):
+        self.name = name
+        self.key_names = key_names
+        self.indexes = indexes
+        self.items: dict[tuple, dict] = {}
+
+    def __key(self, item: dict) -> tuple:
+        return tuple(item[k] for k in self.key_names)
+
+    def __resolve_path(self, path: str, names: dict) -> list[str]:
+        return [names.get(p, p) for p in path.strip().split(".")]
+
+    def __get_path(self, item: dict, path: list[str]) -> Any:
+        for p in path:
+            if not isinstance(item, dict) or p not in item:
+                return None
+            item = item[p]
+        return item
+
+    def __set_path(self, item: dict, path: list[str], value: Any):
+        for p in path[:-1]:
+            item = item.setdefault(p, {})
+        item[path[-1]] = value
+
+    def __evaluate(self, item: dict, operand: str, names: dict, values: dict) -> Any:
+        operand = operand.strip()
+        if operand.startswith(":"):
+            return values[operand]
+        match = re.fullmatch(r"(\w+)\((.*)\)", operand)
+        if match:
+            args = split_top_level(match.group(2))
+            if match.group(1) == "list_append":
+                return self.__evaluate(item, args[0], names, values) + self.__evaluate(
+                    item, args[1], names, values
+                )
+            if match.group(1) == "if_not_exists":
+                current = self.__get_path(item, self.__resolve_path(args[0], names))
+                if current is None:
+                    return self.__evaluate(item, args[1], names, values)
+                return current
+        if "+" in operand:
+            left, right = operand.split("+", 1)
+            return self.__evaluate(item, left, names, values) + self.__evaluate(
+                item, right, names, values
+            )
+        return self.__get_path(item, self.__resolve_path(operand, names))
+
+    def __update(self, item: dict, expression: str, names: dict, values: dict):
+        clauses = re.split(r"\b(SET|REMOVE|ADD)\b", expression)
+        for action, body in zip(clauses[1::2], clauses[2::2]):
+            for assignment in split_top_level(body):
+                if action == "SET":
+                    path, operand = assignment.split("=", 1)
+                    value = self.__evaluate(item, operand, names, values)
+                    self.__set_path(item, self.__resolve_path(path, names), value)
+                elif action == "ADD":
+                    path, operand = assignment.split()
+                    resolved = self.__resolve_path(path, names)
+                    current = self.__get_path(item, resolved) or 0
+                    self.__set_path(item, resolved, current + values[operand])
+                elif action == "REMOVE":
+                    resolved = self.__resolve_path(assignment, names)
+                    parent = self.__get_path(item, resolved[:-1]) or item
+                    parent.pop(resolved[-1], None)
+
+    def __matches(self, item: dict, condition: ConditionBase) -> bool:
+        expression = condition.get_expression()
+        operator, values = expression["operator"], expression["values"]
+        if operator == "AND":
+            return all(self.__matches(item, v) for v in values)
+        if operator == "=":
+            return item.get(values[0].name) == values[1]
+        raise NotImplementedError(operator)
+
+    def key_of(self, item: dict) -> tuple:
+        return self.__key(item)
+
+    def find(self, Key: dict) -> Optional[dict]:
+        item = self.items.get(self.__key(Key))
+        return None if item is None else json.loads(json.dumps(item))
+
+    def get_item(self, Key: dict, **kwargs):
+        simulate_latency("DYNAMODB")
+        item = self.find(Key)
+        return {} if item is None else {"Item": item}
+
+    def put_item(self, Item: dict, **kwargs):
+        simulate_latency("DYNAMODB")
+        self.items[self.__key(Item)] = json.loads(json.dumps(Item, default=str))
+
+    def delete_item(self, Key: dict, **kwargs):
+        simulate_latency("DYNAMODB")
+        self.items.pop(self.__key(Key), None)
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ExpressionAttributeNames: dict = None,
+        ExpressionAttributeValues: dict = None,
+        **kwargs,
+    ):
+        simulate_latency("DYNAMODB")
+        item = self.items.setdefault(self.__key(Key), dict(Key))
+        values = json.loads(json.dumps(ExpressionAttributeValues or {}, default=str))
+        self.__update(item, UpdateExpression, ExpressionAttributeNames or {}, values)
+        return {"Attributes": json.loads(json.dumps(item))}
+
+    def scan(
+        self,
+        FilterExpression: ConditionBase = None,
+        ProjectionExpression: str = None,
+        ExpressionAttributeNames: dict = None,
+        **kwargs,
+    ):
+        simulate_latency("DYNAMODB")
+        items = [
+            json.loads(json.dumps(i))
+            for i in self.items.values()
+            if FilterExpression is None or self.__matches(i, FilterExpression)
+        ]
+        return {
+            "Items": [
+                project(i, ProjectionExpression, ExpressionAttributeNames)
+                for i in items
+            ]
+        }
+
+    def query(
+        self,
+        KeyConditionExpression: ConditionBase,
+        IndexName: str = None,
+        ScanIndexForward: bool = True,
+        FilterExpression: ConditionBase = None,
+        ProjectionExpression: str = None,
+        ExpressionAttributeNames: dict = None,
+        **kwargs,
+    ):
+        simulate_latency("DYNAMODB")
+        items = [
+            json.loads(json.dumps(i))
+            for i in self.items.values()
+            if self.__matches(i, KeyConditionExpression)
+            and (FilterExpression is None or self.__matches(i, FilterExpression))
+        ]
+        sort_key = self.indexes.get(IndexName)
+        if sort_key is not None:
+            items.sort(key=lambda i: i.get(sort_key, 0), reverse=not ScanIndexForward)
+        return {
+            "Items": [
+                project(i, ProjectionExpression, ExpressionAttributeNames)
+                for i in items
+            ]
+        }
+
+    def batch_writer(self):
+        table = self
+
+        class BatchWriter:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def put_item(self, Item: dict):
+                table.put_item(Item=Item)
+
+            def delete_item(self, Key: dict):
+                table.delete_item(Key=Key)
+
+        return BatchWriter()
+
+
+class FakeDynamoDB:
+    """boto3.resource("dynamodb") の代替"""
+
+    def __init__(self):
+        from src.app.model import db_model as db
+
+        self.models = {
+            model.get_name(): model
+            for model in (
+                db.ItemClassification,
+                db.TemporalExpenditure,
+                db.User,
+                db.MessageSession,
+                db.ImageSet,
+                db.ReceiptAnalysisResult,
+                db.SheetsWriteRecord,
+            )
+        }
+        self.tables: dict[str, FakeTable] = {}
+        # resource.meta.client と同様に、一括処理はテーブルを経由せずに呼び出される
+        self.meta = SimpleNamespace(client=self)
+
+    def Table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            model = self.models[name]
+            key_names = [model.get_parttion_key()[0]]
+            if model.get_sort_key() is not None:
+                key_names.append(model.get_sort_key()[0])
+            indexes = {
+                index_name: None if sort_key is None else sort_key[0]
+                for index_name, (_, sort_key) in (
+                    model.get_global_secondary_indexes().items()
+                )
+            }
+            self.tables[name] = FakeTable(name, key_names, indexes)
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems: dict, **kwargs):
+        simulate_latency("DYNAMODB")
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            items = (table.find(key) for key in request["Keys"])
+            responses[name] = [item for item in items if item is not None]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems: dict, **kwargs):
+        simulate_latency("DYNAMODB")
+        for name, requests in RequestItems.items():
+            table = self.Table(name)
+            for request in requests:
+                if "PutRequest" in request:
+                    table.items[table.key_of(request["PutRequest"]["Item"])] = (
+                        json.loads(
+                            json.dumps(request["PutRequest"]["Item"], default=str)
+                        )
+                    )
+                else:
+                    table.items.pop(table.key_of(request["DeleteRequest"]["Key"]), None)
+        return {"UnprocessedItems": {}}
+
+
+# ---------------- SQS ----------------
+
+
+class FakeSqsClient:
+    """boto3.client("sqs") の代替"""
+
+    def __init__(self):
+        self.messages: list[str] = []
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs):
+        simulate_latency("SQS")
+        self.messages.append(MessageBody)
+        return {"MessageId": str(len(self.messages))}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict], **kwargs):
+        simulate_latency("SQS")
+        self.messages.extend(e["MessageBody"] for e in Entries)
+        return {
+            "Successful": [{"Id": e["Id"], "MessageId": e["Id"]} for e in Entries],
+            "Failed": [],
+        }
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs):
+        simulate_latency("SQS")
+        return {}
+
+
+# ---------------- Azure Document Intelligence ----------------
+
+
+class FakeDocumentIntelligenceClient:
+    """DocumentIntelligenceClient の代替。常に同じレシートを解析結果として返します。"""
+
+    FIELDS = {
+        "Items": {
+            "valueArray": [
+                {
+                    "valueObject": {
+                        "Description": {"valueString": f"商品{i}"},
+                        "TotalPrice": {"valueCurrency": {"amount": 100.0 * i}},
+                    }
+                }
+                for i in range(1, 11)
+            ]
+        },
+        "TransactionDate": {"valueDate": "2025-01-01"},
+        "MerchantName": {"valueString": "ベンチマーク商店"},
+        "Total": {"valueCurrency": {"amount": 5940.0}},
+    }
+
+    def begin_analyze_document(self, **kwargs):
+        simulate_latency("AZURE")
+        result = SimpleNamespace(documents=[SimpleNamespace(fields=self.FIELDS)])
+        return SimpleNamespace(result=lambda: result)
+
+
+# ---------------- LINE Messaging API ----------------
+
+
+def fake_line_pool_manager_request(self, method: str, url: str, *args, **kwargs):
+    """
+    urllib3.PoolManager.request の代替。LINE Messaging APIのエンドポイントごとに応答を返します。
+    """
+    import urllib3
+
+    simulate_latency("LINE")
+    headers = {"content-type": "application/json"}
+    if "/content" in url:
+        # メッセージIDごとに内容を変え、解析結果のキャッシュに当たらないようにする
+        body = b"\xff\xd8\xff" + url.encode() + b"\x00" * 1024
+        headers = {"content-type": "image/jpeg"}
+    elif "/profile/" in url:
+        body = json.dumps(
+            {"displayName": "ベンチマーク", "userId": url.rsplit("/", 1)[-1]}
+        ).encode()
+    elif "/reply" in url or "/push" in url:
+        body = b'{"sentMessages": [{"id": "0", "quoteToken": "q"}]}'
+    else:
+        body = b"{}"
+    return urllib3.HTTPResponse(
+        body=body, status=200, headers=headers, preload_content=True
+    )
+
+
+# ---------------- Google Sheets ----------------
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows: list[list] = []
+
+    def append_rows(self, values: list[list], **kwargs):
+        simulate_latency("SHEETS")
+        self.rows.extend(values)
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.worksheets: dict[str, FakeWorksheet] = {}
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        simulate_latency("SHEETS")
+        return self.worksheets.setdefault(name, FakeWorksheet())
+
+
+class FakeGspreadClient:
+    def __init__(self):
+        self.spreadsheets: dict[str, FakeSpreadsheet] = {}
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        simulate_latency("SHEETS")
+        return self.spreadsheets.setdefault(key, FakeSpreadsheet())
+
+
+# ---------------- インストール ----------------
+
+
+def install_fakes() -> SimpleNamespace:
+    """
+    クライアントレジストリと外部通信を代替に差し替えます。
+    ハンドラのimport後、最初の呼び出し前に実行します。
+    Returns:
+        差し替えた代替オブジェクト
+    """
+    import urllib3
+
+    from src.app.config import clients
+
+    fakes = SimpleNamespace(
+        dynamodb=FakeDynamoDB(),
+        sqs=FakeSqsClient(),
+        document_intelligence=FakeDocumentIntelligenceClient(),
+        gspread=FakeGspreadClient(),
+    )
+    clients._registry["get_dynamodb"] = fakes.dynamodb
+    clients._registry["get_sqs_client"] = fakes.sqs
+    clients._registry["get_document_intelligence_client"] = fakes.document_intelligence
+    clients._registry["get_gspread_client"] = fakes.gspread
+    urllib3.PoolManager.request = fake_line_pool_manager_request
+    return fakes
@@ -1,14 +1,14 @@
-from src.app.functions.analyze_receipt import (
-    lambda_handler as analyze_receipt_lambda_handler,
-)
-from src.app.functions.line_bot_handler import (
-    lambda_handler as line_bot_handler_lambda_handler,
-)
+# NOTE: 各Lambdaは src.app.functions 配下のモジュールを直接ハンドラとして指定し、
+# 自身が使用するアダプタのみをimportする。ここでは互換性のため、呼び出し時にimportする。
 
 
 def analyze_receipt(event, context):
-    return analyze_receipt_lambda_handler(event, context)
+    from src.app.functions.analyze_receipt import lambda_handler
+
+    return lambda_handler(event, context)
 
 
 def line_bot_handler(event, context):
-    return line_bot_handler_lambda_handler(event, context)
+    from src.app.functions.line_bot_handler import lambda_handler
+
+    return lambda_handler(event, context)
@@ -1,10 +1,5 @@
-import os
 from typing import Dict
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.documentintelligence import (
-    AnalyzeDocumentLROPoller,
-    DocumentIntelligenceClient,
-)
+from azure.ai.documentintelligence import AnalyzeDocumentLROPoller
 from azure.ai.documentintelligence.models import (
     AnalyzeDocumentRequest,
     AnalyzeResult,
@@ -12,18 +7,10 @@ from azure.ai.documentintelligence.models import (
     StringIndexType,
 )
 
+from src.app.config.clients import get_document_intelligence_client
 from src.app.config.logger import get_app_logger
 from src.app.model.usecase_model import ReceiptResult
 
-AZURE_DOCUMENT_INTEIGENCE_ENDPOINT = os.environ["AZURE_DOCUMENT_INTEIGENCE_ENDPOINT"]
-AZURE_KEY_CREDENTIAL = os.environ["AZURE_KEY_CREDENTIAL"]
-AZURE_API_VERSION = "2024-11-30"
-
-document_intelligence_client: DocumentIntelligenceClient = DocumentIntelligenceClient(
-    endpoint=AZURE_DOCUMENT_INTEIGENCE_ENDPOINT,
-    credential=AzureKeyCredential(AZURE_KEY_CREDENTIAL),
-    api_version=AZURE_API_VERSION,
-)
 logger = get_app_logger(__name__)
 
 
@@ -39,7 +26,7 @@ def analyze_receipt(data: bytes) -> list[ReceiptResult]:
         return None
 
     poller: AnalyzeDocumentLROPoller[AnalyzeResult] = (
-        document_intelligence_client.begin_analyze_document(
+        get_document_intelligence_client().begin_analyze_document(
             model_id="prebuilt-receipt",
             analyze_request=AnalyzeDocumentRequest(bytes_source=data),
             string_index_type=StringIndexType.UNICODE_CODE_POINT,
@@ -87,7 +74,10 @@ def analyze_receipt(data: bytes) -> list[ReceiptResult]:
             if receipt.total is None and len(receipt.items) == 0:
                 continue
             logger.info(
-                f"{receipt.date}に{receipt.store}で購入した合計{receipt.total}円のレシートに関して、解析に成功しました"
+                "%sに%sで購入した合計%s円のレシートに関して、解析に成功しました",
+                receipt.date,
+                receipt.store,
+                receipt.total,
             )
             receipt_list.append(receipt)
     if len(receipt_list) == 0:
@@ -1,58 +1,154 @@
-import gspread
 import os
-from oauth2client.service_account import ServiceAccountCredentials
+import random
+import threading
+import time
+from typing import Any, Optional
 
+from src.app.config.clients import get_gspread_client
 from src.app.config.logger import get_app_logger
 from src.app.model.usecase_model import AccountBookInput
 
-SPREADSHEET_ID = os.environ["SPREADSHEET_ID"]
-EXPENDITURE_SHEET_NAME = os.environ["EXPENDITURE_SHEET_NAME"]
+logger = get_app_logger(__name__)
 
-# 認証情報のスコープ
-SCOPE = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-]
+# スプレッドシートとシートの取得にはそれぞれAPIの呼び出しが必要なため、プロセス内で再利用する
+_spreadsheets: dict[str, Any] = {}
+_worksheets: dict[tuple[str, str], Any] = {}
+_lock = threading.Lock()
 
-# 認証情報ファイルのパス
-CREDS_FILE = "resource/gcp-credentials.json"
-logger = get_app_logger(__name__)
+# 書き込みの制限超過（429）やサーバーエラーの場合は、指数バックオフで再実行する
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_APPEND_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 1.0
+MAX_RETRY_SECONDS = 32.0
+
+
+def get_worksheet(spreadsheet_id: str, sheet_name: str):
+    """
+    シートを取得します。取得済みの場合は、APIを呼び出さずに再利用します。
+    Args:
+        spreadsheet_id: スプレッドシートのID
+        sheet_name: シート名
+    Returns:
+        gspread.Worksheet: シート
+    """
+    key = (spreadsheet_id, sheet_name)
+    worksheet = _worksheets.get(key)
+    if worksheet is not None:
+        return worksheet
+    with _lock:
+        if key not in _worksheets:
+            spreadsheet = _spreadsheets.get(spreadsheet_id)
+            if spreadsheet is None:
+                spreadsheet = get_gspread_client().open_by_key(spreadsheet_id)
+                _spreadsheets[spreadsheet_id] = spreadsheet
+            _worksheets[key] = spreadsheet.worksheet(sheet_name)
+        return _worksheets[key]
+
+
+def invalidate_worksheets():
+    """
+    再利用しているスプレッドシートとシートを破棄します。
+    """
+    with _lock:
+        _spreadsheets.clear()
+        _worksheets.clear()
 
 
 def append_data_to_spreadsheet(spreadsheet_id, sheet_name, data_list):
     """
     スプレッドシートの一番下の行に複数のデータを追加します。
+    認証済みのクライアントとシートは再利用するため、2回目以降はデータの追加のみAPIを呼び出します。
 
     Args:
         spreadsheet_id: スプレッドシートのID。URLから取得できます。
         sheet_name: シート名。
         data_list: 追加するデータのリストのリスト。例: [['value1', 'value2'], ['value3', 'value4']]
     """
-    # 認証情報を作成
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, SCOPE)
-    # Google Sheets APIに接続
-    client = gspread.authorize(creds)
-
-    # スプレッドシートを開く
-    spreadsheet = client.open_by_key(spreadsheet_id)
-    # シートを取得
-    sheet = spreadsheet.worksheet(sheet_name)
-
-    sheet.append_rows(
-        values=data_list,
-        value_input_option="USER_ENTERED",
-    )
+    sheet = get_worksheet(spreadsheet_id, sheet_name)
+    try:
+        sheet.append_rows(
+            values=data_list,
+            value_input_option="USER_ENTERED",
+        )
+    except Exception as e:
+        # シートの削除や名前の変更に備えて、次回は取得し直す
+        # 制限超過などの一時的なエラーの場合は、再実行時のAPI呼び出しを増やさないよう保持する
+        if get_retry_delay(e, 0) is None:
+            invalidate_worksheets()
+        raise
 
     logger.info(
-        f"データをスプレッドシート '{spreadsheet_id}' のシート '{sheet_name}' に追加しました。"
+        "データをスプレッドシート '%s' のシート '%s' に追加しました。",
+        spreadsheet_id,
+        sheet_name,
     )
 
 
-def register_expenditure(input: AccountBookInput):
+def get_retry_delay(error: Exception, attempt: int) -> Optional[float]:
     """
-    家計簿のスプレッドシートに支出データを追加します。
+    失敗した書き込みを再実行するまでの待機時間を取得します。
+    Retry-Afterヘッダーがある場合はその値を、ない場合は指数バックオフにゆらぎを加えた値を使用します。
+    Args:
+        error: 書き込み時の例外
+        attempt: 何回目の再実行か（0始まり）
+    Returns:
+        Optional[float]: 待機秒数。再実行しても成功しない例外の場合はNone
+    """
+    from gspread.exceptions import APIError
+
+    if not isinstance(error, APIError):
+        return None
+    status_code = getattr(error.response, "status_code", error.code)
+    if status_code not in RETRYABLE_STATUS_CODES:
+        return None
+    retry_after = error.response.headers.get("Retry-After")
+    if retry_after is not None and retry_after.isdigit():
+        return float(retry_after)
+    return min(MAX_RETRY_SECONDS, RETRY_BASE_SECONDS * 2**attempt + random.random())
+
+
+def append_data_with_backoff(
+    spreadsheet_id: str,
+    sheet_name: str,
+    data_list: list[list],
+    deadline: Optional[float] = None,
+):
+    """
+    スプレッドシートにデータを追加します。
+    制限超過やサーバーエラーで失敗した場合は、待機してから再実行します。
+    Args:
+        spreadsheet_id: スプレッドシートのID
+        sheet_name: シート名
+        data_list: 追加するデータのリストのリスト
+        deadline: 再実行を打ち切る時刻（time.monotonic()の値）。Noneの場合は回数のみで打ち切る
+    """
+    for attempt in range(MAX_APPEND_ATTEMPTS):
+        try:
+            append_data_to_spreadsheet(spreadsheet_id, sheet_name, data_list)
+            return
+        except Exception as e:
+            delay = get_retry_delay(e, attempt)
+            if (
+                delay is None
+                or attempt + 1 >= MAX_APPEND_ATTEMPTS
+                or (deadline is not None and time.monotonic() + delay > deadline)
+            ):
+                raise
+            logger.warning(
+                "スプレッドシートへの書き込みに失敗したため、%.1f秒後に再実行します。error = %s",
+                delay,
+                e,
+            )
+            time.sleep(delay)
+
+
+def build_expenditure_rows(input: AccountBookInput) -> list[list[str | int]]:
+    """
+    支出データを品目ごとの行に変換します。
     Args:
         input: 支出データ。
+    Returns:
+        list[list[str | int]]: スプレッドシートに追加する行
     """
     data = []
     for item in input.items:
@@ -70,16 +166,18 @@ def register_expenditure(input: AccountBookInput):
                 item.remarks,
             ]
         )
-    append_data_to_spreadsheet(SPREADSHEET_ID, EXPENDITURE_SHEET_NAME, data)
+    return data
 
 
-def register_only_total(input: AccountBookInput):
+def build_only_total_rows(input: AccountBookInput) -> list[list[str | int]]:
     """
-    家計簿のスプレッドシートに支出データを追加します。
+    支出データを合計のみの行に変換します。
     Args:
         input: 支出データ。
+    Returns:
+        list[list[str | int]]: スプレッドシートに追加する行
     """
-    data = [
+    return [
         [
             input.date.replace("-", "/"),
             f"{input.minor_classification}等",
@@ -93,4 +191,29 @@ def register_only_total(input: AccountBookInput):
             "LINE経由。レシートの合計のみ登録",
         ]
     ]
-    append_data_to_spreadsheet(SPREADSHEET_ID, EXPENDITURE_SHEET_NAME, data)
+
+
+def register_expenditure(input: AccountBookInput):
+    """
+    家計簿のスプレッドシートに支出データを追加します。
+    Args:
+        input: 支出データ。
+    """
+    append_data_to_spreadsheet(
+        os.environ["SPREADSHEET_ID"],
+        os.environ["EXPENDITURE_SHEET_NAME"],
+        build_expenditure_rows(input),
+    )
+
+
+def register_only_total(input: AccountBookInput):
+    """
+    家計簿のスプレッドシートに支出データを追加します。
+    Args:
+        input: 支出データ。
+    """
+    append_data_to_spreadsheet(
+        os.environ["SPREADSHEET_ID"],
+        os.environ["EXPENDITURE_SHEET_NAME"],
+        build_only_total_rows(input),
+    )
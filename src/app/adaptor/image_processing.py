@@ -0,0 +1,367 @@
+import io
+import math
+import os
+import threading
+import time
+from enum import Enum
+from typing import Optional
+
+from pydantic import Field
+
+from src.app.config.logger import get_app_logger
+from src.app.model.common_model import CommonModel
+
+logger = get_app_logger(__name__)
+
+# "false"の場合、画像を加工せずにそのまま解析する
+IMAGE_PREPROCESS_ENABLED_ENV = "IMAGE_PREPROCESS_ENABLED"
+# 長辺の最大ピクセル数。レシートの文字が読み取れる大きさを保つ
+IMAGE_MAX_SIDE_ENV = "IMAGE_MAX_SIDE"
+DEFAULT_IMAGE_MAX_SIDE = 2000
+# JPEGの品質。文字の輪郭が崩れない範囲で小さくする
+IMAGE_JPEG_QUALITY_ENV = "IMAGE_JPEG_QUALITY"
+DEFAULT_IMAGE_JPEG_QUALITY = 80
+
+# "false"の場合、画像の品質を確認せずに解析する
+IMAGE_QUALITY_GATE_ENABLED_ENV = "IMAGE_QUALITY_GATE_ENABLED"
+# 品質の確認に使用する画像の長辺の最大ピクセル数
+QUALITY_CHECK_MAX_SIDE = 1024
+# 品質の基準。解析できる画像を誤って拒否しないよう、明らかに解析できない画像のみを対象とする
+MIN_SHORT_SIDE = 200  # 元の画像の短辺
+MAX_ASPECT_RATIO = 8.0  # 長辺 / 短辺
+DARK_PIXEL_VALUE = 40
+MAX_DARK_RATIO = 0.95  # 暗い画素の割合
+BRIGHT_PIXEL_VALUE = 250
+MAX_BRIGHT_RATIO = 0.97  # 白飛びした画素の割合
+MIN_CONTRAST = 8.0  # 輝度の標準偏差。これ未満は無地の画像とみなす
+MIN_SHARPNESS = 20.0  # ラプラシアンの分散
+EDGE_THRESHOLD = 40  # 文字の輪郭とみなす輝度勾配
+MIN_TEXT_DENSITY = 0.003  # 輪郭の画素の割合
+
+# 画像のデコードと加工は同時に1枚までとする
+# 複数のレシートを並行して解析しても、展開される画像は1枚分に収まる
+DECODE_SEMAPHORE = threading.BoundedSemaphore(1)
+
+
+class ImageQualityIssue(str, Enum):
+    TOO_SMALL = "TOO_SMALL"
+    INVALID_ASPECT_RATIO = "INVALID_ASPECT_RATIO"
+    TOO_DARK = "TOO_DARK"
+    TOO_BRIGHT = "TOO_BRIGHT"
+    BLURRY = "BLURRY"
+    NO_TEXT = "NO_TEXT"
+
+    @property
+    def description(self) -> str:
+        """
+        ユーザーへの返信に使用する説明を返します。
+        """
+        return {
+            ImageQualityIssue.TOO_SMALL: "画像が小さすぎる",
+            ImageQualityIssue.INVALID_ASPECT_RATIO: "画像が極端に細長い",
+            ImageQualityIssue.TOO_DARK: "画像が暗すぎる",
+            ImageQualityIssue.TOO_BRIGHT: "画像が明るすぎる",
+            ImageQualityIssue.BLURRY: "画像がぼやけている",
+            ImageQualityIssue.NO_TEXT: "文字が写っていない",
+        }[self]
+
+
+class ImageQuality(CommonModel):
+    issue: Optional[ImageQualityIssue] = Field(default=None)  # 問題がない場合はNone
+    width: int = Field(default=0)  # 元の画像の幅
+    height: int = Field(default=0)  # 元の画像の高さ
+    aspect_ratio: float = Field(default=0.0)
+    brightness: float = Field(default=0.0)  # 平均輝度
+    dark_ratio: float = Field(default=0.0)
+    bright_ratio: float = Field(default=0.0)
+    sharpness: float = Field(default=0.0)
+    text_density: float = Field(default=0.0)
+    elapsed_ms: float = Field(default=0.0)
+
+
+class PreprocessedImage(CommonModel):
+    data: bytes = Field(default=b"")
+    processed: bool = Field(default=False)  # 加工後の画像かどうか
+    original_bytes: int = Field(default=0)
+    processed_bytes: int = Field(default=0)
+    width: Optional[int] = Field(default=None)
+    height: Optional[int] = Field(default=None)
+    elapsed_ms: float = Field(default=0.0)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+
+def prepare_image(data: bytes) -> tuple[ImageQuality, PreprocessedImage]:
+    """
+    レシートの画像を1回だけデコードし、品質の確認と解析前の加工を行います。
+    品質はデコードしたグレースケールの画像を縮小して確認し、同じ画像をJPEGに変換します。
+    Args:
+        data: 画像のバイナリデータ
+    Returns:
+        ImageQuality: 品質の判定結果。確認しない場合は問題なし
+        PreprocessedImage: 加工後の画像。加工しない場合は元の画像
+    """
+    check_enabled = is_quality_gate_enabled()
+    preprocess_enabled = is_preprocess_enabled()
+    if not check_enabled and not preprocess_enabled:
+        return ImageQuality(), to_original(data)
+    max_side = get_max_side() if preprocess_enabled else QUALITY_CHECK_MAX_SIDE
+    with DECODE_SEMAPHORE:
+        started_at = time.perf_counter()
+        decoded = decode_grayscale(data, max_side)
+        quality = (
+            measure_quality(decoded, started_at) if check_enabled else ImageQuality()
+        )
+        if quality.issue is not None or not preprocess_enabled:
+            return quality, to_original(data)
+        return quality, encode_jpeg(data, decoded, get_jpeg_quality(), started_at)
+
+
+def preprocess_image(
+    data: bytes, max_side: int = None, quality: int = None
+) -> PreprocessedImage:
+    """
+    解析前にレシートの画像を縮小し、グレースケールのJPEGに変換します。
+    EXIFなどのメタデータは、画像の向きを反映したうえで削除します。
+    Pillowが利用できない場合や、加工しても小さくならない場合は元の画像を返します。
+    Args:
+        data: 画像のバイナリデータ
+        max_side: 長辺の最大ピクセル数
+        quality: JPEGの品質
+    Returns:
+        PreprocessedImage: 加工後の画像
+    """
+    if not is_preprocess_enabled():
+        return to_original(data)
+    with DECODE_SEMAPHORE:
+        started_at = time.perf_counter()
+        decoded = decode_grayscale(data, max_side or get_max_side())
+        return encode_jpeg(data, decoded, quality or get_jpeg_quality(), started_at)
+
+
+def check_image_quality(data: bytes) -> ImageQuality:
+    """
+    Azureに送信する前に、明らかに解析できない画像（小さい、細長い、暗い、白飛び、ぼやけ、文字がない）を判定します。
+    NumPyやPillowが利用できない場合や、画像を読み込めない場合は判定せずに問題なしとします。
+    Args:
+        data: 画像のバイナリデータ
+    Returns:
+        ImageQuality: 判定結果と各指標
+    """
+    if not is_quality_gate_enabled():
+        return ImageQuality()
+    with DECODE_SEMAPHORE:
+        started_at = time.perf_counter()
+        decoded = decode_grayscale(data, QUALITY_CHECK_MAX_SIDE)
+        return measure_quality(decoded, started_at)
+
+
+def is_preprocess_enabled() -> bool:
+    return os.environ.get(IMAGE_PREPROCESS_ENABLED_ENV, "true").lower() != "false"
+
+
+def is_quality_gate_enabled() -> bool:
+    return os.environ.get(IMAGE_QUALITY_GATE_ENABLED_ENV, "true").lower() != "false"
+
+
+def get_max_side() -> int:
+    return int(os.environ.get(IMAGE_MAX_SIDE_ENV, DEFAULT_IMAGE_MAX_SIDE))
+
+
+def get_jpeg_quality() -> int:
+    return int(os.environ.get(IMAGE_JPEG_QUALITY_ENV, DEFAULT_IMAGE_JPEG_QUALITY))
+
+
+def to_original(data: bytes) -> PreprocessedImage:
+    """
+    加工しなかった場合の結果を作成します。
+    """
+    return PreprocessedImage(
+        data=data, original_bytes=len(data), processed_bytes=len(data)
+    )
+
+
+class DecodedImage(CommonModel):
+    """
+    縮小しながらデコードしたグレースケールの画像。デコードできなかった場合はimageがNone
+    """
+
+    image: Optional[object] = Field(default=None)  # PIL.Image.Image
+    width: int = Field(default=0)  # 元の画像の幅
+    height: int = Field(default=0)  # 元の画像の高さ
+
+
+def decode_grayscale(data: bytes, max_side: int) -> DecodedImage:
+    """
+    画像を長辺がmax_side以下のグレースケールの画像としてデコードします。
+    JPEGは縮小しながらデコードし、元の解像度の画像をメモリに展開しません。
+    EXIFの向きは画像に反映します。DECODE_SEMAPHOREを取得してから呼び出してください。
+    Args:
+        data: 画像のバイナリデータ
+        max_side: 長辺の最大ピクセル数
+    Returns:
+        DecodedImage: デコードした画像
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        logger.warning("Pillowが利用できないため、画像を加工・確認せずに解析します。")
+        return DecodedImage()
+    try:
+        # fetch_imageのbytearrayもそのまま読み込み、画像データを複製しない
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            scale = min(1.0, max_side / max(image.size))
+            image.draft(
+                "L",
+                (math.ceil(image.width * scale), math.ceil(image.height * scale)),
+            )
+            image = ImageOps.exif_transpose(image).convert("L")
+        image.thumbnail((max_side, max_side))
+    except Exception as e:
+        logger.warning("画像を読み込めないため、そのまま解析します。error = %s", e)
+        return DecodedImage()
+    return DecodedImage(image=image, width=width, height=height)
+
+
+def encode_jpeg(
+    data: bytes, decoded: DecodedImage, quality: int, started_at: float
+) -> PreprocessedImage:
+    """
+    デコードした画像を、メタデータを含まないJPEGに変換します。
+    加工できない場合や、加工しても小さくならない場合は元の画像を返します。
+    Args:
+        data: 元の画像のバイナリデータ
+        decoded: デコードした画像
+        quality: JPEGの品質
+        started_at: 計測の開始時刻（time.perf_counter()の値）
+    Returns:
+        PreprocessedImage: 加工後の画像
+    """
+    if decoded.image is None:
+        return to_original(data)
+    image = decoded.image
+    try:
+        # ICCプロファイルなども含め、メタデータは保存しない
+        image.info = {}
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality)
+    except Exception as e:
+        logger.warning("画像を加工できないため、そのまま解析します。error = %s", e)
+        return to_original(data)
+
+    processed = output.getvalue()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    if len(processed) >= len(data):
+        original = to_original(data)
+        original.elapsed_ms = elapsed_ms
+        return original
+    result = PreprocessedImage(
+        data=processed,
+        processed=True,
+        original_bytes=len(data),
+        processed_bytes=len(processed),
+        width=image.width,
+        height=image.height,
+        elapsed_ms=elapsed_ms,
+    )
+    logger.info(
+        "画像を加工しました。%d bytes -> %d bytes (%d bytes削減), %dx%d, %.1f ms",
+        result.original_bytes,
+        result.processed_bytes,
+        result.saved_bytes,
+        result.width,
+        result.height,
+        result.elapsed_ms,
+    )
+    return result
+
+
+def measure_quality(decoded: DecodedImage, started_at: float) -> ImageQuality:
+    """
+    デコードした画像から品質の指標を計算し、明らかに解析できない画像かを判定します。
+    指標は長辺をQUALITY_CHECK_MAX_SIDEに縮小した画像で計算します。
+    NumPyが利用できない場合や、画像を読み込めなかった場合は判定せずに問題なしとします。
+    Args:
+        decoded: デコードした画像
+        started_at: 計測の開始時刻（time.perf_counter()の値）
+    Returns:
+        ImageQuality: 判定結果と各指標
+    """
+    quality = ImageQuality()
+    if decoded.image is None:
+        return quality
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning("NumPyが利用できないため、画像の品質を確認しません。")
+        return quality
+
+    quality.width, quality.height = decoded.width, decoded.height
+    image = decoded.image
+    if max(image.size) > QUALITY_CHECK_MAX_SIDE:
+        image = image.copy()
+        image.thumbnail((QUALITY_CHECK_MAX_SIDE, QUALITY_CHECK_MAX_SIDE))
+    # 輝度は0〜255のため、差分や勾配もint16で計算し、float32の配列を作らない
+    gray = np.asarray(image)
+    pixels = gray.astype(np.int16)
+
+    short_side = min(quality.width, quality.height)
+    quality.aspect_ratio = max(quality.width, quality.height) / max(short_side, 1)
+
+    # 輝度のヒストグラム。平均と標準偏差もヒストグラムから計算する
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    total = max(gray.size, 1)
+    levels = np.arange(256)
+    quality.brightness = float((histogram * levels).sum() / total)
+    contrast = math.sqrt(
+        max(float((histogram * levels**2).sum() / total) - quality.brightness**2, 0.0)
+    )
+    quality.dark_ratio = float(histogram[:DARK_PIXEL_VALUE].sum() / total)
+    quality.bright_ratio = float(histogram[BRIGHT_PIXEL_VALUE:].sum() / total)
+
+    # ぼやけ: ラプラシアン（4近傍）の分散
+    laplacian = (
+        pixels[:-2, 1:-1]
+        + pixels[2:, 1:-1]
+        + pixels[1:-1, :-2]
+        + pixels[1:-1, 2:]
+        - 4 * pixels[1:-1, 1:-1]
+    )
+    quality.sharpness = float(laplacian.var()) if laplacian.size else 0.0
+
+    # 文字の量: 輝度勾配が大きい画素の割合
+    gradient_x = np.abs(np.diff(pixels, axis=1))[:-1, :]
+    gradient_y = np.abs(np.diff(pixels, axis=0))[:, :-1]
+    edges = np.maximum(gradient_x, gradient_y) > EDGE_THRESHOLD
+    quality.text_density = float(edges.mean()) if edges.size else 0.0
+
+    if short_side < MIN_SHORT_SIDE:
+        quality.issue = ImageQualityIssue.TOO_SMALL
+    elif quality.aspect_ratio > MAX_ASPECT_RATIO:
+        quality.issue = ImageQualityIssue.INVALID_ASPECT_RATIO
+    elif quality.dark_ratio > MAX_DARK_RATIO:
+        quality.issue = ImageQualityIssue.TOO_DARK
+    elif quality.bright_ratio > MAX_BRIGHT_RATIO:
+        quality.issue = ImageQualityIssue.TOO_BRIGHT
+    elif contrast < MIN_CONTRAST:
+        quality.issue = ImageQualityIssue.NO_TEXT
+    elif quality.sharpness < MIN_SHARPNESS:
+        quality.issue = ImageQualityIssue.BLURRY
+    elif quality.text_density < MIN_TEXT_DENSITY:
+        quality.issue = ImageQualityIssue.NO_TEXT
+    quality.elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+    logger.info(
+        "画像の品質を確認しました。issue = %s, sharpness = %.1f, brightness = %.1f, "
+        "text_density = %.4f, aspect_ratio = %.2f, %.1f ms",
+        quality.issue,
+        quality.sharpness,
+        quality.brightness,
+        quality.text_density,
+        quality.aspect_ratio,
+        quality.elapsed_ms,
+    )
+    return quality
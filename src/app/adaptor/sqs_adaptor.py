@@ -1,41 +1,181 @@
 import os
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Optional
 
-from src.app.config.logger import get_app_logger
+from pydantic import Field
 
-sqs = boto3.client("sqs")
+from src.app.config.clients import get_sqs_client
+from src.app.config.logger import get_app_logger
+from src.app.model.common_model import CommonModel
 
-QUEUE_URL = os.environ["SQS_QUEUE_URL"]
 logger = get_app_logger(__name__)
 
+# SQSのSendMessageBatchの制限
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+# 失敗したエントリの再送信
+MAX_SEND_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 0.1
+
+# 並行して送信するバッチ数
+MAX_SEND_CONCURRENCY = 4
+
+
+class SendMessageResult(CommonModel):
+    id: str = Field(default="")  # エントリID（message_bodiesのインデックス）
+    message_body: str = Field(default="")
+    message_id: Optional[str] = Field(default=None)  # 送信に成功した場合のみ設定
+    error_code: Optional[str] = Field(default=None)
+    error_message: Optional[str] = Field(default=None)
+    attempts: int = Field(default=0)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.message_id is not None
+
 
-def send_message_to_sqs(message_body: str):
+def send_message_to_sqs(message_body: str, queue_url: Optional[str] = None):
     """
     SQSにメッセージを送信する
     Args:
         message_body (str): メッセージ本文
+        queue_url (Optional[str]): キューのURL。Noneの場合はレシート解析のキュー
     Returns:
         dict: SQSからのレスポンス
     """
-    response = sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=message_body)
+    response = get_sqs_client().send_message(
+        QueueUrl=queue_url or os.environ["SQS_QUEUE_URL"], MessageBody=message_body
+    )
     logger.info("Message sent to SQS.")
     return response
 
 
-def send_messages_to_sqs(message_bodies: list[str]):
+@cache
+def get_executor() -> ThreadPoolExecutor:
+    """
+    バッチを並行して送信するスレッドプールを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    return ThreadPoolExecutor(
+        max_workers=MAX_SEND_CONCURRENCY, thread_name_prefix="sqs_adaptor"
+    )
+
+
+def split_into_batches(
+    results: list[SendMessageResult],
+) -> list[list[SendMessageResult]]:
+    """
+    エントリをSendMessageBatchの制限（件数、合計サイズ）に収まるバッチに分割する
+    Args:
+        results (list[SendMessageResult]): 送信するエントリ
+    Returns:
+        list[list[SendMessageResult]]: バッチのリスト
+    """
+    batches: list[list[SendMessageResult]] = []
+    batch: list[SendMessageResult] = []
+    batch_bytes = 0
+    for result in results:
+        size = len(result.message_body.encode("utf-8"))
+        if batch and (
+            len(batch) >= MAX_BATCH_ENTRIES or batch_bytes + size > MAX_BATCH_BYTES
+        ):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(result)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def send_batch(
+    queue_url: str, batch: list[SendMessageResult]
+) -> list[SendMessageResult]:
+    """
+    1つのバッチを送信し、結果を各エントリに設定する
+    Args:
+        queue_url (str): キューのURL
+        batch (list[SendMessageResult]): 送信するエントリ
+    Returns:
+        list[SendMessageResult]: 再送信が必要なエントリ
+    """
+    for result in batch:
+        result.attempts += 1
+    try:
+        response = get_sqs_client().send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{"Id": r.id, "MessageBody": r.message_body} for r in batch],
+        )
+    except Exception as e:
+        # スロットリングや通信エラーの場合は、バッチ全体を再送信する
+        for result in batch:
+            result.error_code = type(e).__name__
+            result.error_message = str(e)
+        return batch
+
+    results = {result.id: result for result in batch}
+    for successful in response.get("Successful", []):
+        result = results[successful["Id"]]
+        result.message_id = successful["MessageId"]
+        result.error_code = None
+        result.error_message = None
+    retry = []
+    for failed in response.get("Failed", []):
+        result = results[failed["Id"]]
+        result.error_code = failed.get("Code")
+        result.error_message = failed.get("Message")
+        # 送信側の誤り（メッセージの内容など）は再送信しても成功しない
+        if not failed.get("SenderFault", False):
+            retry.append(result)
+    return retry
+
+
+def send_messages_to_sqs(message_bodies: list[str]) -> list[SendMessageResult]:
     """
     SQSにメッセージを複数送信する
+    SendMessageBatchの制限に収まるようにバッチに分割して並行に送信し、
+    失敗したエントリのみを指数バックオフで再送信する
     Args:
         message_bodies (list[str]): メッセージ本文のリスト
     Returns:
-        dict: SQSからのレスポンス
+        list[SendMessageResult]: message_bodiesと同じ順番の、エントリごとの送信結果
     """
-    response = sqs.send_message_batch(
-        QueueUrl=QUEUE_URL,
-        Entries=[
-            {"Id": str(i), "MessageBody": message_body}
-            for i, message_body in enumerate(message_bodies)
-        ],
-    )
-    logger.info(f"{len(message_bodies)} messages sent to SQS.")
-    return response
+    queue_url = os.environ["SQS_QUEUE_URL"]
+    results = [
+        SendMessageResult(id=str(i), message_body=message_body)
+        for i, message_body in enumerate(message_bodies)
+    ]
+    pending = []
+    for result in results:
+        if len(result.message_body.encode("utf-8")) > MAX_BATCH_BYTES:
+            result.error_code = "MessageTooLong"
+            result.error_message = f"message body exceeds {MAX_BATCH_BYTES} bytes"
+        else:
+            pending.append(result)
+
+    for attempt in range(MAX_SEND_ATTEMPTS):
+        if not pending:
+            break
+        if attempt > 0:
+            time.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+        batches = split_into_batches(pending)
+        if len(batches) == 1:
+            retries = [send_batch(queue_url, batches[0])]
+        else:
+            retries = list(
+                get_executor().map(lambda batch: send_batch(queue_url, batch), batches)
+            )
+        pending = [result for retry in retries for result in retry]
+
+    failed = [result for result in results if not result.succeeded]
+    if failed:
+        logger.error(
+            "%d/%d messages could not be sent to SQS. failures = %s",
+            len(failed),
+            len(results),
+            [(r.id, r.error_code) for r in failed],
+        )
+    logger.info("%d messages sent to SQS.", len(results) - len(failed))
+    return results
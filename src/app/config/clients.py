@@ -0,0 +1,144 @@
+import atexit
+import os
+import threading
+from functools import wraps
+from typing import Any, Callable
+
+REGION_NAME = "ap-northeast-1"
+
+# LINE Messaging APIのホストごとに保持する接続数。
+# レコードの並行処理やローディング表示など、同時に送信するリクエスト数に合わせる
+LINE_CONNECTION_POOL_MAXSIZE = 8
+
+# Google Sheets APIの認証情報ファイルのパスとスコープ
+GCP_CREDENTIALS_FILE = "resource/gcp-credentials.json"
+GOOGLE_SHEETS_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# ファクトリ内で他のクライアントを取得できるよう、再入可能なロックを使用する
+_lock = threading.RLock()
+_registry: dict[str, Any] = {}
+_thread_local = threading.local()
+
+
+def lazy_client(factory: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    クライアントを初回呼び出し時に作成し、以降はプロセス内で再利用するデコレータです。
+    SDKのimportもfactory内で行うことで、使用しないLambdaではimportされないようにします。
+    """
+
+    @wraps(factory)
+    def _wrapper():
+        client = _registry.get(factory.__name__)
+        if client is not None:
+            return client
+        with _lock:
+            if factory.__name__ not in _registry:
+                _registry[factory.__name__] = factory()
+            return _registry[factory.__name__]
+
+    return _wrapper
+
+
+def thread_local_client(factory: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    クライアントをスレッドごとに作成し、同じスレッド内で再利用するデコレータです。
+    boto3のリソースのように、スレッド間で共有できないクライアントに使用します。
+    _registryに同名のクライアントが登録されている場合は、全スレッドでそちらを使用します。
+    """
+
+    @wraps(factory)
+    def _wrapper():
+        shared = _registry.get(factory.__name__)
+        if shared is not None:
+            return shared
+        client = getattr(_thread_local, factory.__name__, None)
+        if client is None:
+            client = factory()
+            setattr(_thread_local, factory.__name__, client)
+        return client
+
+    return _wrapper
+
+
+def reset_clients():
+    """
+    作成済みのクライアントを破棄します。
+    """
+    global _thread_local
+    with _lock:
+        _registry.clear()
+        _thread_local = threading.local()
+
+
+@thread_local_client
+def get_dynamodb():
+    import boto3
+
+    return boto3.resource("dynamodb", region_name=REGION_NAME)
+
+
+@lazy_client
+def get_sqs_client():
+    import boto3
+
+    return boto3.client("sqs")
+
+
+@lazy_client
+def get_line_configuration():
+    from linebot.v3.messaging import Configuration
+
+    configuration = Configuration(access_token=os.environ["CHANNEL_ACCESS_TOKEN"])
+    configuration.connection_pool_maxsize = LINE_CONNECTION_POOL_MAXSIZE
+    return configuration
+
+
+@lazy_client
+def get_line_api_client():
+    """
+    全てのLINE Messaging APIの呼び出しで共有するクライアントです。
+    接続をプールして再利用するため、呼び出しごとのTCP/TLSの接続確立が不要になります。
+    """
+    from linebot.v3.messaging import ApiClient
+
+    api_client = ApiClient(get_line_configuration())
+    atexit.register(close_line_api_client, api_client)
+    return api_client
+
+
+def close_line_api_client(api_client):
+    """
+    LINE Messaging APIのクライアントを終了し、プールしている接続を閉じます。
+    Args:
+        api_client: get_line_api_client()で作成したクライアント
+    """
+    api_client.close()
+    api_client.rest_client.pool_manager.clear()
+
+
+@lazy_client
+def get_document_intelligence_client():
+    from azure.core.credentials import AzureKeyCredential
+    from azure.ai.documentintelligence import DocumentIntelligenceClient
+
+    return DocumentIntelligenceClient(
+        endpoint=os.environ["AZURE_DOCUMENT_INTEIGENCE_ENDPOINT"],
+        credential=AzureKeyCredential(os.environ["AZURE_KEY_CREDENTIAL"]),
+        api_version="2024-11-30",
+    )
+
+
+@lazy_client
+def get_gspread_client():
+    """
+    認証済みのGoogle Sheets APIのクライアントです。
+    google-authの認証情報を使用するため、アクセストークンは期限切れの場合のみ更新されます。
+    """
+    import gspread
+
+    return gspread.service_account(
+        filename=GCP_CREDENTIALS_FILE, scopes=GOOGLE_SHEETS_SCOPES
+    )
@@ -1,8 +1,40 @@
+import atexit
 from contextvars import ContextVar
 from datetime import datetime
+from functools import lru_cache
 import json
-from logging import config, Formatter, getLogger
-from src.app.model.common_model import LogExtraInfo, LogMessage
+from json.encoder import encode_basestring
+import os
+import random
+import reprlib
+from queue import SimpleQueue
+import threading
+from logging import (
+    INFO,
+    config,
+    Filter,
+    Formatter,
+    Handler,
+    LogRecord,
+    getLevelName,
+    getLogger,
+)
+from logging.handlers import QueueHandler, QueueListener
+from pydantic import BaseModel
+from src.app.model.common_model import LogExtraInfo
+
+LOG_CONFIG_PATH = "./src/app/config/log_config.json"
+
+# "true"の場合、ログの出力をバックグラウンドスレッドで行う
+# Lambdaの実行環境が凍結されるまでに出力しきれない場合があるため、既定では無効
+LOG_QUEUE_ENABLED_ENV = "LOG_QUEUE_ENABLED"
+
+# ログメッセージの最大文字数。超えた部分は切り詰めて出力する
+LOG_MAX_MESSAGE_LENGTH_ENV = "LOG_MAX_MESSAGE_LENGTH"
+DEFAULT_LOG_MAX_MESSAGE_LENGTH = 4000
+
+# ロガーごとのサンプリング率。"ロガー名=率,ロガー名=率" の形式で、設定ファイルの値を上書きする
+LOG_SAMPLING_RATES_ENV = "LOG_SAMPLING_RATES"
 
 
 class LogContext:
@@ -16,40 +48,249 @@ class LogContext:
         line_message_id: str = None,
         temporal_expenditure_id: str = None,
     ):
-        """ログコンテキストを設定する"""
-        info: LogExtraInfo = LogContext.context.get()
-        if lambda_function_name:
-            info.lambda_function_name = lambda_function_name
-        if line_user_id:
-            info.line_user_id = line_user_id
-        if line_message_id:
-            info.line_message_id = line_message_id
-        if temporal_expenditure_id:
-            info.temporal_expenditure_id = temporal_expenditure_id
-        cls.context.set(info)
+        """
+        ログコンテキストを設定する。
+        既存のコンテキストは変更せずにコピーを設定するため、
+        copy_context()で実行している他のスレッドやレコードの処理には影響しない
+        """
+        update = {
+            key: value
+            for key, value in (
+                ("lambda_function_name", lambda_function_name),
+                ("line_user_id", line_user_id),
+                ("line_message_id", line_message_id),
+                ("temporal_expenditure_id", temporal_expenditure_id),
+            )
+            if value
+        }
+        if update:
+            cls.context.set(cls.context.get().model_copy(update=update))
+
+
+class _PayloadRepr(reprlib.Repr):
+    """
+    大きさを制限してオブジェクトを文字列にする。
+    上限を超えたリストや辞書の要素、長い文字列は省略されるため、全体を文字列にするコストもかからない
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 4
+        self.maxdict = 20
+        self.maxlist = 20
+        self.maxtuple = 20
+        self.maxset = 20
+        self.maxstring = 200
+        self.maxlong = 40
+        self.maxother = 200
+
+    def repr1(self, x, level):
+        # pydanticのモデル（LINE SDKのpydantic.v1のモデルを含む）はフィールドの辞書として出力する
+        if isinstance(x, BaseModel) or hasattr(type(x), "__fields__"):
+            if level <= 0:
+                return f"{type(x).__name__}(...)"
+            return f"{type(x).__name__}({self.repr_dict(x.__dict__, level)})"
+        return super().repr1(x, level)
+
+
+_payload_repr = _PayloadRepr()
+
+
+class LogPayload:
+    """
+    ログの引数として渡すオブジェクトのラッパー。
+    ログが実際に出力される場合のみ、大きさを制限して文字列にする
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self) -> str:
+        return _payload_repr.repr(self.obj)
+
+    __repr__ = __str__
+
+
+def payload(obj) -> LogPayload:
+    """
+    アイテムやイベントなど、大きくなりうるオブジェクトをログに出力する場合に使用する
+    例: logger.info("Item found, item = %s", payload(item))
+    Args:
+        obj: ログに出力するオブジェクト
+    Returns:
+        LogPayload: 遅延して文字列にするラッパー
+    """
+    return LogPayload(obj)
+
+
+def truncate_message(message: str, max_length: int) -> str:
+    """
+    メッセージを最大文字数で切り詰める
+    Args:
+        message (str): メッセージ
+        max_length (int): 最大文字数
+    Returns:
+        str: 切り詰めたメッセージ
+    """
+    if len(message) <= max_length:
+        return message
+    return f"{message[:max_length]}...(truncated {len(message) - max_length} chars)"
+
+
+class SamplingFilter(Filter):
+    """
+    指定したレベル以下のログを一定の割合で間引くフィルタ。
+    それより重要度の高いログ（既定ではWARNING以上）は常に出力する
+    """
+
+    def __init__(self, rate: float = 1.0, level: str | int = INFO):
+        super().__init__()
+        self.rate = rate
+        self.levelno = level if isinstance(level, int) else getLevelName(level)
+
+    def filter(self, record: LogRecord) -> bool:
+        if record.levelno > self.levelno or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def _parse_sampling_rates(value: str) -> dict[str, float]:
+    """
+    環境変数のサンプリング率の設定を解析する
+    Args:
+        value (str): "ロガー名=率,ロガー名=率" 形式の文字列
+    Returns:
+        dict[str, float]: ロガー名とサンプリング率
+    """
+    rates = {}
+    for entry in value.split(","):
+        name, _, rate = entry.strip().rpartition("=")
+        if name and rate:
+            rates[name] = float(rate)
+    return rates
+
+
+def _apply_sampling_rates(rates: dict[str, float]):
+    """
+    ロガーのサンプリング率を設定する。既存のSamplingFilterは置き換える
+    Args:
+        rates (dict[str, float]): ロガー名とサンプリング率
+    """
+    for name, rate in rates.items():
+        logger = getLogger(name)
+        for log_filter in list(logger.filters):
+            if isinstance(log_filter, SamplingFilter):
+                logger.removeFilter(log_filter)
+        logger.addFilter(SamplingFilter(rate))
+
+
+@lru_cache(maxsize=256)
+def _encode_extra_info(items: tuple[tuple[str, str], ...]) -> str:
+    """ログコンテキストをJSON文字列に変換する。コンテキストは呼び出し中ほぼ変わらないためキャッシュする"""
+    return json.dumps(dict(items), ensure_ascii=False, separators=(",", ":"))
 
 
 class CustomFormatter(Formatter):
-    def format(self, record):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_message_length = int(
+            os.environ.get(LOG_MAX_MESSAGE_LENGTH_ENV, DEFAULT_LOG_MAX_MESSAGE_LENGTH)
+        )
+
+    def format(self, record: LogRecord) -> str:
         """ログレコードのフォーマットをカスタマイズする
             参考: https://docs.python.org/ja/3.13/library/logging.html#logrecord-attributes
+            LogMessage.model_dump_json(exclude_none=True) と同じ形式のJSONを、
+            モデルの作成や検証を行わずに文字列の組み立てのみで作成する
+            最大文字数を超えるメッセージは切り詰める
         Args:
             record (LogRecord): ログレコード
         Returns:
             str: フォーマット後のログメッセージ
         """
         info: LogExtraInfo = LogContext.context.get()
-        # ログメッセージのモデルをJSON形式で作成
-        message = LogMessage(
-            timestamp=datetime.fromtimestamp(record.created).isoformat(),
-            level=record.levelname,
-            message=record.getMessage(),
-            file=record.filename,
-            line=record.lineno,
-            function=record.funcName,
-            extra_info=info,
+        extra_info = _encode_extra_info(
+            tuple((k, v) for k, v in info.__dict__.items() if v is not None)
+        )
+        message = truncate_message(record.getMessage(), self.max_message_length)
+        return (
+            f'{{"timestamp":"{datetime.fromtimestamp(record.created).isoformat()}"'
+            f',"level":{encode_basestring(record.levelname)}'
+            f',"message":{encode_basestring(message)}'
+            f',"file":{encode_basestring(record.filename)}'
+            f',"line":{record.lineno}'
+            f',"function":{encode_basestring(record.funcName)}'
+            f',"extra_info":{extra_info}}}'
+        )
+
+
+class PreformattedQueueHandler(QueueHandler):
+    """
+    呼び出し元のスレッドでフォーマットしてからキューに積むハンドラ。
+    LogContextはContextVarのため、出力スレッドではなく呼び出し元でフォーマットする必要がある。
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        record = super().prepare(record)
+        # 出力側のハンドラではフォーマット済みのメッセージをそのまま出力する
+        record.preformatted = True
+        return record
+
+
+class PreformattedFormatter(CustomFormatter):
+    def format(self, record: LogRecord) -> str:
+        if getattr(record, "preformatted", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+_configure_lock = threading.Lock()
+_configured = False
+_queue_listener: QueueListener = None
+
+
+def _enable_queue_handler(logger_names: list[str]):
+    """
+    設定済みのハンドラをQueueListenerに移し、各ロガーにはキューへ積むハンドラのみを設定する。
+    Args:
+        logger_names (list[str]): 設定ファイルで定義されたロガー名
+    """
+    global _queue_listener
+    queue = SimpleQueue()
+    queue_handler = PreformattedQueueHandler(queue)
+    queue_handler.setFormatter(CustomFormatter())
+    handlers: list[Handler] = []
+    for logger in [getLogger()] + [getLogger(name) for name in logger_names]:
+        for handler in logger.handlers:
+            if handler not in handlers:
+                handler.setFormatter(PreformattedFormatter())
+                handlers.append(handler)
+        if logger.handlers:
+            logger.handlers = [queue_handler]
+    _queue_listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
+
+def configure_logging():
+    """ロギングの設定をプロセスごとに一度だけ行う"""
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        with open(LOG_CONFIG_PATH, "r") as f:
+            json_config = json.load(f)
+        config.dictConfig(json_config)
+        _apply_sampling_rates(
+            _parse_sampling_rates(os.environ.get(LOG_SAMPLING_RATES_ENV, ""))
         )
-        return message.model_dump_json(exclude_none=True)
+        if os.environ.get(LOG_QUEUE_ENABLED_ENV, "").lower() == "true":
+            _enable_queue_handler(list(json_config.get("loggers", {}).keys()))
+        _configured = True
 
 
 def get_app_logger(name=None):
@@ -59,9 +300,7 @@ def get_app_logger(name=None):
     Returns:
         Logger: ロガー
     """
-    with open("./src/app/config/log_config.json", "r") as f:
-        json_config = json.load(f)
-    config.dictConfig(json_config)
+    configure_logging()
     return getLogger(name)
 
 
@@ -1,28 +1,109 @@
 import os
-import boto3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import cache
 
-from src.app.config.logger import LogContext, get_app_logger
+from src.app.config.logger import LogContext, get_app_logger, payload
 from src.app.usecase.analyze_receipt_usecase import AnalyzeReceiptUsecase
 
-QUEUE_URL = os.environ["SQS_QUEUE_URL"]
-
-# SQSクライアントを作成
-sqs = boto3.client("sqs")
-usecase = AnalyzeReceiptUsecase()
 logger = get_app_logger(__name__)
 
+# 1回の呼び出しで並行して処理するレコード数。1の場合は順番に処理する
+CONCURRENCY_ENV = "ANALYZE_RECEIPT_CONCURRENCY"
+DEFAULT_CONCURRENCY = 4
+
+_thread_local = threading.local()
+
+
+def get_usecase() -> AnalyzeReceiptUsecase:
+    """
+    ユースケースをスレッドごとに初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    boto3のリソースはスレッド間で共有できないため、スレッドごとに作成します。
+    """
+    usecase = getattr(_thread_local, "usecase", None)
+    if usecase is None:
+        usecase = AnalyzeReceiptUsecase()
+        _thread_local.usecase = usecase
+    return usecase
+
+
+def get_concurrency() -> int:
+    """
+    並行して処理するレコード数を取得します。
+    """
+    return max(1, int(os.environ.get(CONCURRENCY_ENV, DEFAULT_CONCURRENCY)))
+
+
+@cache
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    スレッドプールを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    return ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="analyze_receipt"
+    )
+
+
+def process_record(record: dict) -> bool:
+    """
+    SQSのレコードを1件処理します。
+    例外は他のレコードの処理に影響しないよう、ここで捕捉します。
+    Args:
+        record: SQSのレコード
+    Returns:
+        bool: 処理が完了したかどうか
+    """
+    try:
+        return get_usecase().execute(record["body"])
+    except Exception:
+        logger.exception(
+            "レコードの処理に失敗しました。message_id = %s", record.get("messageId")
+        )
+        return False
+
+
+def process_records(records: list[dict]) -> list[bool]:
+    """
+    SQSのレコードを、設定された並行数で処理します。
+    ログコンテキストがレコード間で混ざらないよう、レコードごとにコンテキストをコピーして実行します。
+    Args:
+        records: SQSのレコード
+    Returns:
+        list[bool]: レコードと同じ順番の、処理が完了したかどうか
+    """
+    concurrency = min(get_concurrency(), len(records))
+    if concurrency <= 1:
+        return [copy_context().run(process_record, record) for record in records]
+    executor = get_executor(get_concurrency())
+    futures = [
+        executor.submit(copy_context().run, process_record, record)
+        for record in records
+    ]
+    return [future.result() for future in futures]
+
 
 def lambda_handler(event, context):
+    """
+    SQSから受信したレシートを解析します。
+    イベントソースマッピングのReportBatchItemFailuresを使用し、失敗したレコードのみを返します。
+    成功したレコードはLambdaが削除し、失敗したレコードのみが可視性タイムアウト後に再実行されます。
+    """
     LogContext.set(lambda_function_name="analyze_receipt")
-    logger.info(f"sqsからデータを受信しました。event = {event}")
-
-    for record in event["Records"]:
-        receipt_handle = record["receiptHandle"]
-        body = record["body"]
-        completed = usecase.execute(body)
+    logger.info("sqsからデータを受信しました。event = %s", payload(event))
 
-        # メッセージを削除
-        if completed:
-            sqs.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=receipt_handle)
+    records = event["Records"]
+    completed_list = process_records(records)
 
-    return {"statusCode": 200, "body": "Message processed successfully"}
+    batch_item_failures = [
+        {"itemIdentifier": record["messageId"]}
+        for record, completed in zip(records, completed_list)
+        if not completed
+    ]
+    if batch_item_failures:
+        logger.warning(
+            "%d件のレコードの処理に失敗しました。failures = %s",
+            len(batch_item_failures),
+            batch_item_failures,
+        )
+    return {"batchItemFailures": batch_item_failures}
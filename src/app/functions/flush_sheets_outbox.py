@@ -0,0 +1,59 @@
+import time
+from typing import Optional
+
+from src.app.config.logger import LogContext, get_app_logger, payload
+from src.app.usecase.flush_sheets_outbox_usecase import FlushSheetsOutboxUsecase
+
+logger = get_app_logger(__name__)
+
+# タイムアウトまでにレスポンスを返せるよう、再実行の待機はこの秒数を残して打ち切る
+DEADLINE_MARGIN_SECONDS = 5.0
+
+usecase: FlushSheetsOutboxUsecase = None
+
+
+def get_usecase() -> FlushSheetsOutboxUsecase:
+    """
+    ユースケースを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    global usecase
+    if usecase is None:
+        usecase = FlushSheetsOutboxUsecase()
+    return usecase
+
+
+def get_deadline(context) -> Optional[float]:
+    """
+    書き込みの再実行を打ち切る時刻を取得します。
+    Args:
+        context: Lambdaのコンテキスト
+    Returns:
+        Optional[float]: time.monotonic()の値。コンテキストがない場合はNone
+    """
+    if context is None:
+        return None
+    remaining_seconds = context.get_remaining_time_in_millis() / 1000
+    return time.monotonic() + remaining_seconds - DEADLINE_MARGIN_SECONDS
+
+
+def lambda_handler(event, context):
+    """
+    SQSに溜まったスプレッドシートへの書き込みを、まとめて行います。
+    イベントソースマッピングのReportBatchItemFailuresを使用し、失敗したレコードのみを返します。
+    """
+    LogContext.set(lambda_function_name="flush_sheets_outbox")
+    logger.info("sqsからデータを受信しました。event = %s", payload(event))
+
+    failed_message_ids = get_usecase().execute(
+        event["Records"], deadline=get_deadline(context)
+    )
+    batch_item_failures = [
+        {"itemIdentifier": message_id} for message_id in failed_message_ids
+    ]
+    if batch_item_failures:
+        logger.warning(
+            "%d件のレコードの処理に失敗しました。failures = %s",
+            len(batch_item_failures),
+            batch_item_failures,
+        )
+    return {"batchItemFailures": batch_item_failures}
@@ -1,57 +1,137 @@
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import cache
 
 from linebot.v3 import WebhookHandler
 from linebot.v3.messaging import (
-    ApiClient,
     ApiException,
-    Configuration,
     ErrorResponse,
     Message,
     MessagingApi,
     ReplyMessageRequest,
 )
-from linebot.v3.webhooks import MessageEvent, ImageMessageContent, PostbackEvent
+from linebot.v3.webhooks import (
+    FollowEvent,
+    ImageMessageContent,
+    MessageEvent,
+    PostbackEvent,
+    UnfollowEvent,
+)
 from linebot.v3.webhooks.models.text_message_content import TextMessageContent
-from linebot.models.events import FollowEvent
-from linebot.models.events import UnfollowEvent
+from src.app.config.clients import get_line_api_client
 from src.app.config.logger import LogContext, get_app_logger
 from src.app.usecase.hundle_line_message_usecase import HundleLineMessageUsecase
 from src.app.adaptor.line_messaging_api_adaptor import (
     show_loading_animation,
 )
 
-CHANNEL_ACCESS_TOKEN = os.environ["CHANNEL_ACCESS_TOKEN"]
-CHANNEL_SECRET = os.environ["CHANNEL_SECRET"]
-
-configuration = Configuration(access_token=CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(channel_secret=CHANNEL_SECRET)
-usecase = HundleLineMessageUsecase()
+handler = WebhookHandler(channel_secret=os.environ["CHANNEL_SECRET"])
 
 logger = get_app_logger(__name__)
 
+# ユースケースがこの秒数以内に終わった場合は、ローディングを表示しない
+LOADING_ANIMATION_DELAY_ENV = "LOADING_ANIMATION_DELAY_SECONDS"
+DEFAULT_LOADING_ANIMATION_DELAY_SECONDS = 0.3
+# 応答前にローディング表示の送信完了を待つ最大秒数
+# 送信途中のローディング表示が応答より後に届き、応答済みのトークに表示され続けないようにする
+LOADING_ANIMATION_WAIT_SECONDS = 2.0
+
+
+@cache
+def get_usecase() -> HundleLineMessageUsecase:
+    """
+    ユースケースを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    return HundleLineMessageUsecase()
+
+
+@cache
+def get_loading_executor() -> ThreadPoolExecutor:
+    """
+    ローディング表示を送信するスレッドプールを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="loading_animation")
+
+
+class LoadingAnimation:
+    """
+    ユースケースの処理と並行して、バックグラウンドでローディングを表示します。
+    処理が一定時間内に終わった場合は表示しません。
+    withブロックを抜ける際に送信中のローディング表示の完了を待つため、応答はブロックの外で送信します。
+
+        with LoadingAnimation(user_id):
+            messages = get_usecase().handle_text_message(...)
+        reply_message(reply_token, messages)
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.delay_seconds = float(
+            os.environ.get(
+                LOADING_ANIMATION_DELAY_ENV, DEFAULT_LOADING_ANIMATION_DELAY_SECONDS
+            )
+        )
+        self.done = threading.Event()
+        self.future: Future = None
+
+    def __enter__(self) -> "LoadingAnimation":
+        self.future = get_loading_executor().submit(
+            copy_context().run, self.__show_if_slow
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wait()
+
+    def __show_if_slow(self) -> bool:
+        if self.done.wait(self.delay_seconds):
+            return False
+        try:
+            show_loading_animation(self.user_id)
+        except Exception as e:
+            # NOTE ローディング表示の失敗は応答に影響させない
+            logger.warning("ローディング表示に失敗しました。error = %s", e)
+            return False
+        return True
+
+    def wait(self, timeout: float = LOADING_ANIMATION_WAIT_SECONDS) -> bool:
+        """
+        ローディングの表示を打ち切り、送信中の場合は送信完了を待ちます。
+        Args:
+            timeout: 最大待機秒数
+        Returns:
+            bool: ローディングを表示したかどうか
+        """
+        self.done.set()
+        try:
+            return self.future.result(timeout=timeout)
+        except Exception:
+            return False
+
 
 def reply_message(reply_token: str, messages: list[Message]):
     if not messages:
         return
-    with ApiClient(configuration) as api_client:
-        line_bot_api = MessagingApi(api_client)
-        try:
-            line_bot_api.reply_message_with_http_info(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=messages,
-                )
-            )
-        except ApiException as e:
-            logger.info(
-                f"LINE Messagigng APIでエラーが発生しました。status code = {str(e.status)}, body = {str(ErrorResponse.from_json(e.body))}"
+    line_bot_api = MessagingApi(get_line_api_client())
+    try:
+        line_bot_api.reply_message_with_http_info(
+            ReplyMessageRequest(
+                reply_token=reply_token,
+                messages=messages,
             )
+        )
+    except ApiException as e:
+        logger.info(
+            f"LINE Messagigng APIでエラーが発生しました。status code = {str(e.status)}, body = {str(ErrorResponse.from_json(e.body))}"
+        )
 
 
 @handler.add(FollowEvent)
 def handle_follow_message(event: FollowEvent):
-    show_loading_animation(event.source.user_id)
-    messages = usecase.handle_follow_event(event.source.user_id)
+    with LoadingAnimation(event.source.user_id):
+        messages = get_usecase().handle_follow_event(event.source.user_id)
     reply_message(event.reply_token, messages)
 
 
@@ -63,43 +143,52 @@ def handle_unfollow_message(event: UnfollowEvent):
 @handler.add(MessageEvent, message=TextMessageContent)
 def handle_text_message(event: MessageEvent):
     if event.source.type == "user":
-        show_loading_animation(event.source.user_id)
         LogContext.set(
             line_user_id=event.source.user_id, line_message_id=event.message.id
         )
-        messages = usecase.handle_text_message(event.message, event.source.user_id)
+        with LoadingAnimation(event.source.user_id):
+            messages = get_usecase().handle_text_message(
+                event.message, event.source.user_id
+            )
+        reply_message(event.reply_token, messages)
     else:
-        messages = usecase.group_message()
-    reply_message(event.reply_token, messages)
+        messages = get_usecase().group_message()
+        reply_message(event.reply_token, messages)
 
 
 @handler.add(MessageEvent, message=ImageMessageContent)
 def handle_image_message(event: MessageEvent):
     if event.source.type == "user":
-        show_loading_animation(event.source.user_id)
         LogContext.set(
             line_user_id=event.source.user_id, line_message_id=event.message.id
         )
-        messages = usecase.handle_image_message(event.message, event.source.user_id)
+        with LoadingAnimation(event.source.user_id):
+            messages = get_usecase().handle_image_message(
+                event.message, event.source.user_id
+            )
+        reply_message(event.reply_token, messages)
     else:
-        messages = usecase.group_message()
-    reply_message(event.reply_token, messages)
+        messages = get_usecase().group_message()
+        reply_message(event.reply_token, messages)
 
 
 @handler.add(PostbackEvent)
 def handle_postback_event(event: PostbackEvent):
     if event.source.type == "user":
-        show_loading_animation(event.source.user_id)
         LogContext.set(
             line_user_id=event.source.user_id,
         )
-        messages = usecase.handle_postback_event(event.postback, event.source.user_id)
+        with LoadingAnimation(event.source.user_id):
+            messages = get_usecase().handle_postback_event(
+                event.postback, event.source.user_id
+            )
+        reply_message(event.reply_token, messages)
     else:
-        messages = usecase.group_message()
-    reply_message(event.reply_token, messages)
+        messages = get_usecase().group_message()
+        reply_message(event.reply_token, messages)
 
 
 @handler.default()
 def default(event: MessageEvent):
-    messages = usecase.handle_default_event()
+    messages = get_usecase().handle_default_event()
     reply_message(event.reply_token, messages)
@@ -1,6 +1,6 @@
 from enum import Enum
 import time
-from typing import Optional
+from typing import ClassVar, Optional
 import uuid
 from pydantic import Field
 from src.app.model import usecase_model as uc
@@ -40,6 +40,16 @@ class BaseTable(CommonModel):
         """
         raise NotImplementedError
 
+    @staticmethod
+    def get_global_secondary_indexes() -> dict[
+        str, tuple[tuple[str, str, str], Optional[tuple[str, str, str]]]
+    ]:
+        """
+        グローバルセカンダリインデックスを持つ場合は、{インデックス名: (パーティションキー, ソートキー)}のdictを返す。
+        各キーはget_parttion_key, get_sort_keyと同じ形式のタプルで、ソートキーが存在しない場合はNoneとなる。
+        """
+        return {}
+
 
 class ItemClassification(BaseTable):
     minor: str = Field(default="")  # パーティションキー
@@ -72,8 +82,12 @@ class TemporalExpenditure(BaseTable):
     status: Status = Field(default=Status.NEW)
     data: uc.AccountBookInput = Field(default=uc.AccountBookInput())
     image_set_id: Optional[str] = Field(default=None)
+    # 作成日時（エポックミリ秒）。line_user_id_indexのソートキー
+    created_at: int = Field(default_factory=lambda: int(time.time() * 1000))
     ttl_timestamp: int = Field(default_factory=calculate_ttl_timestamp)
 
+    LINE_USER_ID_INDEX: ClassVar[str] = "line_user_id_index"
+
     @staticmethod
     def get_name() -> str:
         return "temporal_expenditures"
@@ -86,6 +100,30 @@ class TemporalExpenditure(BaseTable):
     def get_sort_key() -> tuple[str, str, str]:
         return None
 
+    @staticmethod
+    def get_global_secondary_indexes() -> dict[
+        str, tuple[tuple[str, str, str], Optional[tuple[str, str, str]]]
+    ]:
+        return {
+            TemporalExpenditure.LINE_USER_ID_INDEX: (
+                ("line_user_id", "HASH", "S"),
+                ("created_at", "RANGE", "N"),
+            )
+        }
+
+    @staticmethod
+    def get_split_id(id: str, index: int) -> str:
+        """
+        1枚の画像に複数のレシートが写っていた場合の、追加のレシートの仮支出データのIDを取得します。
+        同じ引数からは常に同じIDを返すため、解析を再実行しても仮支出データは重複しません。
+        Args:
+            id: 画像の仮支出データのID
+            index: レシートの番号
+        Returns:
+            追加のレシートの仮支出データのID
+        """
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{id}/{index}"))
+
     @staticmethod
     def from_another(another: "TemporalExpenditure") -> "TemporalExpenditure":
         """
@@ -104,6 +142,33 @@ class TemporalExpenditure(BaseTable):
         )
 
 
+class TemporalExpenditureSummary(CommonModel):
+    """
+    仮支出データの一覧表示用のモデル。PROJECTIONの属性のみを取得し、品目（data.items）は読み込みません。
+    """
+
+    id: str = Field(default="")
+    status: TemporalExpenditure.Status = Field(default=TemporalExpenditure.Status.NEW)
+    data: uc.AccountBookSummary = Field(default=uc.AccountBookSummary())
+    created_at: int = Field(default=0)
+
+    PROJECTION: ClassVar[list[str]] = [
+        "id",
+        "status",
+        "created_at",
+        "data.total",
+        "data.date",
+        "data.store",
+        "data.major_classification",
+        "data.minor_classification",
+        "data.payer",
+        "data.for_whom",
+        "data.payment_method",
+        "data.item_count",
+        "data.item_price_sum",
+    ]
+
+
 class User(BaseTable):
     line_user_id: str = Field(default="")  # パーティションキー
     line_name: str = Field(default="")
@@ -149,16 +214,61 @@ class MessageSession(BaseTable):
         return None
 
 
-class ImageSet(BaseTable):
-    class ImageMetaData(CommonModel):
-        line_image_id: str = Field(default="")
-        status: TemporalExpenditure.Status = Field(
-            default=TemporalExpenditure.Status.ANALYZING
-        )
+class ReceiptAnalysisResult(BaseTable):
+    image_hash: str = Field(default="")  # パーティションキー。画像のSHA-256
+    # 解析結果。レシートが読み取れなかった場合は空
+    results: list[uc.ReceiptResult] = Field(default=[])
+
+    # 同じ画像の再送信に備えて7日間保持する
+    ttl_timestamp: int = Field(
+        default_factory=lambda: calculate_ttl_timestamp(delete_hour=24, delete_date=7)
+    )
+
+    @staticmethod
+    def get_name() -> str:
+        return "receipt_analysis_results"
+
+    @staticmethod
+    def get_parttion_key() -> tuple[str, str, str]:
+        return "image_hash", "HASH", "S"
+
+    @staticmethod
+    def get_sort_key() -> tuple[str, str, str]:
+        return None
+
+
+class SheetsWriteRecord(BaseTable):
+    idempotency_key: str = Field(default="")  # パーティションキー
+    # 書き込み日時（エポックミリ秒）
+    written_at: int = Field(default_factory=lambda: int(time.time() * 1000))
+
+    # SQSのメッセージ保持期間（最大14日）より長く保持する
+    ttl_timestamp: int = Field(
+        default_factory=lambda: calculate_ttl_timestamp(delete_hour=24, delete_date=15)
+    )
 
+    @staticmethod
+    def get_name() -> str:
+        return "sheets_write_records"
+
+    @staticmethod
+    def get_parttion_key() -> tuple[str, str, str]:
+        return "idempotency_key", "HASH", "S"
+
+    @staticmethod
+    def get_sort_key() -> tuple[str, str, str]:
+        return None
+
+
+class ImageSet(BaseTable):
     image_set_id: str = Field(default="")  # パーティションキー
-    total: int = Field(default="")
-    image_meta_data: list[ImageMetaData] = Field(default=[])
+    total: int = Field(default=0)
+    line_image_ids: list[str] = Field(default=[])
+    # LINE画像IDごとの解析ステータス。解析が終わった画像のみ設定される
+    image_statuses: dict[str, TemporalExpenditure.Status] = Field(default={})
+    # 解析が終わった画像の数。image_statusesと同じ更新で加算する
+    analyzed_count: int = Field(default=0)
+    failed_count: int = Field(default=0)
 
     # およそ14.4分後に削除される
     ttl_timestamp: int = Field(
@@ -183,13 +293,8 @@ class ImageSet(BaseTable):
         Returns:
             TemporalExpenditure.Status: 全体の解析ステータス
         """
-        invalid_image_exists = False
-        for image_meta_data in self.image_meta_data:
-            if image_meta_data.status == TemporalExpenditure.Status.ANALYZING:
-                return TemporalExpenditure.Status.ANALYZING
-            elif image_meta_data.status == TemporalExpenditure.Status.INVALID_IMAGE:
-                invalid_image_exists = True
-        if invalid_image_exists:
+        if self.analyzed_count + self.failed_count < self.total:
+            return TemporalExpenditure.Status.ANALYZING
+        if self.failed_count > 0:
             return TemporalExpenditure.Status.INVALID_IMAGE
-        else:
-            return TemporalExpenditure.Status.ANALYZED
+        return TemporalExpenditure.Status.ANALYZED
@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import Optional
-from pydantic import Field
+from pydantic import Field, computed_field
 
 from src.app.model.common_model import CommonModel
 
@@ -125,18 +125,46 @@ class ReceiptResult(CommonModel):
             item.remarks += f"合計{self.total}円"
             self.items.append(item)
 
-    def get_note(self) -> str:
-        sum = 0
-        for item in self.items:
-            sum += item.price
-        if self.total is None:
+    @computed_field
+    @property
+    def item_count(self) -> int:
+        """
+        項目数。一覧表示で品目を読み込まずに備考を作成できるよう、DynamoDBにも保存されます。
+        """
+        return len(self.items)
+
+    @computed_field
+    @property
+    def item_price_sum(self) -> int:
+        """
+        各項目の金額の和。一覧表示で品目を読み込まずに備考を作成できるよう、DynamoDBにも保存されます。
+        """
+        return sum(item.price for item in self.items)
+
+    @staticmethod
+    def build_note(total: Optional[int], item_count: int, item_price_sum: int) -> str:
+        """
+        合計金額と各項目の集計から備考を作成します。
+        Args:
+            total: 合計金額
+            item_count: 項目数
+            item_price_sum: 各項目の金額の和
+        Returns:
+            備考。特になければ空文字
+        """
+        if total is None:
             return "※ 合計金額は読み取れませんでした"
-        elif len(self.items) == 0:
+        elif item_count == 0:
             return "※ レシートの各種詳細項目は読み取れませんでした"
-        elif sum != self.total:
-            return f"※ 合計と各項目の和が一致しません。各項目の和: {sum}円"
+        elif item_price_sum != total:
+            return f"※ 合計と各項目の和が一致しません。各項目の和: {item_price_sum}円"
         return ""
 
+    def get_note(self) -> str:
+        return ReceiptResult.build_note(
+            self.total, self.item_count, self.item_price_sum
+        )
+
 
 class AccountBookInput(ReceiptResult):
     major_classification: str = Field(default="生活費")
@@ -205,11 +233,37 @@ class AccountBookInput(ReceiptResult):
         return result
 
 
+class AccountBookSummary(CommonModel):
+    """
+    一覧表示用の家計簿登録情報。品目（items）の代わりに、その集計のみを持ちます。
+    """
+
+    total: Optional[int] = Field(default=None)
+    date: str = Field(default="")
+    store: str = Field(default="")
+    major_classification: str = Field(default="生活費")
+    minor_classification: str = Field(default="食費")
+    payer: str = Field(default="")
+    for_whom: str = Field(default="共通")
+    payment_method: PaymentMethodEnum = Field(default=PaymentMethodEnum.ADVANCE_PAYMENT)
+    # 集計を持たないレコード（集計の保存を始める前に作成されたもの）ではNone
+    item_count: Optional[int] = Field(default=None)
+    item_price_sum: Optional[int] = Field(default=None)
+
+    def get_note(self) -> str:
+        if self.item_count is None or self.item_price_sum is None:
+            return ""
+        return ReceiptResult.build_note(
+            self.total, self.item_count, self.item_price_sum
+        )
+
+
 class PostbackEventTypeEnum(str, Enum):
     CANCEL_USER_REGISTRATION = "cancel_user_registration"
 
     REGISTER_EXPENDITURE = "register_expenditure"
     REGISTER_ONLY_TOTAL = "register_only_total"
+    REGISTER_ALL_ANALYZED = "register_all_analyzed"
     DETAIL_EXPENDITURE = "detail_expenditure"
     CHANGE_CLASSIFICATION = "change_classification"
     UPDATE_CLASSIFICATION = "update_classification"
@@ -260,3 +314,11 @@ class CancelUserRegistrationPostback(CommonModel):
     type: PostbackEventTypeEnum = Field(
         default=PostbackEventTypeEnum.CANCEL_USER_REGISTRATION
     )
+
+
+class SheetsOutboxEntry(CommonModel):
+    # 同じ支出データが重複して書き込まれないようにするキー（仮支出データのID）
+    idempotency_key: str = Field(default="")
+    spreadsheet_id: str = Field(default="")
+    sheet_name: str = Field(default="")
+    rows: list[list[str | int]] = Field(default=[])
@@ -1,8 +1,167 @@
+import time
 import traceback
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, Optional
 from boto3.dynamodb.conditions import Key
+from pydantic import BaseModel
 from src.app.model.db_model import BaseTable
-from src.app.config.logger import get_app_logger
+from src.app.config.logger import get_app_logger, payload
+
+# BatchGetItem、BatchWriteItemの1リクエストあたりの上限
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+
+# 未処理のキー（UnprocessedKeys, UnprocessedItems）の再実行
+MAX_BATCH_ATTEMPTS = 5
+BATCH_RETRY_BASE_SECONDS = 0.05
+
+# 並行して実行するリクエスト数
+MAX_BATCH_CONCURRENCY = 4
+
+
+@cache
+def get_batch_executor() -> ThreadPoolExecutor:
+    """
+    一括処理のリクエストを並行して実行するスレッドプールを初回呼び出し時に作成し、ウォームスタート時は再利用します。
+    """
+    return ThreadPoolExecutor(
+        max_workers=MAX_BATCH_CONCURRENCY, thread_name_prefix="batch_request"
+    )
+
+
+def is_conditional_check_failed(error: Exception) -> bool:
+    """
+    条件付きの書き込みで、条件を満たさなかったことによる例外かどうかを判定します。
+    Args:
+        error: 書き込み時の例外
+    Returns:
+        bool: ConditionalCheckFailedExceptionの場合はTrue
+    """
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def build_projection_expression(projection: list[str]) -> tuple[str, dict]:
+    """
+    属性名のリストからProjectionExpressionを作成します。
+    予約語（data, status, dateなど）と衝突しないよう、全ての属性名をプレースホルダに置き換えます。
+    Args:
+        projection: 取得する属性名のリスト。ネストした属性は"data.total"のように指定
+    Returns:
+        ProjectionExpression, ExpressionAttributeNames
+    """
+    expression_attribute_names = {}
+    paths = []
+    for attribute_path in projection:
+        names = []
+        for name in attribute_path.split("."):
+            placeholder = f"#{name}"
+            expression_attribute_names[placeholder] = name
+            names.append(placeholder)
+        paths.append(".".join(names))
+    return ", ".join(paths), expression_attribute_names
+
+
+def dump_set_fields(model: BaseModel) -> dict:
+    """
+    モデルの値を設定したフィールドのみをdictに変換します。
+    model_dump(exclude_unset=True)と異なり、計算フィールド（computed_field）は含めず、
+    ネストしたモデルはそのまま返すため、呼び出し側で同様に変換できます。
+    Args:
+        model: 変換するモデル
+    Returns:
+        dict: フィールド名と値のdict
+    """
+    fields = {}
+    for name in model.model_fields_set:
+        value = getattr(model, name)
+        if not isinstance(value, BaseModel):
+            value = model.model_dump(include={name})[name]
+        fields[name] = value
+    return fields
+
+
+def flatten_update_fields(fields: Mapping | BaseModel, prefix: str = "") -> dict:
+    """
+    部分的なモデルやネストしたdictを、属性パスと値のdictに変換します。
+    モデルは値を設定したフィールドのみを対象とし、モデルとdictは属性パスに展開します。
+    例: {"status": "ANALYZED", "data": {"payer": "太郎"}} -> {"status": "ANALYZED", "data.payer": "太郎"}
+    Args:
+        fields: 更新するフィールド。キーに"data.payer"のような属性パスも指定可能
+        prefix: 親の属性パス
+    Returns:
+        dict: 属性パスと値のdict
+    """
+    if isinstance(fields, BaseModel):
+        fields = dump_set_fields(fields)
+    flattened = {}
+    for name, value in fields.items():
+        path = f"{prefix}.{name}" if prefix else name
+        if isinstance(value, BaseModel):
+            value = dump_set_fields(value)
+        # 空のdictは、空のマップとして設定する
+        if isinstance(value, Mapping) and value:
+            flattened.update(flatten_update_fields(value, path))
+        else:
+            flattened[path] = value
+    return flattened
+
+
+@lru_cache(maxsize=256)
+def build_update_expression(
+    set_paths: tuple[str, ...],
+    remove_paths: tuple[str, ...] = (),
+    add_paths: tuple[str, ...] = (),
+) -> tuple[str, Mapping[str, str], tuple[str, ...]]:
+    """
+    属性パスからSET/REMOVE/ADDの更新式を作成します。
+    属性名と値は全てプレースホルダに置き換えるため、予約語と衝突しません。
+    更新するフィールドの組み合わせごとにキャッシュします。
+    Args:
+        set_paths: 値を設定する属性パス
+        remove_paths: 削除する属性パス
+        add_paths: 値を加算する属性パス
+    Returns:
+        UpdateExpression, ExpressionAttributeNames, 値のプレースホルダ（set_paths, add_pathsの順）
+    """
+    placeholders: dict[str, str] = {}
+
+    def to_placeholders(attribute_path: str) -> str:
+        names = []
+        for name in attribute_path.split("."):
+            if name not in placeholders:
+                placeholders[name] = f"#n{len(placeholders)}"
+            names.append(placeholders[name])
+        return ".".join(names)
+
+    value_placeholders = tuple(f":v{i}" for i in range(len(set_paths) + len(add_paths)))
+    clauses = []
+    if set_paths:
+        clauses.append(
+            "SET "
+            + ", ".join(
+                f"{to_placeholders(path)} = {value}"
+                for path, value in zip(set_paths, value_placeholders)
+            )
+        )
+    if remove_paths:
+        clauses.append("REMOVE " + ", ".join(to_placeholders(p) for p in remove_paths))
+    if add_paths:
+        clauses.append(
+            "ADD "
+            + ", ".join(
+                f"{to_placeholders(path)} {value}"
+                for path, value in zip(add_paths, value_placeholders[len(set_paths) :])
+            )
+        )
+    expression_attribute_names = MappingProxyType(
+        {placeholder: name for name, placeholder in placeholders.items()}
+    )
+    return " ".join(clauses), expression_attribute_names, value_placeholders
 
 
 class BaseTableRepository:
@@ -43,6 +202,38 @@ class BaseTableRepository:
                     "AttributeType": sort_key[2],  # 文字列型
                 }
             )
+        global_secondary_indexes = []
+        for index_name, (
+            index_partition_key,
+            index_sort_key,
+        ) in self.table_model.get_global_secondary_indexes().items():
+            index_key_schema = []
+            for index_key in (index_partition_key, index_sort_key):
+                if index_key is None:
+                    continue
+                index_key_schema.append(
+                    {"AttributeName": index_key[0], "KeyType": index_key[1]}
+                )
+                if index_key[0] not in [
+                    a["AttributeName"] for a in attribute_definitions
+                ]:
+                    attribute_definitions.append(
+                        {"AttributeName": index_key[0], "AttributeType": index_key[2]}
+                    )
+            global_secondary_indexes.append(
+                {
+                    "IndexName": index_name,
+                    "KeySchema": index_key_schema,
+                    "Projection": {"ProjectionType": "ALL"},
+                    "ProvisionedThroughput": {
+                        "ReadCapacityUnits": 5,
+                        "WriteCapacityUnits": 5,
+                    },
+                }
+            )
+        options = {}
+        if global_secondary_indexes:
+            options["GlobalSecondaryIndexes"] = global_secondary_indexes
         try:
             table = self.dynamodb.create_table(
                 TableName=self.table_model.get_name(),
@@ -50,29 +241,32 @@ class BaseTableRepository:
                 AttributeDefinitions=attribute_definitions,
                 # オンデマンドキャパシティモードの場合は不要
                 ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+                **options,
             )
-            self.logger.info(f"Table {self.table_model.get_name()} creating...")
+            self.logger.info("Table %s creating...", self.table_model.get_name())
 
             # テーブル作成完了を待機
             table.wait_until_exists()
-            self.logger.info(f"Table {self.table_model.get_name()} created.")
+            self.logger.info("Table %s created.", self.table_model.get_name())
         except Exception as e:
             # テーブルが既に存在する場合はエラーを無視
             if "Table already exists" in str(e):
-                self.logger.info(f"Table {self.table_model.get_name()} already exists.")
+                self.logger.info(
+                    "Table %s already exists.", self.table_model.get_name()
+                )
             else:
                 traceback.print_exc()
-                self.logger.info(f"Error creating table: {e}")
+                self.logger.info("Error creating table: %s", e)
 
     def drop_table(self):
         """
         DynamoDBテーブルを削除します。
         """
         self.table.delete()
-        self.logger.info(f"Deleting table {self.table_model.get_name()}...")
+        self.logger.info("Deleting table %s...", self.table_model.get_name())
         # テーブル削除完了を待機
         self.table.wait_until_not_exists()
-        self.logger.info(f"Table {self.table_model.get_name()} deleted.")
+        self.logger.info("Table %s deleted.", self.table_model.get_name())
 
     def batch_write_items(self, items: list[dict]):
         """
@@ -85,7 +279,141 @@ class BaseTableRepository:
             for item in items:
                 batch.put_item(Item=item)
         self.logger.info(
-            f"{len(items)} items written to table {self.table_model.get_name()}, size = {len(items)}"
+            "%d items written to table %s", len(items), self.table_model.get_name()
+        )
+
+    def batch_get_items(
+        self,
+        partition_key_values: list[Any],
+        sort_key_values: Optional[list[Any]] = None,
+        projection: Optional[list[str]] = None,
+    ) -> list[Optional[BaseTable]]:
+        """
+        複数のアイテムをBatchGetItemで取得します。
+        100件ごとのリクエストに分割して並行に実行し、未処理のキーは指数バックオフで再取得します。
+        Args:
+            partition_key_values: パーティションキーの値のリスト
+            sort_key_values: ソートキーの値のリスト。partition_key_valuesと同じ順番で指定
+            projection: 取得する属性名のリスト。キーの属性は自動的に追加されます
+        Returns:
+            list[Optional[BaseTable]]: 指定したキーと同じ順番のアイテム。存在しない場合はNone
+        """
+        keys = self.__get_keys(partition_key_values, sort_key_values)
+        # 1回のリクエストに同じキーは指定できないため、重複を除く
+        unique_keys = list({self.__key_of(key): key for key in keys}.values())
+        options = {}
+        if projection:
+            key_names = self.__get_key_names()
+            projection_expression, expression_attribute_names = (
+                build_projection_expression(
+                    key_names + [p for p in projection if p not in key_names]
+                )
+            )
+            options["ProjectionExpression"] = projection_expression
+            options["ExpressionAttributeNames"] = expression_attribute_names
+        chunks = [
+            {"Keys": unique_keys[i : i + MAX_BATCH_GET_KEYS], **options}
+            for i in range(0, len(unique_keys), MAX_BATCH_GET_KEYS)
+        ]
+        items = {
+            self.__key_of(item): item
+            for chunk_items in self.__run_batches(self.__batch_get_chunk, chunks)
+            for item in chunk_items
+        }
+        self.logger.info(
+            "%d/%d items found in table %s",
+            len(items),
+            len(unique_keys),
+            self.table_model.get_name(),
+        )
+        results = []
+        for key in keys:
+            item = items.get(self.__key_of(key))
+            results.append(None if item is None else self.table_model(**item))
+        return results
+
+    def batch_delete_items(
+        self,
+        partition_key_values: list[Any],
+        sort_key_values: Optional[list[Any]] = None,
+    ):
+        """
+        DynamoDBテーブルから複数アイテムを一括で削除します。
+        25件ごとのリクエストに分割して並行に実行し、未処理のアイテムは指数バックオフで再実行します。
+
+        Args:
+            partition_key_values (list[Any]): 削除するアイテムのパーティションキーの値
+            sort_key_values (Optional[list[Any]]): ソートキーの値のリスト
+        """
+        keys = self.__get_keys(partition_key_values, sort_key_values)
+        unique_keys = list({self.__key_of(key): key for key in keys}.values())
+        chunks = [
+            unique_keys[i : i + MAX_BATCH_WRITE_ITEMS]
+            for i in range(0, len(unique_keys), MAX_BATCH_WRITE_ITEMS)
+        ]
+        self.__run_batches(self.__batch_delete_chunk, chunks)
+        self.logger.info(
+            "%d items deleted from table %s",
+            len(unique_keys),
+            self.table_model.get_name(),
+        )
+
+    def __run_batches(self, function: Callable[[Any], Any], chunks: list) -> list:
+        """
+        一括処理のリクエストを並行して実行します。リクエストが1件の場合は呼び出し元のスレッドで実行します。
+        boto3のリソースはスレッド間で共有できないため、各リクエストはスレッドセーフなクライアントで実行します。
+        Args:
+            function: 1リクエスト分の処理
+            chunks: リクエストごとの引数
+        Returns:
+            list: chunksと同じ順番の処理結果
+        """
+        if len(chunks) <= 1:
+            return [function(chunk) for chunk in chunks]
+        return list(get_batch_executor().map(function, chunks))
+
+    def __batch_get_chunk(self, request: dict) -> list[dict]:
+        """
+        1回分のBatchGetItemを実行し、未処理のキーがなくなるまで再取得します。
+        Args:
+            request: テーブルごとのリクエスト（Keys, ProjectionExpressionなど）
+        Returns:
+            list[dict]: 取得したアイテム
+        """
+        client = self.dynamodb.meta.client
+        table_name = self.table_model.get_name()
+        request_items = {table_name: request}
+        items = []
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(BATCH_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+            response = client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            request_items = response.get("UnprocessedKeys")
+            if not request_items:
+                return items
+        raise RuntimeError(
+            f"BatchGetItemで未処理のキーが残りました。table name = {table_name}"
+        )
+
+    def __batch_delete_chunk(self, keys: list[dict]):
+        """
+        1回分のBatchWriteItemで削除し、未処理のアイテムがなくなるまで再実行します。
+        Args:
+            keys: 削除するアイテムのキー
+        """
+        client = self.dynamodb.meta.client
+        table_name = self.table_model.get_name()
+        request_items = {table_name: [{"DeleteRequest": {"Key": key}} for key in keys]}
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(BATCH_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+            response = client.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems")
+            if not request_items:
+                return
+        raise RuntimeError(
+            f"BatchWriteItemで未処理のアイテムが残りました。table name = {table_name}"
         )
 
     def put_item(self, data):
@@ -96,7 +424,9 @@ class BaseTableRepository:
         """
         self.table.put_item(Item=data)
         self.logger.info(
-            f"Item added successfully, table name = {self.table_model.get_name()}, data = {data}"
+            "Item added successfully, table name = %s, data = %s",
+            self.table_model.get_name(),
+            payload(data),
         )
 
     def update_item(
@@ -106,6 +436,7 @@ class BaseTableRepository:
         expression_attribute_values: dict,
         partition_key_value: Any,
         sort_key_value: Any = None,
+        condition_expression: Optional[str] = None,
     ):
         """
         DynamoDBテーブルの項目を更新する
@@ -116,31 +447,73 @@ class BaseTableRepository:
             expression_attribute_names (dict): 更新式の変数名
             partition_key_value: パーティションキーの値
             sort_key_value: ソートキーの値
+            condition_expression (Optional[str]): 更新の条件式。満たさない場合は
+                ConditionalCheckFailedExceptionとなる
         Returns:
             更新後の属性
         """
         key = self.__get_key(partition_key_value, sort_key_value)
+        options = {}
+        if condition_expression is not None:
+            options["ConditionExpression"] = condition_expression
+        # REMOVEのみの場合など、空のExpressionAttributeValuesは指定できない
+        if expression_attribute_values:
+            options["ExpressionAttributeValues"] = expression_attribute_values
         response = self.table.update_item(
             Key=key,
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values,
             ReturnValues="ALL_NEW",
+            **options,
         )
         self.logger.info(
-            f"UpdateItem succeeded, table name = {self.table_model.get_name()}"
+            "UpdateItem succeeded, table name = %s", self.table_model.get_name()
         )
         return self.table_model(**response["Attributes"])
 
+    def update_fields(
+        self,
+        partition_key_value: Any,
+        set_fields: Optional[Mapping | BaseModel] = None,
+        remove_fields: Optional[list[str]] = None,
+        add_fields: Optional[Mapping] = None,
+        sort_key_value: Any = None,
+    ):
+        """
+        指定したフィールドのみを、1回のUpdateItemで更新します。
+        Args:
+            partition_key_value: パーティションキーの値
+            set_fields: 値を設定するフィールド。部分的なモデルまたはネストしたdict
+            remove_fields: 削除する属性パスのリスト
+            add_fields: 値を加算するフィールド
+            sort_key_value: ソートキーの値
+        Returns:
+            更新後の属性
+        """
+        set_values = flatten_update_fields(set_fields or {})
+        add_values = flatten_update_fields(add_fields or {})
+        update_expression, expression_attribute_names, value_placeholders = (
+            build_update_expression(
+                tuple(set_values), tuple(remove_fields or ()), tuple(add_values)
+            )
+        )
+        return self.update_item(
+            update_expression=update_expression,
+            expression_attribute_names=dict(expression_attribute_names),
+            expression_attribute_values=dict(
+                zip(value_placeholders, [*set_values.values(), *add_values.values()])
+            ),
+            partition_key_value=partition_key_value,
+            sort_key_value=sort_key_value,
+        )
+
     def get_all(self):
         """
         テーブル内の全てのアイテムを取得します。
         Returns:
             全アイテム
         """
-        response = self.table.scan()
-        items = response.get("Items")
-        return [self.table_model(**item) for item in items]
+        return list(self.iter_scan())
 
     def scan_items(self, filter_expression: str):
         """
@@ -150,18 +523,7 @@ class BaseTableRepository:
         Returns:
             スキャン結果
         """
-        response = self.table.scan(
-            FilterExpression=filter_expression,
-        )
-        items = response.get("Items")
-
-        while "LastEvaluatedKey" in response:
-            response = self.table.scan(
-                FilterExpression=filter_expression,
-                ExclusiveStartKey=response["LastEvaluatedKey"],
-            )
-            items.extend(response["Items"])
-        return [self.table_model(**item) for item in items]
+        return list(self.iter_scan(filter_expression=filter_expression))
 
     def query_items(self, partition_key_value: Any):
         """
@@ -171,18 +533,198 @@ class BaseTableRepository:
         Returns:
             検索結果
         """
-        response = self.table.query(
-            KeyConditionExpression=Key(self.table_model.get_parttion_key()[0]).eq(
-                partition_key_value
+        return list(
+            self.iter_query(
+                Key(self.table_model.get_parttion_key()[0]).eq(partition_key_value)
             )
         )
-        items = response["Items"]
-        if items is None:
-            self.logger.info(
-                f"items not found. partition key value = {partition_key_value}, table name = {self.table_model.get_name()}"
+
+    def query_index_items(
+        self,
+        index_name: str,
+        partition_key_value: Any,
+        scan_index_forward: bool = True,
+        filter_expression: Any = None,
+        projection: Optional[list[str]] = None,
+        model: Optional[type[BaseModel]] = None,
+    ):
+        """
+        グローバルセカンダリインデックスのパーティションキーの値で検索を行います。
+        Args:
+            index_name: インデックス名
+            partition_key_value: インデックスのパーティションキーの値
+            scan_index_forward: ソートキーの昇順で取得する場合はTrue
+            filter_expression: フィルタ式
+            projection: 取得する属性名のリスト。ネストした属性は"data.total"のように指定
+            model: アイテムを変換するモデル。Noneの場合はテーブルのモデル
+        Returns:
+            検索結果
+        """
+        index_partition_key = self.table_model.get_global_secondary_indexes()[
+            index_name
+        ][0]
+        return list(
+            self.iter_query(
+                Key(index_partition_key[0]).eq(partition_key_value),
+                index_name=index_name,
+                scan_index_forward=scan_index_forward,
+                filter_expression=filter_expression,
+                projection=projection,
+                model=model,
             )
-            return None
-        return [self.table_model(**item) for item in items]
+        )
+
+    def iter_scan(
+        self,
+        filter_expression: Any = None,
+        page_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        projection: Optional[list[str]] = None,
+        model: Optional[type[BaseModel]] = None,
+    ) -> Iterator[BaseModel]:
+        """
+        テーブルをスキャンし、ページを取得する度にアイテムを返すジェネレータです。
+        LastEvaluatedKeyは必要になった時点で辿るため、メモリ上には1ページ分のみ保持されます。
+        Args:
+            filter_expression: フィルタ式
+            page_size: 1回のリクエストで評価するアイテム数の上限
+            limit: 返すアイテム数の上限
+            projection: 取得する属性名のリスト。ネストした属性は"data.total"のように指定
+            model: アイテムを変換するモデル。Noneの場合はテーブルのモデル
+        Returns:
+            アイテムのイテレータ
+        """
+        options = {}
+        if filter_expression is not None:
+            options["FilterExpression"] = filter_expression
+        return self.__iter_pages(
+            self.table.scan, options, page_size, limit, projection, model
+        )
+
+    def iter_query(
+        self,
+        key_condition_expression: Any,
+        index_name: Optional[str] = None,
+        scan_index_forward: bool = True,
+        filter_expression: Any = None,
+        page_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        projection: Optional[list[str]] = None,
+        model: Optional[type[BaseModel]] = None,
+    ) -> Iterator[BaseModel]:
+        """
+        キー条件で検索し、ページを取得する度にアイテムを返すジェネレータです。
+        Args:
+            key_condition_expression: キー条件式
+            index_name: インデックス名。テーブル本体を検索する場合はNone
+            scan_index_forward: ソートキーの昇順で取得する場合はTrue
+            filter_expression: フィルタ式
+            page_size: 1回のリクエストで評価するアイテム数の上限
+            limit: 返すアイテム数の上限
+            projection: 取得する属性名のリスト。ネストした属性は"data.total"のように指定
+            model: アイテムを変換するモデル。Noneの場合はテーブルのモデル
+        Returns:
+            アイテムのイテレータ
+        """
+        options = {
+            "KeyConditionExpression": key_condition_expression,
+            "ScanIndexForward": scan_index_forward,
+        }
+        if index_name is not None:
+            options["IndexName"] = index_name
+        if filter_expression is not None:
+            options["FilterExpression"] = filter_expression
+        return self.__iter_pages(
+            self.table.query, options, page_size, limit, projection, model
+        )
+
+    def __iter_pages(
+        self,
+        operation: Callable[..., dict],
+        options: dict,
+        page_size: Optional[int],
+        limit: Optional[int],
+        projection: Optional[list[str]],
+        model: Optional[type[BaseModel]] = None,
+    ) -> Iterator[BaseModel]:
+        """
+        scan/queryのページネーションを遅延して辿り、アイテムをモデルに変換して返します。
+        Args:
+            operation: self.table.scan または self.table.query
+            options: operationに渡す引数
+            page_size: 1回のリクエストで評価するアイテム数の上限
+            limit: 返すアイテム数の上限
+            projection: 取得する属性名のリスト
+            model: アイテムを変換するモデル。Noneの場合はテーブルのモデル
+        Returns:
+            アイテムのイテレータ
+        """
+        model = model or self.table_model
+        if projection:
+            projection_expression, expression_attribute_names = (
+                build_projection_expression(projection)
+            )
+            options["ProjectionExpression"] = projection_expression
+            options["ExpressionAttributeNames"] = expression_attribute_names
+        count = 0
+        while True:
+            if page_size is not None:
+                # 上限に達するページで余分なアイテムを読み込まないようにする
+                options["Limit"] = (
+                    page_size if limit is None else min(page_size, limit - count)
+                )
+            elif limit is not None:
+                options["Limit"] = limit - count
+            response = operation(**options)
+            for item in response.get("Items", []):
+                yield model(**item)
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            if "LastEvaluatedKey" not in response:
+                return
+            options["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def __get_key_names(self) -> list[str]:
+        """
+        プライマリキーの属性名を取得します。
+        Returns:
+            list[str]: パーティションキー、ソートキー（あれば）の属性名
+        """
+        key_names = [self.table_model.get_parttion_key()[0]]
+        if self.table_model.get_sort_key() is not None:
+            key_names.append(self.table_model.get_sort_key()[0])
+        return key_names
+
+    def __key_of(self, item: dict) -> tuple:
+        """
+        アイテムのプライマリキーの値をタプルで取得します。
+        Args:
+            item: アイテムまたはプライマリキー
+        Returns:
+            tuple: プライマリキーの値
+        """
+        return tuple(item[name] for name in self.__get_key_names())
+
+    def __get_keys(
+        self, partition_key_values: list[Any], sort_key_values: Optional[list[Any]]
+    ) -> list[dict]:
+        """
+        複数のプライマリキーを取得します。
+        Args:
+            partition_key_values: パーティションキーの値のリスト
+            sort_key_values: ソートキーの値のリスト
+        Returns:
+            list[dict]: プライマリキーのリスト
+        """
+        if sort_key_values is None:
+            return [self.__get_key(value) for value in partition_key_values]
+        return [
+            self.__get_key(partition_key_value, sort_key_value)
+            for partition_key_value, sort_key_value in zip(
+                partition_key_values, sort_key_values, strict=True
+            )
+        ]
 
     def __get_key(self, partition_key_value: Any, sort_key_value: Any = None) -> dict:
         """
@@ -214,11 +756,16 @@ class BaseTableRepository:
         item = response.get("Item")
         if item is None:
             self.logger.info(
-                f"items not found. partition key value = {partition_key_value}, sort key value = {sort_key_value}, table name = {self.table_model.get_name()}"
+                "items not found. partition key value = %s, sort key value = %s, table name = %s",
+                partition_key_value,
+                sort_key_value,
+                self.table_model.get_name(),
             )
             return None
         self.logger.info(
-            f"Item found, table name = {self.table_model.get_name()}, item = {item}"
+            "Item found, table name = %s, item = %s",
+            self.table_model.get_name(),
+            payload(item),
         )
         return self.table_model(**item)
 
@@ -233,5 +780,5 @@ class BaseTableRepository:
         key = self.__get_key(partition_key_value, sort_key_value)
         self.table.delete_item(Key=key)
         self.logger.info(
-            f"Item with key {key} deleted from table {self.table_model.get_name()}."
+            "Item with key %s deleted from table %s.", key, self.table_model.get_name()
         )
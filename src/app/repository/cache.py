@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class TtlCache:
+    """
+    プロセス内で値を保持するキャッシュ。
+    Lambdaのウォームスタート間で共有されるよう、モジュールやクラスの属性として保持して使用します。
+    max_sizeを指定した場合は、最も長く使用されていない値から破棄します（LRU）。
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.__values: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: Any, loader: Callable[[], Any] = None) -> Any:
+        """
+        キャッシュから値を取得します。
+        値が存在しないか有効期限切れの場合、loaderが指定されていればloaderの結果を保存して返します。
+        Args:
+            key: キー
+            loader: 値を読み込む関数
+        Returns:
+            値。存在せずloaderも指定されていない場合はNone
+        """
+        with self.__lock:
+            entry = self.__values.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.__values.move_to_end(key)
+                return entry[1]
+        if loader is None:
+            return None
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def set(self, key: Any, value: Any):
+        """
+        値を保存します。
+        Args:
+            key: キー
+            value: 値
+        """
+        with self.__lock:
+            self.__values[key] = (time.monotonic() + self.ttl_seconds, value)
+            self.__values.move_to_end(key)
+            if self.max_size is not None and len(self.__values) > self.max_size:
+                self.__values.popitem(last=False)
+
+    def invalidate(self, key: Any = None):
+        """
+        キャッシュを破棄します。
+        Args:
+            key: 破棄するキー。Noneの場合は全て破棄
+        """
+        with self.__lock:
+            if key is None:
+                self.__values.clear()
+            else:
+                self.__values.pop(key, None)
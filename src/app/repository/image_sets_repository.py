@@ -1,32 +1,105 @@
-from src.app.model.db_model import ImageSet, TemporalExpenditure
-from src.app.repository.base_table_repository import BaseTableRepository
+from typing import Optional
+
+from src.app.model.db_model import (
+    ImageSet,
+    TemporalExpenditure,
+    calculate_ttl_timestamp,
+)
+from src.app.repository.base_table_repository import (
+    BaseTableRepository,
+    is_conditional_check_failed,
+)
 
 
 class ImageSetsRepository(BaseTableRepository):
     def __init__(self, dynamodb):
         super().__init__(dynamodb=dynamodb, table_model=ImageSet)
 
+    def add_image(
+        self, image_set_id: str, total: int, line_image_id: str
+    ) -> Optional[ImageSet]:
+        """
+        画像セットに画像を追加します。画像セットが存在しない場合は作成します。
+        1回の条件付きUpdateItemで行うため、同じ画像セットのWebhookが同時に届いても画像は失われません。
+        list_appendにより画像は1枚ずつ追加されるため、更新後の画像数がtotalに達するのは1回の呼び出しのみです。
+        Args:
+            image_set_id (str): 画像セットID
+            total (int): 画像セットの画像数
+            line_image_id (str): LINE画像ID
+        Returns:
+            Optional[ImageSet]: 更新後の画像セット。この画像が追加済み（Webhookの再送など）の場合はNone
+        """
+        try:
+            return self.update_item(
+                update_expression="SET #total = :total, #line_image_ids = list_append(if_not_exists(#line_image_ids, :empty_list), :line_image_ids), #image_statuses = if_not_exists(#image_statuses, :empty_map), #ttl_timestamp = if_not_exists(#ttl_timestamp, :ttl_timestamp)",
+                expression_attribute_names={
+                    "#total": "total",
+                    "#line_image_ids": "line_image_ids",
+                    "#image_statuses": "image_statuses",
+                    "#ttl_timestamp": "ttl_timestamp",
+                },
+                expression_attribute_values={
+                    ":total": total,
+                    ":line_image_id": line_image_id,
+                    ":line_image_ids": [line_image_id],
+                    ":empty_list": [],
+                    ":empty_map": {},
+                    ":ttl_timestamp": calculate_ttl_timestamp(
+                        delete_hour=1, delete_date=1
+                    ),
+                },
+                partition_key_value=image_set_id,
+                condition_expression="attribute_not_exists(#line_image_ids) OR NOT contains(#line_image_ids, :line_image_id)",
+            )
+        except Exception as e:
+            if not is_conditional_check_failed(e):
+                raise
+            self.logger.info(
+                "Image already added. image set id = %s, line image id = %s",
+                image_set_id,
+                line_image_id,
+            )
+            return None
+
     def update_image_meta_data_status(
         self, image_set_id: str, line_image_id: str, status: TemporalExpenditure.Status
-    ) -> ImageSet:
+    ) -> Optional[ImageSet]:
         """
-        画像メタデータのステータスを更新します。
+        画像の解析ステータスを設定し、解析が終わった画像の数を加算します。
+        1回の条件付きUpdateItemで行うため、複数の画像を同時に解析しても更新は失われません。
         Args:
             image_set_id (str): 画像セットID
             line_image_id (str): LINE画像ID
             status (str): ステータス
+        Returns:
+            Optional[ImageSet]: 更新後の画像セット。画像セットが存在しない場合や、
+                この画像のステータスが設定済み（SQSの再配信など）の場合はNone
         """
-        # 画像セットを取得
-        image_set: ImageSet = self.get_item(image_set_id)
-        if image_set is None:
-            return
-
-        # 画像メタデータを更新
-        for image_meta_data in image_set.image_meta_data:
-            if image_meta_data.line_image_id == line_image_id:
-                image_meta_data.status = status
-                break
-
-        # 画像セットを更新
-        self.put_item(image_set.model_dump())
-        return image_set
+        failed = status == TemporalExpenditure.Status.INVALID_IMAGE
+        try:
+            return self.update_item(
+                update_expression="SET #image_statuses.#line_image_id = :status ADD #analyzed_count :analyzed, #failed_count :failed",
+                expression_attribute_names={
+                    "#image_set_id": "image_set_id",
+                    "#image_statuses": "image_statuses",
+                    "#line_image_id": line_image_id,
+                    "#analyzed_count": "analyzed_count",
+                    "#failed_count": "failed_count",
+                },
+                expression_attribute_values={
+                    ":status": status,
+                    ":analyzed": 0 if failed else 1,
+                    ":failed": 1 if failed else 0,
+                },
+                partition_key_value=image_set_id,
+                condition_expression="attribute_exists(#image_set_id) AND attribute_not_exists(#image_statuses.#line_image_id)",
+            )
+        except Exception as e:
+            if not is_conditional_check_failed(e):
+                raise
+            self.logger.info(
+                "Image set not found or image status already set. image set id = %s, line image id = %s",
+                image_set_id,
+                line_image_id,
+            )
+            return None
@@ -1,11 +1,50 @@
 from src.app.model.db_model import ItemClassification
 from src.app.repository.base_table_repository import BaseTableRepository
+from src.app.repository.cache import TtlCache
+
+# 分類はdynamodb_tables.ymlから投入され滅多に変更されないため、ウォームスタート間で1時間保持する
+CLASSIFICATION_CACHE_TTL_SECONDS = 60 * 60
+CLASSIFICATION_CACHE_KEY = "classifications"
 
 
 class ItemClassificationsRepository(BaseTableRepository):
+    cache = TtlCache(CLASSIFICATION_CACHE_TTL_SECONDS)
+
     def __init__(self, dynamodb):
         super().__init__(dynamodb=dynamodb, table_model=ItemClassification)
 
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        分類のキャッシュを破棄します。
+        """
+        cls.cache.invalidate()
+
+    def __load_classifications(
+        self,
+    ) -> tuple[dict[str, list[ItemClassification]], dict[str, str]]:
+        """
+        全ての分類を取得し、メジャーをキーとしたdictとマイナーからメジャーへのdictを作成します。
+        Returns:
+            メジャーからマイナー一覧へのdict, マイナーからメジャーへのdict
+        """
+        major_to_minors = {}
+        minor_to_major = {}
+        for classification in self.iter_scan():
+            major_to_minors.setdefault(classification.major, []).append(classification)
+            minor_to_major[classification.minor] = classification.major
+        self.logger.info(
+            "分類をキャッシュしました。table name = %s, size = %d",
+            self.table_model.get_name(),
+            len(minor_to_major),
+        )
+        return major_to_minors, minor_to_major
+
+    def __get_classifications(
+        self,
+    ) -> tuple[dict[str, list[ItemClassification]], dict[str, str]]:
+        return self.cache.get(CLASSIFICATION_CACHE_KEY, self.__load_classifications)
+
     def get_major(self, minor: str) -> str:
         """
         マイナーからメジャーを取得します。
@@ -14,6 +53,11 @@ class ItemClassificationsRepository(BaseTableRepository):
         Returns:
             str: メジャー
         """
+        _, minor_to_major = self.__get_classifications()
+        if minor in minor_to_major:
+            return minor_to_major[minor]
+        # キャッシュ作成後に追加された分類の場合は、キャッシュを作り直す
+        self.invalidate_cache()
         response: ItemClassification = self.get_item(minor)
         return response.major
 
@@ -23,11 +67,17 @@ class ItemClassificationsRepository(BaseTableRepository):
         Returns:
             dict: アイテム分類
         """
-        classifications: list[ItemClassification] = self.get_all()
-        response = {}
-        for classification in classifications:
-            if classification.major in response:
-                response[classification.major].append(classification)
-            else:
-                response[classification.major] = [classification]
-        return response
+        major_to_minors, _ = self.__get_classifications()
+        return major_to_minors
+
+    def put_item(self, data):
+        super().put_item(data)
+        self.invalidate_cache()
+
+    def batch_write_items(self, items: list[dict]):
+        super().batch_write_items(items)
+        self.invalidate_cache()
+
+    def delete_item(self, partition_key_value, sort_key_value=None):
+        super().delete_item(partition_key_value, sort_key_value)
+        self.invalidate_cache()
@@ -0,0 +1,89 @@
+import json
+import re
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+def freeze(value: Any) -> Any:
+    """
+    JSONから読み込んだ値を変更不可な形式に変換します。
+    dictはMappingProxyTypeに、listはtupleに変換されます。
+    Args:
+        value: JSONから読み込んだ値
+    Returns:
+        変更不可な値
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any, params: Mapping[str, str]) -> Any:
+    """
+    変更不可なテンプレートから、プレースホルダを置換した変更可能なコピーを作成します。
+    Args:
+        value: freezeで変換した値
+        params: プレースホルダ名と置換後の文字列のdict
+    Returns:
+        変更可能なコピー
+    """
+    if isinstance(value, Mapping):
+        return {k: thaw(v, params) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v, params) for v in value]
+    if params and isinstance(value, str) and "{" in value:
+        return PLACEHOLDER_PATTERN.sub(
+            lambda m: str(params.get(m.group(1), m.group(0))), value
+        )
+    return value
+
+
+class MessageTemplateEngine:
+    """
+    メッセージテンプレートをプロセスごとに一度だけ読み込み、呼び出しごとにコピーを作成して返します。
+    テンプレート自体は変更不可のため、ウォームスタート時に前回の返信内容が残ることはありません。
+    """
+
+    __templates: dict[str, Mapping[str, Mapping[str, Any]]] = {}
+    __lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.templates = self.__load(path)
+
+    @classmethod
+    def __load(cls, path: str) -> Mapping[str, Any]:
+        """
+        テンプレートを読み込みます。読み込み済みの場合は保持しているテンプレートを返します。
+        Args:
+            path: テンプレートのJSONファイルのパス
+        Returns:
+            変更不可なテンプレート
+        """
+        templates = cls.__templates.get(path)
+        if templates is not None:
+            return templates
+        with cls.__lock:
+            if path not in cls.__templates:
+                with open(path, "r") as f:
+                    cls.__templates[path] = freeze(json.load(f))
+            return cls.__templates[path]
+
+    def has(self, key: str) -> bool:
+        return key in self.templates
+
+    def render(self, key: str, **params: str) -> list[dict]:
+        """
+        テンプレートのコピーを作成し、プレースホルダを置換して返します。
+        Args:
+            key: テンプレートのキー
+            params: プレースホルダ名と置換後の文字列
+        Returns:
+            変更可能なメッセージ
+        """
+        return thaw(self.templates[key], params)
@@ -1,35 +1,35 @@
 import datetime
-import json
 from src.app.model import (
     db_model as db,
     usecase_model as uc,
 )
+from src.app.repository.message_template import MessageTemplateEngine
 
 MESSAGE_JSON_PATH = "resource/message.json"
 
 
 class MessagesRepository:
-    message_pool = {}
-
     def __init__(self):
-        with open(MESSAGE_JSON_PATH, "r") as f:
-            self.message_pool = json.load(f)
+        self.template_engine = MessageTemplateEngine(MESSAGE_JSON_PATH)
 
-    def get_message(self, key: str) -> str:
-        message = self.message_pool.get(key)
-        if message is None:
-            message = self.message_pool.get("[message_not_found_error]")
-        return message
+    def get_message(self, key: str, **params: str) -> list[dict]:
+        """
+        メッセージテンプレートのコピーを取得します。
+        Args:
+            key: メッセージのキー
+            params: プレースホルダ名と置換後の文字列
+        Returns:
+            list[dict]: メッセージ
+        """
+        if not self.template_engine.has(key):
+            key = "[message_not_found_error]"
+        return self.template_engine.render(key, **params)
 
     def get_error_message(self, e: Exception) -> str:
-        messages = self.get_message("[unknown_error]")
-        messages[2]["text"] = messages[2]["text"].replace("{error}", str(e))
-        return messages
+        return self.get_message("[unknown_error]", error=str(e))
 
     def get_follow_message(self, user_name: str) -> str:
-        messages = self.get_message("[follow]")
-        messages[0]["text"] = f"{user_name}さんフォローありがとうございます！"
-        return messages
+        return self.get_message("[follow]", user_name=user_name)
 
     def get_start_user_registration_message(self) -> str:
         messages = self.get_message("[start_user_registration]")
@@ -39,19 +39,17 @@ class MessagesRepository:
         return messages
 
     def get_register_user_message(self, user_name: str, line_name: str) -> str:
-        messages = self.get_message("[register_user]")
-        messages[0]["text"] = (
-            f"「{user_name}」を{line_name}さんのスプレッドシートでの名前として、ユーザー登録が完了しました！"
+        return self.get_message(
+            "[register_user]", user_name=user_name, line_name=line_name
         )
-        return messages
 
     def get_temporal_expenditure_list(
-        self, records: list[db.TemporalExpenditure]
+        self, records: list[db.TemporalExpenditureSummary]
     ) -> list[dict]:
         """
         仮の家計簿リストメッセージを作成します。
         Args:
-            records (list[db.TemporalExpenditure]): 仮の家計簿レコードリスト
+            records (list[db.TemporalExpenditureSummary]): 一覧表示用の仮の家計簿レコードリスト
         Returns:
             list[dict]: 仮の家計簿リストメッセージ
         """
@@ -156,6 +154,20 @@ class MessagesRepository:
             contents.append(bubble)
         response = self.get_message("[temporal_expenditure_list]")
         response[0]["contents"]["contents"] = contents
+        num_analyzed = sum(
+            1
+            for record in records
+            if record.status == db.TemporalExpenditure.Status.ANALYZED
+        )
+        if num_analyzed > 1:
+            response[0]["quickReply"] = {
+                "items": [
+                    {
+                        "type": "action",
+                        "action": self.__get_register_all_analyzed_button(num_analyzed),
+                    }
+                ]
+            }
         return response
 
     def get_reciept_analysis_message(
@@ -163,6 +175,7 @@ class MessagesRepository:
         temporal_expenditure_id: str,
         status: db.TemporalExpenditure.Status,
         num_receipts: int = 0,
+        rejected_reason: str = None,
     ) -> list[dict]:
         """
         レシート解析完了メッセージを作成します。
@@ -170,6 +183,7 @@ class MessagesRepository:
             temporal_expenditure_id (str): 仮の家計簿レコードのID
             status (db.TemporalExpenditure.Status): 仮の家計簿レコードのステータス
             num_receipts (int): 解析したレシートの数
+            rejected_reason (str): 画像の品質により解析しなかった場合の理由
         Returns:
             list[dict]: レシート解析完了メッセージ
         """
@@ -199,6 +213,10 @@ class MessagesRepository:
                         response[0]["text"]
                         + f"\n\n ※ 画像の中には{num_receipts}枚のレシートが含まれており、それらも登録途中のレシートとして保存しているます。「登録途中のレシート一覧」をタップして確認してみて下さい。"
                     )
+            case db.TemporalExpenditure.Status.INVALID_IMAGE if rejected_reason:
+                response = self.get_message(
+                    "[image_quality_rejected]", reason=rejected_reason
+                )
             case db.TemporalExpenditure.Status.INVALID_IMAGE:
                 response = self.get_message("[reciept_analysis_failed]")
         if status != db.TemporalExpenditure.Status.ANALYZED:
@@ -380,6 +398,23 @@ class MessagesRepository:
             },
         }
 
+    def __get_register_all_analyzed_button(self, num_analyzed: int) -> dict:
+        """
+        解析済みのレシートを全て登録するボタンを作成します。
+        Args:
+            num_analyzed (int): 解析済みのレシートの数
+        Returns:
+            dict: 一括登録のアクション
+        """
+        return {
+            "type": "postback",
+            "label": f"解析済み{num_analyzed}件を全て登録",
+            "data": uc.RegisterExpenditurePostback(
+                type=uc.PostbackEventTypeEnum.REGISTER_ALL_ANALYZED,
+            ).model_dump_json(),
+            "displayText": "解析済みのレシートを全て、詳細項目を含めて家計簿に登録します",
+        }
+
     def __get_register_only_total_button(self, id: str) -> dict:
         """
         合計のみの家計簿登録ボタンを作成します。
@@ -0,0 +1,61 @@
+import hashlib
+from typing import Optional
+
+from src.app.model.db_model import ReceiptAnalysisResult
+from src.app.model.usecase_model import ReceiptResult
+from src.app.repository.base_table_repository import BaseTableRepository
+from src.app.repository.cache import TtlCache
+
+# プロセス内に保持する解析結果の有効期限と件数
+RESULT_CACHE_TTL_SECONDS = 60 * 60
+RESULT_CACHE_MAX_SIZE = 128
+
+
+def hash_image(binary: bytes) -> str:
+    """
+    画像のハッシュ値を計算します。
+    Args:
+        binary: 画像のバイナリデータ
+    Returns:
+        str: SHA-256の16進数表記
+    """
+    return hashlib.sha256(binary).hexdigest()
+
+
+class ReceiptAnalysisResultsRepository(BaseTableRepository):
+    # Lambdaのウォームスタート間で共有する
+    cache = TtlCache(RESULT_CACHE_TTL_SECONDS, max_size=RESULT_CACHE_MAX_SIZE)
+
+    def __init__(self, dynamodb):
+        super().__init__(dynamodb=dynamodb, table_model=ReceiptAnalysisResult)
+
+    def get_results(self, image_hash: str) -> Optional[ReceiptAnalysisResult]:
+        """
+        画像の解析結果を、プロセス内のキャッシュ、DynamoDBの順に取得します。
+        Args:
+            image_hash: 画像のハッシュ値
+        Returns:
+            解析結果。保存されていない場合はNone
+        """
+        result: ReceiptAnalysisResult = self.cache.get(image_hash)
+        if result is None:
+            result = self.get_item(image_hash)
+            if result is None:
+                return None
+            self.cache.set(image_hash, result)
+        # 呼び出し元で解析結果が変更されてもキャッシュに影響しないよう、コピーを返す
+        return result.model_copy(deep=True)
+
+    def put_results(self, image_hash: str, results: Optional[list[ReceiptResult]]):
+        """
+        画像の解析結果を保存します。
+        Args:
+            image_hash: 画像のハッシュ値
+            results: 解析結果。レシートが読み取れなかった場合はNone
+        """
+        result = ReceiptAnalysisResult(
+            image_hash=image_hash,
+            results=[r.model_copy(deep=True) for r in results or []],
+        )
+        self.put_item(result.model_dump())
+        self.cache.set(image_hash, result)
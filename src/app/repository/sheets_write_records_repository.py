@@ -0,0 +1,33 @@
+from src.app.model.db_model import SheetsWriteRecord
+from src.app.repository.base_table_repository import BaseTableRepository
+
+
+class SheetsWriteRecordsRepository(BaseTableRepository):
+    def __init__(self, dynamodb):
+        super().__init__(dynamodb=dynamodb, table_model=SheetsWriteRecord)
+
+    def get_written_keys(self, idempotency_keys: list[str]) -> set[str]:
+        """
+        スプレッドシートへの書き込みが完了しているキーを取得します。
+        Args:
+            idempotency_keys: 確認するキー
+        Returns:
+            set[str]: 書き込み済みのキー
+        """
+        records: list[SheetsWriteRecord] = self.batch_get_items(
+            idempotency_keys, projection=["idempotency_key"]
+        )
+        return {record.idempotency_key for record in records if record is not None}
+
+    def put_written_keys(self, idempotency_keys: list[str]):
+        """
+        スプレッドシートへの書き込みが完了したキーを記録します。
+        Args:
+            idempotency_keys: 書き込みが完了したキー
+        """
+        self.batch_write_items(
+            [
+                SheetsWriteRecord(idempotency_key=key).model_dump()
+                for key in dict.fromkeys(idempotency_keys)
+            ]
+        )
@@ -1,6 +1,10 @@
 from boto3.dynamodb.conditions import Attr
-from src.app.model.db_model import TemporalExpenditure, calculate_ttl_timestamp
-from src.app.model.usecase_model import PaymentMethodEnum, ReceiptResult
+from src.app.model.db_model import (
+    TemporalExpenditure,
+    TemporalExpenditureSummary,
+    calculate_ttl_timestamp,
+)
+from src.app.model.usecase_model import ReceiptResult
 from src.app.repository.base_table_repository import BaseTableRepository
 
 
@@ -10,123 +14,82 @@ class TemporalExpendituresRepository(BaseTableRepository):
 
     def get_all_by_line_user_id(self, line_user_id: str) -> list[TemporalExpenditure]:
         """
-        LINEユーザーIDで全ての仮支出データを取得します。
+        LINEユーザーIDで全ての仮支出データを、作成日時の昇順で取得します。
         Args:
             line_user_id (str): LINEユーザーID
         Returns:
             仮支出データのリスト
         """
-        # filter_expression: str = Attr("line_user_id").eq(line_user_id) & ~Attr(
-        #     "status"
-        # ).eq(TemporalExpenditure.Status.NEW)
-        filter_expression: str = Attr("line_user_id").eq(line_user_id)
-        return self.scan_items(filter_expression)
-
-    def update_date(self, id: str, date: str) -> TemporalExpenditure:
-        """
-        日付を更新します。
-        Args:
-            id (str): ID
-            date (str): 日付
-        Returns:
-            更新されたレコード
-        """
-        return self.update_item(
-            update_expression="SET #data.#date = :updated",
-            expression_attribute_names={
-                "#data": "data",
-                "#date": "date",
-            },
-            expression_attribute_values={":updated": date},
-            partition_key_value=id,
+        return self.query_index_items(
+            TemporalExpenditure.LINE_USER_ID_INDEX, line_user_id
         )
 
-    def update_classification(
-        self, id: str, minar_classification: str, major_classification: str
-    ) -> TemporalExpenditure:
+    def get_summaries_by_line_user_id(
+        self, line_user_id: str
+    ) -> list[TemporalExpenditureSummary]:
         """
-        分類を更新します。
+        LINEユーザーIDで全ての仮支出データの一覧表示用の属性のみを、作成日時の昇順で取得します。
+        品目（data.items）は転送・変換しないため、一覧表示ではこちらを使用してください。
+        品目の集計を持たない以前のレコードのみ、全ての属性を取得して集計します。
         Args:
-            id (str): ID
-            minar_classification (str): 小分類
-            major_classification (str): 大分類
-        Returns:
-            更新されたレコード
-        """
-        return self.update_item(
-            update_expression="SET #data.#minor_classification = :updated_minor, #data.#major_classification = :updated_major",
-            expression_attribute_names={
-                "#data": "data",
-                "#minor_classification": "minor_classification",
-                "#major_classification": "major_classification",
-            },
-            expression_attribute_values={
-                ":updated_minor": minar_classification,
-                ":updated_major": major_classification,
-            },
-            partition_key_value=id,
-        )
-
-    def update_for_whom(self, id: str, for_whom: str) -> TemporalExpenditure:
-        """
-        誰向けの支出かを更新します。
-        Args:
-            id (str): ID
-            for_whom (str): 誰向けの支出か
+            line_user_id (str): LINEユーザーID
         Returns:
-            更新されたレコード
+            一覧表示用の仮支出データのリスト
         """
-        return self.update_item(
-            update_expression="SET #data.#for_whom = :updated",
-            expression_attribute_names={
-                "#data": "data",
-                "#for_whom": "for_whom",
-            },
-            expression_attribute_values={":updated": for_whom},
-            partition_key_value=id,
+        summaries: list[TemporalExpenditureSummary] = self.query_index_items(
+            TemporalExpenditure.LINE_USER_ID_INDEX,
+            line_user_id,
+            projection=TemporalExpenditureSummary.PROJECTION,
+            model=TemporalExpenditureSummary,
         )
+        legacy_indexes = [
+            i
+            for i, summary in enumerate(summaries)
+            if summary.status == TemporalExpenditure.Status.ANALYZED
+            and summary.data.item_count is None
+        ]
+        if legacy_indexes:
+            records = self.batch_get_items([summaries[i].id for i in legacy_indexes])
+            for i, record in zip(legacy_indexes, records):
+                if record is not None:
+                    summaries[i] = TemporalExpenditureSummary.model_validate(
+                        record.model_dump()
+                    )
+        return summaries
 
-    def update_payer(self, id: str, payer: str) -> TemporalExpenditure:
+    def get_analyzed_by_line_user_id(
+        self, line_user_id: str
+    ) -> list[TemporalExpenditure]:
         """
-        支払者を更新します。
+        LINEユーザーIDで解析済みの仮支出データを、作成日時の昇順で取得します。
+        絞り込みはDynamoDB側で行うため、解析済み以外のデータは転送されません。
         Args:
-            id (str): ID
-            payer (str): 支払者
+            line_user_id (str): LINEユーザーID
         Returns:
-            更新されたレコード
-        """
-        return self.update_item(
-            update_expression="SET #data.#payer = :updated",
-            expression_attribute_names={
-                "#data": "data",
-                "#payer": "payer",
-            },
-            expression_attribute_values={":updated": payer},
-            partition_key_value=id,
+            解析済みの仮支出データのリスト
+        """
+        return self.query_index_items(
+            TemporalExpenditure.LINE_USER_ID_INDEX,
+            line_user_id,
+            filter_expression=Attr("status").eq(
+                TemporalExpenditure.Status.ANALYZED.value
+            ),
         )
 
-    def update_payment_method(
-        self, id: str, payment_method: str
-    ) -> TemporalExpenditure:
+    def update_data(self, id: str, **fields) -> TemporalExpenditure:
         """
-        支払方法を更新します。
+        支出データの項目を更新します。複数の項目も1回のUpdateItemで更新します。
+        例: update_data(id, payer="太郎", payment_method=PaymentMethodEnum.FAMILY_CARD)
         Args:
             id (str): ID
-            payment_method (str): 支払方法
+            fields: 支出データ（AccountBookInput）の項目名と更新後の値
         Returns:
-            更新されたレコード
+            更新されたレコード。項目が指定されていない場合はValueError
         """
-        return self.update_item(
-            update_expression="SET #data.#payment_method = :updated",
-            expression_attribute_names={
-                "#data": "data",
-                "#payment_method": "payment_method",
-            },
-            expression_attribute_values={
-                ":updated": PaymentMethodEnum.value_of(payment_method)
-            },
-            partition_key_value=id,
-        )
+        # 空のdictは空のマップとして設定され、支出データ全体が消えるため更新しない
+        if not fields:
+            raise ValueError("更新する項目が指定されていません")
+        return self.update_fields(id, set_fields={"data": fields})
 
     def update_analysis_failure(self, id: str) -> TemporalExpenditure:
         """
@@ -136,18 +99,12 @@ class TemporalExpendituresRepository(BaseTableRepository):
         Returns:
             更新されたレコード
         """
-        ttl = calculate_ttl_timestamp(delete_date=1)
-        return self.update_item(
-            update_expression="SET #status = :updated_status, #ttl_timestamp = :updated_ttl_timestamp",
-            expression_attribute_names={
-                "#status": "status",
-                "#ttl_timestamp": "ttl_timestamp",
+        return self.update_fields(
+            id,
+            set_fields={
+                "status": TemporalExpenditure.Status.INVALID_IMAGE,
+                "ttl_timestamp": calculate_ttl_timestamp(delete_date=1),
             },
-            expression_attribute_values={
-                ":updated_status": TemporalExpenditure.Status.INVALID_IMAGE,
-                ":updated_ttl_timestamp": ttl,
-            },
-            partition_key_value=id,
         )
 
     def update_analysis_success(
@@ -161,23 +118,19 @@ class TemporalExpendituresRepository(BaseTableRepository):
         Returns:
             更新されたレコード
         """
-        items = [i.model_dump() for i in result.items]
-        return self.update_item(
-            update_expression="SET #status = :updated_status, #data.#total = :updated_total, #data.#date = :updated_date, #data.#store = :updated_store, #data.#items = :updated_items",
-            expression_attribute_names={
-                "#status": "status",
-                "#data": "data",
-                "#total": "total",
-                "#date": "date",
-                "#store": "store",
-                "#items": "items",
-            },
-            expression_attribute_values={
-                ":updated_status": TemporalExpenditure.Status.ANALYZED,
-                ":updated_total": result.total,
-                ":updated_date": result.date,
-                ":updated_store": result.store,
-                ":updated_items": items,
+        return self.update_fields(
+            id,
+            set_fields={
+                "status": TemporalExpenditure.Status.ANALYZED,
+                "data": result.model_dump(
+                    include={
+                        "total",
+                        "date",
+                        "store",
+                        "items",
+                        "item_count",
+                        "item_price_sum",
+                    }
+                ),
             },
-            partition_key_value=id,
         )
@@ -1,7 +1,82 @@
+from typing import Any
 from src.app.model.db_model import User
 from src.app.repository.base_table_repository import BaseTableRepository
+from src.app.repository.cache import TtlCache
+
+# 他のLambdaコンテナでの登録内容も反映されるよう、10分で破棄する
+USER_CACHE_TTL_SECONDS = 60 * 10
+ROSTER_CACHE_KEY = ("roster",)
 
 
 class UsersRepository(BaseTableRepository):
+    # line_user_idをキーにしたユーザーと、ROSTER_CACHE_KEYをキーにした全ユーザーのdictを保持する
+    cache = TtlCache(USER_CACHE_TTL_SECONDS)
+
     def __init__(self, dynamodb):
         super().__init__(dynamodb=dynamodb, table_model=User)
+
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        ユーザーのキャッシュを破棄します。
+        """
+        cls.cache.invalidate()
+
+    def __load_roster(self) -> dict[str, User]:
+        """
+        全てのユーザーを取得し、line_user_idをキーとしたdictを作成します。
+        Returns:
+            dict: line_user_idをキーとしたユーザー
+        """
+        roster = {user.line_user_id: user for user in self.iter_scan()}
+        self.logger.info("ユーザー一覧をキャッシュしました。size = %d", len(roster))
+        return roster
+
+    def get_all(self) -> list[User]:
+        """
+        全てのユーザーを取得します。ウォームスタート時はキャッシュから取得します。
+        Returns:
+            全ユーザー
+        """
+        roster: dict[str, User] = self.cache.get(ROSTER_CACHE_KEY, self.__load_roster)
+        return [user.model_copy() for user in roster.values()]
+
+    def get_item(self, partition_key_value: Any, sort_key_value: Any = None) -> User:
+        """
+        line_user_idでユーザーを取得します。ウォームスタート時はキャッシュから取得します。
+        Args:
+            partition_key_value: line_user_id
+            sort_key_value: 未使用
+        Returns:
+            ユーザー。存在しない場合はNone
+        """
+        roster: dict[str, User] = self.cache.get(ROSTER_CACHE_KEY)
+        user: User = None
+        if roster is not None:
+            user = roster.get(partition_key_value)
+        if user is None:
+            user = self.cache.get(partition_key_value)
+        if user is None:
+            user = super().get_item(partition_key_value, sort_key_value)
+            if user is None:
+                return None
+            self.cache.set(partition_key_value, user)
+        # 呼び出し元での変更がキャッシュに影響しないよう、コピーを返す
+        return user.model_copy()
+
+    def put_item(self, data):
+        """
+        ユーザーを追加し、キャッシュにも反映します。
+        Args:
+            data: 追加するデータ
+        """
+        super().put_item(data)
+        user = User(**data)
+        self.cache.set(user.line_user_id, user)
+        roster: dict[str, User] = self.cache.get(ROSTER_CACHE_KEY)
+        if roster is not None:
+            self.cache.set(ROSTER_CACHE_KEY, {**roster, user.line_user_id: user})
+
+    def delete_item(self, partition_key_value: Any, sort_key_value: Any = None):
+        super().delete_item(partition_key_value, sort_key_value)
+        self.invalidate_cache()
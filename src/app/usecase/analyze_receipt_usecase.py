@@ -1,12 +1,22 @@
+import time
 import traceback
-import boto3
+from typing import Optional
 from linebot.v3.messaging.models.message import Message
+from src.app.config.clients import get_dynamodb
 from src.app.adaptor.azure_ducument_intelligence_client import analyze_receipt
+from src.app.adaptor.image_processing import (
+    ImageQualityIssue,
+    prepare_image,
+)
 from src.app.adaptor.line_messaging_api_adaptor import fetch_image, push_message
 from src.app.config.logger import LogContext, get_app_logger
 from src.app.model.usecase_model import ReceiptResult
 from src.app.model.db_model import ImageSet, TemporalExpenditure
 from src.app.repository.image_sets_repository import ImageSetsRepository
+from src.app.repository.receipt_analysis_results_repository import (
+    ReceiptAnalysisResultsRepository,
+    hash_image,
+)
 from src.app.repository.temporal_expenditures_repository import (
     TemporalExpendituresRepository,
 )
@@ -14,16 +24,17 @@ from src.app.repository.messages_repository import (
     MessagesRepository,
 )
 
-# DynamoDBリソースの作成
-dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
-
 
 class AnalyzeReceiptUsecase:
     def __init__(self):
+        dynamodb = get_dynamodb()
         self.temporal_expenditure_table_repository = TemporalExpendituresRepository(
             dynamodb
         )
         self.image_sets_repository = ImageSetsRepository(dynamodb)
+        self.receipt_analysis_results_repository = ReceiptAnalysisResultsRepository(
+            dynamodb
+        )
         self.message_repository = MessagesRepository()
         self.logger = get_app_logger(__name__)
 
@@ -49,8 +60,8 @@ class AnalyzeReceiptUsecase:
             # 2. レシート画像を取得
             binary = fetch_image(record.line_image_id)
 
-            # 3. レシートを解析
-            result: list[ReceiptResult] = analyze_receipt(binary)
+            # 3. レシートを解析（同じ画像の解析結果があれば再利用）
+            result, quality_issue = self.__analyze_receipt(binary)
 
             # 4. 解析結果を保存
             if result is None:
@@ -67,17 +78,21 @@ class AnalyzeReceiptUsecase:
                 )
                 if len(result) > 1:
                     new_records: list[TemporalExpenditure] = []
-                    for r in result[1:]:
+                    for index, r in enumerate(result[1:], start=1):
                         new_record: TemporalExpenditure = (
                             TemporalExpenditure.from_another(record)
                         )
+                        # 再実行時は同じレコードを上書きする
+                        new_record.id = TemporalExpenditure.get_split_id(
+                            record.id, index
+                        )
                         new_record.data.items = r.items
                         new_record.data.total = r.total
                         new_record.data.date = r.date
                         new_record.data.store = r.store
                         new_records.append(new_record)
                     self.temporal_expenditure_table_repository.batch_write_items(
-                        new_records
+                        [new_record.model_dump() for new_record in new_records]
                     )
 
             # 5. 画像が複数枚連携されているかを確認
@@ -94,24 +109,43 @@ class AnalyzeReceiptUsecase:
                         record.image_set_id, record.line_image_id, status
                     )
                 )
+                if image_set is None:
+                    # この画像の結果が反映済み（通知に失敗した後の再実行など）の場合、
+                    # 画像セットは通知が完了するまで残るため、残っていれば通知をやり直す
+                    image_set = self.image_sets_repository.get_item(record.image_set_id)
+                    if image_set is None:
+                        self.logger.info(
+                            "画像セットの通知が済んでいるため、通知せずに処理を終了します。id = %s",
+                            id,
+                        )
+                        return True
                 status = image_set.get_overall_status()
                 if status == TemporalExpenditure.Status.ANALYZING:
                     self.logger.info(
                         f"画像が複数枚連携されているため、通知せずに処理を終了します。id = {id}"
                     )
-                    return
-                self.image_sets_repository.delete_item(record.image_set_id)
+                    return True
 
             # 6. 通知メッセージを取得
             message_dicts: list[dict] = (
                 self.message_repository.get_reciept_analysis_message(
-                    record.id, status, len(result)
+                    record.id,
+                    status,
+                    len(result or []),
+                    # 画像が1枚の場合のみ、解析しなかった理由を通知する
+                    rejected_reason=(
+                        quality_issue.description
+                        if quality_issue is not None and record.image_set_id is None
+                        else None
+                    ),
                 )
             )
             message = [Message.from_dict(m) for m in message_dicts]
 
             # 7. 通知メッセージを送信
             push_message(record.line_user_id, message)
+            if record.image_set_id is not None:
+                self.__delete_image_set(record.image_set_id)
             self.logger.info(f"全てのレシート解析処理が完了しました。id = {id}")
 
         except Exception:
@@ -119,3 +153,54 @@ class AnalyzeReceiptUsecase:
             traceback.print_exc()
             return False
         return True
+
+    def __delete_image_set(self, image_set_id: str):
+        """
+        通知が完了した画像セットを削除します。
+        通知は完了しているため、削除に失敗しても再実行はせず、TTLによる削除に任せます。
+        Args:
+            image_set_id (str): 画像セットID
+        """
+        try:
+            self.image_sets_repository.delete_item(image_set_id)
+        except Exception:
+            self.logger.exception(
+                "画像セットの削除に失敗しました。image set id = %s", image_set_id
+            )
+
+    def __analyze_receipt(
+        self, binary: bytes
+    ) -> tuple[list[ReceiptResult], Optional[ImageQualityIssue]]:
+        """
+        レシートを解析します。同じ画像の解析結果が保存されている場合は、解析せずにそれを返します。
+        明らかに解析できない画像は、Azureに送信せずに解析失敗とします。
+        Args:
+            binary (bytes): レシートの画像
+        Returns:
+            list[ReceiptResult]: 解析結果。レシートが読み取れなかった場合はNone
+            ImageQualityIssue: 画像の品質により解析しなかった場合の理由
+        """
+        if binary is None:
+            return None, None
+        image_hash = hash_image(binary)
+        cached = self.receipt_analysis_results_repository.get_results(image_hash)
+        if cached is not None:
+            self.logger.info("同じ画像の解析結果を再利用します。hash = %s", image_hash)
+            return cached.results or None, None
+        # 1回のデコードで品質を確認し、縮小・グレースケール化して送信量を減らす
+        quality, image = prepare_image(binary)
+        if quality.issue is not None:
+            return None, quality.issue
+        started_at = time.perf_counter()
+        result = analyze_receipt(image.data)
+        self.logger.info(
+            "レシートを解析しました。processed = %s, bytes = %d (%d bytes削減), "
+            "preprocess = %.1f ms, analysis = %.1f ms",
+            image.processed,
+            image.processed_bytes,
+            image.saved_bytes,
+            image.elapsed_ms,
+            (time.perf_counter() - started_at) * 1000,
+        )
+        self.receipt_analysis_results_repository.put_results(image_hash, result)
+        return result, None
@@ -0,0 +1,94 @@
+from typing import Optional
+
+from pydantic import ValidationError
+
+from src.app.adaptor.google_sheets_api_adaptor import append_data_with_backoff
+from src.app.config.clients import get_dynamodb
+from src.app.config.logger import get_app_logger
+from src.app.model.usecase_model import SheetsOutboxEntry
+from src.app.repository.sheets_write_records_repository import (
+    SheetsWriteRecordsRepository,
+)
+
+
+class FlushSheetsOutboxUsecase:
+    def __init__(self):
+        self.sheets_write_records_repository = SheetsWriteRecordsRepository(
+            get_dynamodb()
+        )
+        self.logger = get_app_logger(__name__)
+
+    def execute(
+        self, records: list[dict], deadline: Optional[float] = None
+    ) -> list[str]:
+        """
+        キューに溜まった書き込みを、シートごとに1回のappend_rowsでスプレッドシートに追加します。
+        書き込み済みのキーは記録しておき、再配信や重複した依頼では書き込みません。
+        Args:
+            records (list[dict]): SQSのレコード
+            deadline (Optional[float]): 再実行を打ち切る時刻（time.monotonic()の値）
+        Returns:
+            list[str]: 書き込みに失敗したレコードのメッセージID
+        """
+        failed: list[str] = []
+        entries: list[tuple[str, SheetsOutboxEntry]] = []
+        for record in records:
+            try:
+                entry = SheetsOutboxEntry.model_validate_json(record["body"])
+            except ValidationError:
+                self.logger.exception(
+                    "書き込みの依頼を読み取れません。message_id = %s",
+                    record["messageId"],
+                )
+                failed.append(record["messageId"])
+                continue
+            entries.append((record["messageId"], entry))
+
+        written_keys = self.sheets_write_records_repository.get_written_keys(
+            [entry.idempotency_key for _, entry in entries]
+        )
+
+        # シートごとにまとめる。同じキーの依頼は最初の1件のみ書き込む
+        groups: dict[tuple[str, str], list[tuple[str, SheetsOutboxEntry]]] = {}
+        seen_keys = set(written_keys)
+        skipped = 0
+        for message_id, entry in entries:
+            if entry.idempotency_key in seen_keys:
+                skipped += 1
+                continue
+            seen_keys.add(entry.idempotency_key)
+            groups.setdefault((entry.spreadsheet_id, entry.sheet_name), []).append(
+                (message_id, entry)
+            )
+        if skipped:
+            self.logger.info("%d件の書き込み済みの依頼をスキップしました。", skipped)
+
+        for (spreadsheet_id, sheet_name), group in groups.items():
+            rows = [row for _, entry in group for row in entry.rows]
+            try:
+                if rows:
+                    append_data_with_backoff(
+                        spreadsheet_id, sheet_name, rows, deadline=deadline
+                    )
+            except Exception:
+                self.logger.exception(
+                    "スプレッドシートへの書き込みに失敗しました。sheet name = %s, count = %d",
+                    sheet_name,
+                    len(group),
+                )
+                failed.extend(message_id for message_id, _ in group)
+                continue
+            self.logger.info(
+                "%d件の依頼（%d行）をシート '%s' に書き込みました。",
+                len(group),
+                len(rows),
+                sheet_name,
+            )
+            try:
+                self.sheets_write_records_repository.put_written_keys(
+                    [entry.idempotency_key for _, entry in group]
+                )
+            except Exception:
+                # 書き込みは完了しているため、再実行で重複しないようレコードは成功として扱う
+                self.logger.exception("書き込み済みのキーを記録できませんでした。")
+        return failed
@@ -1,18 +1,21 @@
+import hashlib
 import json
+import os
 import traceback
-import boto3
 from linebot.v3.messaging.models.message import Message
 from linebot.v3.webhooks.models.image_message_content import ImageMessageContent
 from linebot.v3.webhooks.models.text_message_content import TextMessageContent
 from linebot.v3.webhooks.models.postback_content import PostbackContent
 from linebot.v3.messaging.models.user_profile_response import UserProfileResponse
 
+from src.app.config.clients import get_dynamodb
 from src.app.adaptor.line_messaging_api_adaptor import (
     fetch_user_profile,
 )
 from src.app.adaptor.google_sheets_api_adaptor import (
-    register_expenditure,
-    register_only_total,
+    append_data_to_spreadsheet,
+    build_expenditure_rows,
+    build_only_total_rows,
 )
 from src.app.adaptor.sqs_adaptor import send_message_to_sqs, send_messages_to_sqs
 from src.app.model import (
@@ -34,12 +37,14 @@ from src.app.repository.image_sets_repository import (
 )
 from src.app.repository.users_reposioty import UsersRepository
 
-# DynamoDBリソースの作成
-dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+# スプレッドシートへの書き込みを依頼するキューのURL
+# 設定されていない場合は、応答の前にスプレッドシートへ直接書き込む
+SHEETS_OUTBOX_QUEUE_URL_ENV = "SHEETS_OUTBOX_QUEUE_URL"
 
 
 class HundleLineMessageUsecase:
     def __init__(self):
+        dynamodb = get_dynamodb()
         self.item_classifications_repository = ItemClassificationsRepository(dynamodb)
         self.temporal_expenditures_repository = TemporalExpendituresRepository(dynamodb)
         self.users_repository = UsersRepository(dynamodb)
@@ -92,8 +97,10 @@ class HundleLineMessageUsecase:
             self.message_sessions_repository.put_item(session.model_dump())
             return self.message_repository.get_start_user_registration_message()
         elif message.text == uc.KeywordsEnum.GET_TEMPORALLY_EXPENDITURES.value:
-            records: list[db.TemporalExpenditure] = (
-                self.temporal_expenditures_repository.get_all_by_line_user_id(user_id)
+            records: list[db.TemporalExpenditureSummary] = (
+                self.temporal_expenditures_repository.get_summaries_by_line_user_id(
+                    user_id
+                )
             )
             return self.message_repository.get_temporal_expenditure_list(records)
         elif uc.KeywordsEnum.is_for_register_receipt(message.text):
@@ -137,27 +144,13 @@ class HundleLineMessageUsecase:
         self, message: ImageMessageContent, user_id: str
     ) -> list[Message]:
         # NOTE: 画像が複数枚の場合
+        # - 画像セットへの追加は1回の書き込みで行い、最後の画像を追加したWebhookのみが解析を依頼する
         if message.image_set is not None and message.image_set.id is not None:
-            image_set: db.ImageSet = self.image_sets_repository.get_item(
-                message.image_set.id
+            image_set: db.ImageSet = self.image_sets_repository.add_image(
+                message.image_set.id, message.image_set.total, message.id
             )
-            if image_set is None:
-                image_set = db.ImageSet(
-                    image_set_id=message.image_set.id,
-                    total=message.image_set.total,
-                    image_meta_data=[
-                        db.ImageSet.ImageMetaData(line_image_id=message.id)
-                    ],
-                )
-                self.image_sets_repository.put_item(image_set.model_dump())
+            if image_set is None or len(image_set.line_image_ids) < image_set.total:
                 return
-            else:
-                image_set.image_meta_data.append(
-                    db.ImageSet.ImageMetaData(line_image_id=message.id)
-                )
-                self.image_sets_repository.put_item(image_set.model_dump())
-                if len(image_set.image_meta_data) != image_set.total:
-                    return
 
         # NOTE: セッションが存在する場合、セッションを削除し、かつTemporalExpenditureを取得（あれば）
         # - 登録方法に指定がある場合が該当。
@@ -194,15 +187,21 @@ class HundleLineMessageUsecase:
             record.image_set_id = message.image_set.id
             records = [record.model_dump()]
             temporal_expenditure_ids = [record.id]
-            for data in image_set.image_meta_data:
-                if data.line_image_id == message.id:
+            for line_image_id in image_set.line_image_ids:
+                if line_image_id == message.id:
                     continue
                 another_record = db.TemporalExpenditure.from_another(record)
-                another_record.line_image_id = data.line_image_id
+                another_record.line_image_id = line_image_id
                 records.append(another_record.model_dump())
                 temporal_expenditure_ids.append(another_record.id)
             self.temporal_expenditures_repository.batch_write_items(records)
-            send_messages_to_sqs(temporal_expenditure_ids)
+            results = send_messages_to_sqs(temporal_expenditure_ids)
+            failed = [r for r in results if not r.succeeded]
+            if failed:
+                # NOTE: 解析されない画像があると画像セットの解析が完了しないため、エラーとして通知する
+                raise RuntimeError(
+                    f"{len(failed)}件のレシート解析の依頼に失敗しました。"
+                )
         else:
             self.temporal_expenditures_repository.put_item(record.model_dump())
             send_message_to_sqs(record.id)
@@ -210,6 +209,59 @@ class HundleLineMessageUsecase:
             record.id, record.status
         )
 
+    def __write_to_spreadsheet(self, idempotency_key: str, rows: list[list]):
+        """
+        家計簿のスプレッドシートへの書き込みをキューに登録します。
+        書き込みはflush_sheets_outboxがまとめて行うため、スプレッドシートの制限や遅延は応答に影響しません。
+        キューへの登録に失敗した場合は例外となり、仮支出データは削除されずに残ります。
+        Args:
+            idempotency_key: 重複して書き込まないためのキー（仮支出データのID）
+            rows: 追加する行
+        """
+        spreadsheet_id = os.environ["SPREADSHEET_ID"]
+        sheet_name = os.environ["EXPENDITURE_SHEET_NAME"]
+        queue_url = os.environ.get(SHEETS_OUTBOX_QUEUE_URL_ENV)
+        if not queue_url:
+            append_data_to_spreadsheet(spreadsheet_id, sheet_name, rows)
+            return
+        entry = uc.SheetsOutboxEntry(
+            idempotency_key=idempotency_key,
+            spreadsheet_id=spreadsheet_id,
+            sheet_name=sheet_name,
+            rows=rows,
+        )
+        send_message_to_sqs(entry.model_dump_json(), queue_url=queue_url)
+
+    def __register_all_analyzed(self, user_id: str) -> list[dict]:
+        """
+        解析済みの仮支出データを全て家計簿に登録します。
+        取得、スプレッドシートへの書き込み、削除をそれぞれ1回の一括処理で行います。
+        Args:
+            user_id: LINEユーザーID
+        Returns:
+            list[dict]: 登録結果のメッセージ
+        """
+        records: list[db.TemporalExpenditure] = (
+            self.temporal_expenditures_repository.get_analyzed_by_line_user_id(user_id)
+        )
+        if not records:
+            return self.message_repository.get_message("[no_analyzed_expenditure]")
+        rows = []
+        for record in records:
+            # 品目が読み取れなかったレシートは、登録が漏れないよう合計のみを登録する
+            if record.data.items:
+                rows.extend(build_expenditure_rows(record.data))
+            else:
+                rows.extend(build_only_total_rows(record.data))
+        ids = [record.id for record in records]
+        # 同じ一覧から重複して登録されないよう、対象のIDからキーを作成する
+        idempotency_key = hashlib.sha256(",".join(sorted(ids)).encode()).hexdigest()
+        self.__write_to_spreadsheet(idempotency_key, rows)
+        self.temporal_expenditures_repository.batch_delete_items(ids)
+        return self.message_repository.get_message(
+            "[register_all_analyzed]", count=str(len(records))
+        )
+
     @to_message
     def handle_postback_event(
         self, postback: PostbackContent, user_id: str
@@ -218,6 +270,8 @@ class HundleLineMessageUsecase:
         if data_dict["type"] == uc.PostbackEventTypeEnum.CANCEL_USER_REGISTRATION:
             self.message_sessions_repository.delete_item(user_id)
             return self.message_repository.get_message("[cancel_user_registration]")
+        elif data_dict["type"] == uc.PostbackEventTypeEnum.REGISTER_ALL_ANALYZED:
+            return self.__register_all_analyzed(user_id)
         elif uc.PostbackEventTypeEnum.is_for_receipt_registration(data_dict["type"]):
             data = uc.RegisterExpenditurePostback(**data_dict)
             record: db.TemporalExpenditure = (
@@ -229,11 +283,15 @@ class HundleLineMessageUsecase:
                 )
             match data_dict["type"]:
                 case uc.PostbackEventTypeEnum.REGISTER_EXPENDITURE:
-                    register_expenditure(record.data)
+                    self.__write_to_spreadsheet(
+                        record.id, build_expenditure_rows(record.data)
+                    )
                     self.temporal_expenditures_repository.delete_item(data.id)
                     return self.message_repository.get_message("[register]")
                 case uc.PostbackEventTypeEnum.REGISTER_ONLY_TOTAL:
-                    register_only_total(record.data)
+                    self.__write_to_spreadsheet(
+                        record.id, build_only_total_rows(record.data)
+                    )
                     self.temporal_expenditures_repository.delete_item(data.id)
                     return self.message_repository.get_message("[register_only_total]")
                 case uc.PostbackEventTypeEnum.DETAIL_EXPENDITURE:
@@ -249,12 +307,10 @@ class HundleLineMessageUsecase:
                             data.updated_item
                         )
                     )
-                    record = (
-                        self.temporal_expenditures_repository.update_classification(
-                            id=record.id,
-                            minar_classification=data.updated_item,
-                            major_classification=major_classification,
-                        )
+                    record = self.temporal_expenditures_repository.update_data(
+                        record.id,
+                        minor_classification=data.updated_item,
+                        major_classification=major_classification,
                     )
                     return self.message_repository.get_reciept_confirm_message(record)
                 case uc.PostbackEventTypeEnum.CHANGE_FOR_WHOM:
@@ -263,21 +319,21 @@ class HundleLineMessageUsecase:
                         data, users
                     )
                 case uc.PostbackEventTypeEnum.UPDATE_FOR_WHOM:
-                    record = self.temporal_expenditures_repository.update_for_whom(
-                        id=record.id, for_whom=data.updated_item
+                    record = self.temporal_expenditures_repository.update_data(
+                        record.id, for_whom=data.updated_item
                     )
                     return self.message_repository.get_reciept_confirm_message(record)
                 case uc.PostbackEventTypeEnum.CHANGE_PAYER:
                     users: list[db.User] = self.users_repository.get_all()
                     return self.message_repository.get_change_payer_message(data, users)
                 case uc.PostbackEventTypeEnum.UPDATE_PAYER:
-                    record = self.temporal_expenditures_repository.update_payer(
-                        id=record.id, payer=data.updated_item
+                    record = self.temporal_expenditures_repository.update_data(
+                        record.id, payer=data.updated_item
                     )
                     return self.message_repository.get_reciept_confirm_message(record)
                 case uc.PostbackEventTypeEnum.UPDATE_DATE:
-                    record = self.temporal_expenditures_repository.update_date(
-                        record.id, postback.params["date"]
+                    record = self.temporal_expenditures_repository.update_data(
+                        record.id, date=postback.params["date"]
                     )
                     return self.message_repository.get_reciept_confirm_message(record)
                 case uc.PostbackEventTypeEnum.CHANGE_PAYMENT_METHOD:
@@ -285,10 +341,9 @@ class HundleLineMessageUsecase:
                         data
                     )
                 case uc.PostbackEventTypeEnum.UPDATE_PAYMENT_METHOD:
-                    record = (
-                        self.temporal_expenditures_repository.update_payment_method(
-                            id=record.id, payment_method=data.updated_item
-                        )
+                    record = self.temporal_expenditures_repository.update_data(
+                        record.id,
+                        payment_method=uc.PaymentMethodEnum.value_of(data.updated_item),
                     )
                     return self.message_repository.get_reciept_confirm_message(record)
                 case uc.PostbackEventTypeEnum.DELETE_UNREGISTEED_EXPENDITURE:
@@ -0,0 +1,115 @@
+from src.app.adaptor import google_sheets_api_adaptor as target
+from src.app.config import clients
+
+
+class FakeWorksheet:
+    def __init__(self, calls: list):
+        self.calls = calls
+        self.fail = False
+
+    def append_rows(self, values: list[list], **kwargs):
+        self.calls.append("append_rows")
+        if self.fail:
+            raise RuntimeError("error")
+
+
+class FakeSpreadsheet:
+    def __init__(self, calls: list):
+        self.calls = calls
+        self.sheet = FakeWorksheet(calls)
+
+    def worksheet(self, name: str):
+        self.calls.append("worksheet")
+        return self.sheet
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.spreadsheet = FakeSpreadsheet(self.calls)
+
+    def open_by_key(self, key: str):
+        self.calls.append("open_by_key")
+        return self.spreadsheet
+
+
+def setup_function():
+    target.invalidate_worksheets()
+
+
+def teardown_function():
+    clients.reset_clients()
+
+
+def test_append_data_reuses_worksheet():
+    client = FakeClient()
+    clients._registry["get_gspread_client"] = client
+
+    target.append_data_to_spreadsheet("id", "sheet", [["a"]])
+    target.append_data_to_spreadsheet("id", "sheet", [["b"]])
+
+    assert client.calls == ["open_by_key", "worksheet", "append_rows", "append_rows"]
+
+
+def test_append_data_reloads_worksheet_after_error():
+    client = FakeClient()
+    clients._registry["get_gspread_client"] = client
+    target.append_data_to_spreadsheet("id", "sheet", [["a"]])
+    client.spreadsheet.sheet.fail = True
+    try:
+        target.append_data_to_spreadsheet("id", "sheet", [["b"]])
+    except RuntimeError:
+        pass
+    client.spreadsheet.sheet.fail = False
+    client.calls.clear()
+
+    target.append_data_to_spreadsheet("id", "sheet", [["c"]])
+
+    assert client.calls == ["open_by_key", "worksheet", "append_rows"]
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": "error"}}
+
+
+def test_get_retry_delay():
+    from gspread.exceptions import APIError
+
+    assert target.get_retry_delay(APIError(FakeResponse(400)), 0) is None
+    assert target.get_retry_delay(RuntimeError("error"), 0) is None
+    assert (
+        target.get_retry_delay(APIError(FakeResponse(429, {"Retry-After": "7"})), 0)
+        == 7
+    )
+    assert 2 <= target.get_retry_delay(APIError(FakeResponse(503)), 1) < 3
+    assert (
+        target.get_retry_delay(APIError(FakeResponse(429)), 10)
+        == target.MAX_RETRY_SECONDS
+    )
+
+
+def test_append_data_with_backoff_retries_rate_limit(monkeypatch):
+    from gspread.exceptions import APIError
+
+    client = FakeClient()
+    clients._registry["get_gspread_client"] = client
+    errors = [APIError(FakeResponse(429)), APIError(FakeResponse(429))]
+
+    def append_rows(values, **kwargs):
+        client.calls.append("append_rows")
+        if errors:
+            raise errors.pop(0)
+
+    client.spreadsheet.sheet.append_rows = append_rows
+    monkeypatch.setattr(target.time, "sleep", lambda seconds: None)
+
+    target.append_data_with_backoff("id", "sheet", [["a"]])
+
+    # 一時的なエラーではシートを取得し直さない
+    assert client.calls == ["open_by_key", "worksheet"] + ["append_rows"] * 3
@@ -0,0 +1,101 @@
+import io
+import pytest
+from src.app.adaptor import image_processing as target
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def create_image(width: int, height: int, orientation: int = 1) -> bytes:
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "camera"
+    exif[0x0112] = orientation
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=95, exif=exif)
+    return output.getvalue()
+
+
+def test_preprocess_image_resizes_and_strips_metadata():
+    data = create_image(1200, 1600, orientation=6)
+    result = target.preprocess_image(data, max_side=800, quality=80)
+
+    assert result.processed
+    assert result.processed_bytes < result.original_bytes
+    image = Image.open(io.BytesIO(result.data))
+    assert image.mode == "L"
+    # 向きを反映したうえで縮小される
+    assert image.size == (800, 600)
+    assert len(image.getexif()) == 0
+
+
+def test_preprocess_image_returns_original_when_not_image():
+    result = target.preprocess_image(b"not an image")
+    assert not result.processed
+    assert result.data == b"not an image"
+
+
+def test_preprocess_image_can_be_disabled(monkeypatch):
+    monkeypatch.setenv(target.IMAGE_PREPROCESS_ENABLED_ENV, "false")
+    data = create_image(100, 100)
+    assert target.preprocess_image(data).data == data
+
+
+def create_receipt(width: int = 600, height: int = 800) -> "Image.Image":
+    from PIL import ImageDraw
+
+    image = Image.new("L", (width, height), 230)
+    draw = ImageDraw.Draw(image)
+    for y in range(20, height - 20, 24):
+        draw.text((20, y), "ITEM 001   SAMPLE   1,280 YEN", fill=20, font_size=18)
+    return image
+
+
+def to_jpeg(image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def test_check_image_quality_accepts_receipt():
+    pytest.importorskip("numpy")
+    assert target.check_image_quality(to_jpeg(create_receipt())).issue is None
+
+
+def test_check_image_quality_rejects_bad_images():
+    pytest.importorskip("numpy")
+    from PIL import ImageEnhance, ImageFilter
+
+    receipt = create_receipt()
+    cases = {
+        target.ImageQualityIssue.TOO_SMALL: receipt.resize((120, 160)),
+        target.ImageQualityIssue.INVALID_ASPECT_RATIO: receipt.resize((2000, 200)),
+        target.ImageQualityIssue.TOO_DARK: ImageEnhance.Brightness(receipt).enhance(
+            0.05
+        ),
+        target.ImageQualityIssue.BLURRY: receipt.filter(ImageFilter.GaussianBlur(6)),
+        target.ImageQualityIssue.NO_TEXT: Image.new("L", (600, 800), 180),
+    }
+    for issue, image in cases.items():
+        assert target.check_image_quality(to_jpeg(image)).issue == issue, issue
+
+
+def test_prepare_image_decodes_once(monkeypatch):
+    pytest.importorskip("numpy")
+    decoded_sizes = []
+    decode_grayscale = target.decode_grayscale
+
+    def decode(data, max_side):
+        decoded_sizes.append(max_side)
+        return decode_grayscale(data, max_side)
+
+    monkeypatch.setattr(target, "decode_grayscale", decode)
+
+    quality, image = target.prepare_image(to_jpeg(create_receipt(1500, 2000)))
+    assert quality.issue is None
+    assert (quality.width, quality.height) == (1500, 2000)
+    assert image.processed
+    assert decoded_sizes == [target.DEFAULT_IMAGE_MAX_SIDE]
+
+    quality, image = target.prepare_image(to_jpeg(Image.new("L", (600, 800), 180)))
+    assert quality.issue == target.ImageQualityIssue.NO_TEXT
+    assert not image.processed
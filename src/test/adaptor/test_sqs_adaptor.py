@@ -0,0 +1,65 @@
+import threading
+from src.app.adaptor import sqs_adaptor as target
+
+
+class FakeSqsClient:
+    def __init__(
+        self, transient_failures: set[str] = None, sender_faults: set[str] = None
+    ):
+        self.transient_failures = set(transient_failures or [])
+        self.sender_faults = set(sender_faults or [])
+        self.batches: list[list[dict]] = []
+        self.lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict]):
+        with self.lock:
+            self.batches.append(Entries)
+        successful, failed = [], []
+        for entry in Entries:
+            if entry["Id"] in self.sender_faults:
+                failed.append(
+                    {"Id": entry["Id"], "Code": "Invalid", "SenderFault": True}
+                )
+            elif entry["Id"] in self.transient_failures:
+                self.transient_failures.discard(entry["Id"])
+                failed.append(
+                    {"Id": entry["Id"], "Code": "Internal", "SenderFault": False}
+                )
+            else:
+                successful.append({"Id": entry["Id"], "MessageId": f"m{entry['Id']}"})
+        return {"Successful": successful, "Failed": failed}
+
+
+def test_send_messages_splits_into_valid_batches(monkeypatch):
+    client = FakeSqsClient()
+    monkeypatch.setattr(target, "get_sqs_client", lambda: client)
+    monkeypatch.setenv("SQS_QUEUE_URL", "queue")
+
+    results = target.send_messages_to_sqs([f"id{i}" for i in range(23)])
+
+    assert sorted(len(batch) for batch in client.batches) == [3, 10, 10]
+    assert [r.message_body for r in results] == [f"id{i}" for i in range(23)]
+    assert all(r.succeeded for r in results)
+
+
+def test_split_into_batches_by_size():
+    body = "a" * (100 * 1024)
+    results = [target.SendMessageResult(id=str(i), message_body=body) for i in range(5)]
+    assert [len(b) for b in target.split_into_batches(results)] == [2, 2, 1]
+
+
+def test_send_messages_retries_only_failed_entries(monkeypatch):
+    client = FakeSqsClient(transient_failures={"1"}, sender_faults={"2"})
+    monkeypatch.setattr(target, "get_sqs_client", lambda: client)
+    monkeypatch.setattr(target, "RETRY_BASE_SECONDS", 0)
+    monkeypatch.setenv("SQS_QUEUE_URL", "queue")
+
+    results = target.send_messages_to_sqs(["a", "b", "c"])
+
+    assert [[e["Id"] for e in batch] for batch in client.batches] == [
+        ["0", "1", "2"],
+        ["1"],
+    ]
+    assert [r.succeeded for r in results] == [True, True, False]
+    assert results[1].attempts == 2
+    assert results[2].error_code == "Invalid"
@@ -0,0 +1,27 @@
+import threading
+from src.app.config import clients as target
+
+
+def test_line_api_client_is_shared(monkeypatch):
+    monkeypatch.setenv("CHANNEL_ACCESS_TOKEN", "dummy")
+    target.reset_clients()
+    api_client = target.get_line_api_client()
+    assert target.get_line_api_client() is api_client
+    assert (
+        api_client.configuration.connection_pool_maxsize
+        == target.LINE_CONNECTION_POOL_MAXSIZE
+    )
+    target.close_line_api_client(api_client)
+    target.reset_clients()
+
+
+def test_dynamodb_is_created_per_thread():
+    target.reset_clients()
+    main = target.get_dynamodb()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(target.get_dynamodb()))
+    thread.start()
+    thread.join()
+    assert target.get_dynamodb() is main
+    assert other[0] is not main
+    target.reset_clients()
@@ -0,0 +1,83 @@
+import logging
+from src.app.config.logger import (
+    CustomFormatter,
+    LogContext,
+    SamplingFilter,
+    _parse_sampling_rates,
+    payload,
+)
+from src.app.model.common_model import LogExtraInfo, LogMessage
+from datetime import datetime
+
+target = CustomFormatter()
+
+
+def create_record(message: str, *args) -> logging.LogRecord:
+    return logging.LogRecord(
+        "test", logging.INFO, "/path/to/file.py", 10, message, args, None, "func"
+    )
+
+
+def test_format_is_compatible_with_log_message():
+    token = LogContext.context.set(LogExtraInfo(line_user_id="user_id"))
+    try:
+        record = create_record("メッセージ %s", "引数")
+        expected = LogMessage(
+            timestamp=datetime.fromtimestamp(record.created).isoformat(),
+            level="INFO",
+            message="メッセージ 引数",
+            file="file.py",
+            line=10,
+            function="func",
+            extra_info=LogContext.context.get(),
+        ).model_dump_json(exclude_none=True)
+        assert target.format(record) == expected
+    finally:
+        LogContext.context.reset(token)
+
+
+def test_format_without_context():
+    token = LogContext.context.set(LogExtraInfo())
+    try:
+        assert target.format(create_record("test")).endswith('"extra_info":{}}')
+    finally:
+        LogContext.context.reset(token)
+
+
+def test_format_truncates_long_message():
+    formatter = CustomFormatter()
+    formatter.max_message_length = 10
+    token = LogContext.context.set(LogExtraInfo())
+    try:
+        formatted = formatter.format(create_record("a" * 25))
+        assert '"message":"aaaaaaaaaa...(truncated 15 chars)"' in formatted
+    finally:
+        LogContext.context.reset(token)
+
+
+def test_payload_limits_size_of_large_objects():
+    item = {"items": [{"name": f"item{i}", "price": i} for i in range(1000)]}
+    text = str(payload(item))
+    assert len(text) < 2000
+    assert "..." in text
+
+
+def test_payload_formats_pydantic_model_fields():
+    text = str(payload(LogExtraInfo(line_user_id="user_id")))
+    assert text.startswith("LogExtraInfo(")
+    assert "'line_user_id': 'user_id'" in text
+
+
+def test_sampling_filter_keeps_warnings():
+    sampling_filter = SamplingFilter(rate=0.0)
+    warning = logging.LogRecord(
+        "test", logging.WARNING, "/path/to/file.py", 10, "warn", None, None
+    )
+    assert sampling_filter.filter(create_record("info")) is False
+    assert sampling_filter.filter(warning) is True
+    assert SamplingFilter(rate=1.0).filter(create_record("info")) is True
+
+
+def test_parse_sampling_rates():
+    assert _parse_sampling_rates("a.b=0.5, c=1") == {"a.b": 0.5, "c": 1.0}
+    assert _parse_sampling_rates("") == {}
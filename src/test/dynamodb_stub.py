@@ -0,0 +1,38 @@
+class PagedTable:
+    """1ページあたりpage_lengthアイテムを返す、DynamoDBテーブルの代替"""
+
+    def __init__(self, items: list[dict], page_length: int):
+        self.items = items
+        self.page_length = page_length
+        self.requests = []
+
+    def scan(self, **kwargs):
+        self.requests.append(kwargs)
+        start = kwargs.get("ExclusiveStartKey", {}).get("index", 0)
+        length = min(self.page_length, kwargs.get("Limit", self.page_length))
+        response = {"Items": self.items[start : start + length]}
+        if start + length < len(self.items):
+            response["LastEvaluatedKey"] = {"index": start + length}
+        return response
+
+    query = scan
+
+    def get_item(self, Key: dict):
+        self.requests.append({"Key": Key})
+        for item in self.items:
+            if all(item.get(k) == v for k, v in Key.items()):
+                return {"Item": item}
+        return {}
+
+    def put_item(self, Item: dict):
+        self.requests.append({"Item": Item})
+        self.items.append(Item)
+        return {}
+
+
+class PagedDynamoDB:
+    def __init__(self, table: PagedTable):
+        self.table = table
+
+    def Table(self, name: str):
+        return self.table
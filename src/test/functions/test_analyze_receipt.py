@@ -0,0 +1,78 @@
+import threading
+import time
+from src.app.config.logger import LogContext
+from src.app.functions import analyze_receipt as target
+
+
+class FakeUsecase:
+    def __init__(self):
+        self.contexts = {}
+        self.lock = threading.Lock()
+
+    def execute(self, id: str) -> bool:
+        LogContext.set(temporal_expenditure_id=id)
+        time.sleep(0.05)
+        with self.lock:
+            self.contexts[id] = LogContext.context.get().temporal_expenditure_id
+        if id == "error":
+            raise RuntimeError("error")
+        return id != "failed"
+
+
+def create_records(ids: list[str]) -> list[dict]:
+    return [{"messageId": id, "receiptHandle": id, "body": id} for id in ids]
+
+
+def test_process_records_isolates_errors(monkeypatch):
+    usecase = FakeUsecase()
+    monkeypatch.setattr(target, "get_usecase", lambda: usecase)
+    monkeypatch.setenv(target.CONCURRENCY_ENV, "4")
+
+    results = target.process_records(create_records(["a", "error", "failed", "b"]))
+
+    assert results == [True, False, False, True]
+    # 各レコードのログコンテキストが他のレコードと混ざらない
+    assert usecase.contexts == {id: id for id in ["a", "error", "failed", "b"]}
+    assert LogContext.context.get().temporal_expenditure_id is None
+
+
+class BarrierUsecase:
+    """4件の処理が同時に実行されない限り、待機がタイムアウトして失敗するユースケース"""
+
+    def __init__(self):
+        self.barrier = threading.Barrier(4, timeout=5)
+
+    def execute(self, id: str) -> bool:
+        self.barrier.wait()
+        return True
+
+
+def test_process_records_runs_concurrently(monkeypatch):
+    usecase = BarrierUsecase()
+    monkeypatch.setattr(target, "get_usecase", lambda: usecase)
+    monkeypatch.setenv(target.CONCURRENCY_ENV, "4")
+
+    results = target.process_records(create_records(["a", "b", "c", "d"]))
+    assert results == [True, True, True, True]
+
+
+def test_process_records_sequentially(monkeypatch):
+    usecase = FakeUsecase()
+    monkeypatch.setattr(target, "get_usecase", lambda: usecase)
+    monkeypatch.setenv(target.CONCURRENCY_ENV, "1")
+
+    assert target.process_records(create_records(["a", "b"])) == [True, True]
+    assert LogContext.context.get().temporal_expenditure_id is None
+
+
+def test_lambda_handler_reports_failed_records(monkeypatch):
+    usecase = FakeUsecase()
+    monkeypatch.setattr(target, "get_usecase", lambda: usecase)
+
+    result = target.lambda_handler(
+        {"Records": create_records(["a", "failed", "error"])}, None
+    )
+
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": "failed"}, {"itemIdentifier": "error"}]
+    }
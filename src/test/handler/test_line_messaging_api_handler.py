@@ -1,3 +1,4 @@
+import time
 import json
 from linebot.models.events import MessageEvent
 from src.app.handler import line_messaging_api_handler as target
@@ -10,3 +11,53 @@ def test_handle_text_message():
 
     event = MessageEvent()
     target.handle_text_message(event)
+
+
+def test_loading_animation_is_skipped_for_fast_usecase(monkeypatch):
+    shown = []
+    monkeypatch.setattr(target, "show_loading_animation", shown.append)
+    monkeypatch.setenv(target.LOADING_ANIMATION_DELAY_ENV, "0.2")
+
+    with target.LoadingAnimation("U1") as loading:
+        pass
+    assert loading.wait() is False
+    assert shown == []
+
+
+def test_loading_animation_is_shown_for_slow_usecase(monkeypatch):
+    shown = []
+    monkeypatch.setattr(target, "show_loading_animation", shown.append)
+    monkeypatch.setenv(target.LOADING_ANIMATION_DELAY_ENV, "0.01")
+
+    with target.LoadingAnimation("U1") as loading:
+        time.sleep(0.1)
+    assert loading.wait() is True
+    assert shown == ["U1"]
+
+
+def test_loading_animation_error_is_ignored(monkeypatch):
+    def fail(user_id: str):
+        raise RuntimeError("error")
+
+    monkeypatch.setattr(target, "show_loading_animation", fail)
+    monkeypatch.setenv(target.LOADING_ANIMATION_DELAY_ENV, "0")
+
+    with target.LoadingAnimation("U1") as loading:
+        time.sleep(0.05)
+    assert loading.wait() is False
+
+
+def test_loading_animation_completes_before_exit(monkeypatch):
+    shown = []
+
+    def show(user_id: str):
+        time.sleep(0.1)
+        shown.append(user_id)
+
+    monkeypatch.setattr(target, "show_loading_animation", show)
+    monkeypatch.setenv(target.LOADING_ANIMATION_DELAY_ENV, "0")
+
+    with target.LoadingAnimation("U1"):
+        time.sleep(0.01)
+    # 応答より後にローディング表示が届かないよう、ブロックを抜ける時点で送信が完了している
+    assert shown == ["U1"]
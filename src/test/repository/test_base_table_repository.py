@@ -0,0 +1,199 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from src.app.model.db_model import User
+from src.app.model.usecase_model import AccountBookInput
+from src.test.dynamodb_stub import PagedDynamoDB, PagedTable
+from src.app.repository import base_table_repository
+from src.app.repository.base_table_repository import (
+    BaseTableRepository,
+    build_projection_expression,
+    build_update_expression,
+    flatten_update_fields,
+)
+
+
+def create_target(num_items: int, page_length: int):
+    items = [{"line_user_id": str(i), "name": f"user{i}"} for i in range(num_items)]
+    table = PagedTable(items, page_length)
+    return BaseTableRepository(PagedDynamoDB(table), User), table
+
+
+def test_get_all_follows_last_evaluated_key():
+    target, table = create_target(num_items=5, page_length=2)
+    result = target.get_all()
+    assert [u.line_user_id for u in result] == ["0", "1", "2", "3", "4"]
+    assert len(table.requests) == 3
+
+
+def test_iter_scan_is_lazy():
+    target, table = create_target(num_items=5, page_length=2)
+    iterator = target.iter_scan()
+    assert len(table.requests) == 0
+    next(iterator)
+    next(iterator)
+    assert len(table.requests) == 1
+
+
+def test_iter_scan_with_limit_and_page_size():
+    target, table = create_target(num_items=10, page_length=10)
+    result = list(target.iter_scan(page_size=2, limit=3))
+    assert len(result) == 3
+    assert [r["Limit"] for r in table.requests] == [2, 1]
+
+
+def test_build_projection_expression():
+    expression, names = build_projection_expression(["status", "data.total"])
+    assert expression == "#status, #data.#total"
+    assert names == {"#status": "status", "#data": "data", "#total": "total"}
+
+
+def test_flatten_update_fields():
+    assert flatten_update_fields(
+        {"status": "ANALYZED", "data": {"payer": "a", "items": []}, "map": {}}
+    ) == {"status": "ANALYZED", "data.payer": "a", "data.items": [], "map": {}}
+    # モデルは値を設定したフィールドのみを対象とする
+    assert flatten_update_fields({"data": AccountBookInput(payer="a")}) == {
+        "data.payer": "a"
+    }
+
+
+def test_build_update_expression():
+    expression, names, values = build_update_expression(
+        ("data.payer", "data.date"), ("line_image_id",), ("count",)
+    )
+    assert expression == "SET #n0.#n1 = :v0, #n0.#n2 = :v1 REMOVE #n3 ADD #n4 :v2"
+    assert dict(names) == {
+        "#n0": "data",
+        "#n1": "payer",
+        "#n2": "date",
+        "#n3": "line_image_id",
+        "#n4": "count",
+    }
+    assert values == (":v0", ":v1", ":v2")
+    # 同じフィールドの組み合わせではキャッシュした更新式を使用する
+    assert build_update_expression(
+        ("data.payer", "data.date"), ("line_image_id",), ("count",)
+    ) == (expression, names, values)
+    assert build_update_expression.cache_info().hits > 0
+
+
+def test_update_fields_in_one_request():
+    class FakeTable:
+        def __init__(self):
+            self.requests = []
+
+        def update_item(self, **kwargs):
+            self.requests.append(kwargs)
+            return {"Attributes": {"line_user_id": "0", "name": "a"}}
+
+    class FakeDynamoDB:
+        def __init__(self):
+            self.table = FakeTable()
+
+        def Table(self, name: str):
+            return self.table
+
+    dynamodb = FakeDynamoDB()
+    target = BaseTableRepository(dynamodb, User)
+
+    target.update_fields("0", set_fields={"name": "a", "line_name": "b"})
+
+    assert dynamodb.table.requests == [
+        {
+            "Key": {"line_user_id": "0"},
+            "UpdateExpression": "SET #n0 = :v0, #n1 = :v1",
+            "ExpressionAttributeNames": {"#n0": "name", "#n1": "line_name"},
+            "ExpressionAttributeValues": {":v0": "a", ":v1": "b"},
+            "ReturnValues": "ALL_NEW",
+        }
+    ]
+
+
+class FakeBatchClient:
+    """処理しきれないキーやアイテムを未処理として返すクライアント"""
+
+    def __init__(self, items: dict[str, dict]):
+        self.items = items
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def batch_get_item(self, RequestItems: dict):
+        with self.lock:
+            self.requests.append(RequestItems)
+        keys = RequestItems["users"]["Keys"]
+        assert len(keys) <= 100
+        processed, unprocessed = keys[:60], keys[60:]
+        found = [
+            self.items[k["line_user_id"]]
+            for k in processed
+            if k["line_user_id"] in self.items
+        ]
+        response = {"Responses": {"users": found}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {
+                "users": {**RequestItems["users"], "Keys": unprocessed}
+            }
+        return response
+
+    def batch_write_item(self, RequestItems: dict):
+        with self.lock:
+            self.requests.append(RequestItems)
+        requests = RequestItems["users"]
+        assert len(requests) <= 25
+        processed, unprocessed = requests[:1], requests[1:]
+        for request in processed:
+            self.items.pop(request["DeleteRequest"]["Key"]["line_user_id"], None)
+        return {"UnprocessedItems": {"users": unprocessed} if unprocessed else {}}
+
+
+def create_batch_target(num_items: int):
+    items = {
+        str(i): {"line_user_id": str(i), "name": f"user{i}"} for i in range(num_items)
+    }
+    client = FakeBatchClient(items)
+    dynamodb = SimpleNamespace(
+        Table=lambda name: None, meta=SimpleNamespace(client=client)
+    )
+    return BaseTableRepository(dynamodb, User), client
+
+
+def test_batch_get_items_in_request_order(monkeypatch):
+    monkeypatch.setattr(base_table_repository, "BATCH_RETRY_BASE_SECONDS", 0)
+    target, client = create_batch_target(num_items=300)
+    ids = [str(i) for i in reversed(range(250))] + ["missing", "0"]
+
+    result = target.batch_get_items(ids)
+
+    assert [u.line_user_id if u else None for u in result] == ids[:-2] + [None, "0"]
+    # 3チャンクに分割され、未処理のキーはチャンクごとに再取得される
+    assert len(client.requests) > 3
+
+
+def test_batch_get_items_with_projection(monkeypatch):
+    monkeypatch.setattr(base_table_repository, "BATCH_RETRY_BASE_SECONDS", 0)
+    target, client = create_batch_target(num_items=3)
+
+    target.batch_get_items(["0", "1"], projection=["name"])
+
+    request = client.requests[0]["users"]
+    assert request["ProjectionExpression"] == "#line_user_id, #name"
+
+
+def test_batch_delete_items_retries_unprocessed_items(monkeypatch):
+    monkeypatch.setattr(base_table_repository, "BATCH_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(base_table_repository, "MAX_BATCH_ATTEMPTS", 30)
+    target, client = create_batch_target(num_items=60)
+
+    target.batch_delete_items([str(i) for i in range(50)] + ["0"])
+
+    assert sorted(client.items, key=int) == [str(i) for i in range(50, 60)]
+
+
+def test_batch_delete_items_raises_when_items_remain(monkeypatch):
+    monkeypatch.setattr(base_table_repository, "BATCH_RETRY_BASE_SECONDS", 0)
+    target, _ = create_batch_target(num_items=10)
+
+    with pytest.raises(RuntimeError):
+        target.batch_delete_items([str(i) for i in range(10)])
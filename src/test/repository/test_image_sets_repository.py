@@ -0,0 +1,124 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from src.app.model.db_model import ImageSet, TemporalExpenditure
+from src.app.repository.image_sets_repository import ImageSetsRepository
+
+
+class FakeTable:
+    def __init__(self, item: dict):
+        self.item = item
+        self.requests = []
+
+    def update_item(self, **kwargs):
+        self.requests.append(kwargs)
+        names = kwargs["ExpressionAttributeNames"]
+        values = kwargs["ExpressionAttributeValues"]
+        line_image_id = names["#line_image_id"]
+        if line_image_id in self.item["image_statuses"]:
+            raise ClientError(
+                {"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem"
+            )
+        self.item["image_statuses"][line_image_id] = values[":status"]
+        self.item["analyzed_count"] += values[":analyzed"]
+        self.item["failed_count"] += values[":failed"]
+        return {"Attributes": self.item}
+
+
+class FakeDynamoDB:
+    def __init__(self, table: FakeTable):
+        self.table = table
+
+    def Table(self, name: str):
+        return self.table
+
+
+def create_target() -> tuple[ImageSetsRepository, FakeTable]:
+    image_set = ImageSet(image_set_id="set", total=2, line_image_ids=["a", "b"])
+    table = FakeTable(image_set.model_dump())
+    return ImageSetsRepository(FakeDynamoDB(table)), table
+
+
+def test_update_image_meta_data_status_in_one_request():
+    target, table = create_target()
+
+    image_set = target.update_image_meta_data_status(
+        "set", "a", TemporalExpenditure.Status.ANALYZED
+    )
+    assert image_set.get_overall_status() == TemporalExpenditure.Status.ANALYZING
+
+    image_set = target.update_image_meta_data_status(
+        "set", "b", TemporalExpenditure.Status.INVALID_IMAGE
+    )
+    assert image_set.image_statuses == {
+        "a": TemporalExpenditure.Status.ANALYZED,
+        "b": TemporalExpenditure.Status.INVALID_IMAGE,
+    }
+    assert (image_set.analyzed_count, image_set.failed_count) == (1, 1)
+    assert image_set.get_overall_status() == TemporalExpenditure.Status.INVALID_IMAGE
+    assert len(table.requests) == 2
+    assert "attribute_not_exists" in table.requests[0]["ConditionExpression"]
+
+
+def test_update_image_meta_data_status_ignores_redelivery():
+    target, table = create_target()
+    target.update_image_meta_data_status(
+        "set", "a", TemporalExpenditure.Status.ANALYZED
+    )
+
+    # 同じ画像の結果は二重に数えない
+    assert (
+        target.update_image_meta_data_status(
+            "set", "a", TemporalExpenditure.Status.ANALYZED
+        )
+        is None
+    )
+    assert table.item["analyzed_count"] == 1
+
+
+def test_get_overall_status():
+    image_set = ImageSet(total=2, analyzed_count=2)
+    assert image_set.get_overall_status() == TemporalExpenditure.Status.ANALYZED
+
+
+class FakeAddImageTable:
+    def __init__(self):
+        self.item = None
+        self.lock = threading.Lock()
+
+    def update_item(self, **kwargs):
+        values = kwargs["ExpressionAttributeValues"]
+        # DynamoDBと同様に、1アイテムへの条件チェックと更新は不可分に行う
+        with self.lock:
+            item = self.item or {"image_set_id": kwargs["Key"]["image_set_id"]}
+            line_image_ids = item.get("line_image_ids", values[":empty_list"])
+            if values[":line_image_id"] in line_image_ids:
+                raise ClientError(
+                    {"Error": {"Code": "ConditionalCheckFailedException"}},
+                    "UpdateItem",
+                )
+            item["total"] = values[":total"]
+            item["line_image_ids"] = line_image_ids + values[":line_image_ids"]
+            item.setdefault("image_statuses", values[":empty_map"])
+            self.item = item
+            return {"Attributes": copy.deepcopy(item)}
+
+
+def test_add_image_completes_set_only_once():
+    table = FakeAddImageTable()
+    target = ImageSetsRepository(FakeDynamoDB(table))
+    ids = [f"image{i}" for i in range(5)]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        image_sets = list(
+            executor.map(lambda id: target.add_image("set", len(ids), id), ids)
+        )
+
+    completed = [s for s in image_sets if len(s.line_image_ids) == s.total]
+    assert len(completed) == 1
+    assert sorted(completed[0].line_image_ids) == ids
+    # Webhookの再送では追加しない
+    assert target.add_image("set", len(ids), "image0") is None
@@ -0,0 +1,35 @@
+from src.app.repository.item_classifications_repository import (
+    ItemClassificationsRepository,
+)
+from src.test.dynamodb_stub import PagedDynamoDB, PagedTable
+
+table = PagedTable(
+    [
+        {"minor": "食費", "major": "生活費", "color": "#000000"},
+        {"minor": "日用品", "major": "生活費", "color": "#000000"},
+        {"minor": "外食費", "major": "娯楽", "color": "#ffffff"},
+    ],
+    page_length=2,
+)
+target = ItemClassificationsRepository(PagedDynamoDB(table))
+
+
+def test_classifications_are_cached():
+    target.invalidate_cache()
+    table.requests.clear()
+
+    classifications = target.get_all_major_to_minors_map()
+    assert [c.minor for c in classifications["生活費"]] == ["食費", "日用品"]
+    num_requests = len(table.requests)
+
+    assert target.get_major("外食費") == "娯楽"
+    target.get_all_major_to_minors_map()
+    assert len(table.requests) == num_requests
+
+
+def test_invalidate_cache():
+    target.get_all_major_to_minors_map()
+    table.requests.clear()
+    target.invalidate_cache()
+    target.get_all_major_to_minors_map()
+    assert len(table.requests) > 0
@@ -1,5 +1,8 @@
+import json
+
 from linebot.v3.messaging.models.message import Message
-from src.app.model.db_model import TemporalExpenditure
+from src.app.model.db_model import TemporalExpenditure, TemporalExpenditureSummary
+from src.app.model.usecase_model import ReceiptResult
 from src.app.repository.messages_repository import MessagesRepository
 
 target = MessagesRepository()
@@ -17,6 +20,15 @@ def test_get_reciept_analysis_message():
     assert len(result) > 0
 
 
+def test_get_reciept_analysis_message_with_rejected_reason():
+    message_dicts: list[dict] = target.get_reciept_analysis_message(
+        "id", TemporalExpenditure.Status.INVALID_IMAGE, rejected_reason="画像が暗すぎる"
+    )
+    assert message_dicts[0]["text"].startswith("画像が暗すぎるため")
+    assert "quickReply" in message_dicts[-1]
+    [Message.from_dict(m) for m in message_dicts]
+
+
 def test_get_temporal_expenditure_list():
     records: list[TemporalExpenditure] = [
         TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED)
@@ -27,3 +39,46 @@ def test_get_temporal_expenditure_list():
     result = [Message.from_dict(m) for m in message_dicts]
     # print(result)
     assert len(result) > 0
+
+
+def test_get_message_returns_copy():
+    messages = target.get_follow_message("テスト")
+    assert messages[0]["text"] == "テストさんフォローありがとうございます！"
+    messages[0]["text"] = "changed"
+    assert MessagesRepository().get_follow_message("別")[0]["text"] == (
+        "別さんフォローありがとうございます！"
+    )
+
+
+def test_get_error_message():
+    messages = target.get_error_message(Exception("error detail"))
+    assert messages[2]["text"] == "エラー詳細:\n\nerror detail"
+    assert "{error}" in target.get_message("[unknown_error]")[2]["text"]
+
+
+def test_get_temporal_expenditure_list_with_register_all_button():
+    records: list[TemporalExpenditure] = [
+        TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED),
+        TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZING),
+        TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED),
+    ]
+    message_dicts: list[dict] = target.get_temporal_expenditure_list(records)
+    action = message_dicts[0]["quickReply"]["items"][0]["action"]
+    assert action["label"] == "解析済み2件を全て登録"
+    [Message.from_dict(m) for m in message_dicts]
+
+    # 解析済みが1件の場合は各レシートの登録ボタンを使用する
+    message_dicts = target.get_temporal_expenditure_list(records[:2])
+    assert "quickReply" not in message_dicts[0]
+
+
+def test_get_temporal_expenditure_list_from_summaries():
+    record = TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED)
+    record.data.total = 300
+    record.data.items = [ReceiptResult.Item(price=100)]
+    summaries = [TemporalExpenditureSummary.model_validate(record.model_dump())]
+
+    message_dicts: list[dict] = target.get_temporal_expenditure_list(summaries)
+
+    assert "各項目の和: 100円" in json.dumps(message_dicts, ensure_ascii=False)
+    [Message.from_dict(m) for m in message_dicts]
@@ -0,0 +1,35 @@
+from src.app.model.usecase_model import ReceiptResult
+from src.app.repository.receipt_analysis_results_repository import (
+    ReceiptAnalysisResultsRepository,
+    hash_image,
+)
+from src.test.dynamodb_stub import PagedDynamoDB, PagedTable
+
+table = PagedTable([], page_length=10)
+target = ReceiptAnalysisResultsRepository(PagedDynamoDB(table))
+
+
+def setup_function():
+    ReceiptAnalysisResultsRepository.cache.invalidate()
+    table.items.clear()
+
+
+def test_put_and_get_results():
+    image_hash = hash_image(b"image")
+    results = [ReceiptResult(total=100, store="store")]
+    target.put_results(image_hash, results)
+
+    cached = target.get_results(image_hash)
+    assert cached.results == results
+    # 返された結果を変更してもキャッシュは変わらない
+    cached.results[0].total = 0
+    assert target.get_results(image_hash).results[0].total == 100
+
+
+def test_get_results_from_dynamodb_when_not_in_local_cache():
+    image_hash = hash_image(b"image")
+    target.put_results(image_hash, None)
+    ReceiptAnalysisResultsRepository.cache.invalidate()
+
+    assert target.get_results(image_hash).results == []
+    assert target.get_results(hash_image(b"other")) is None
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from src.app.repository.sheets_write_records_repository import (
+    SheetsWriteRecordsRepository,
+)
+
+
+class FakeDynamoDB:
+    def __init__(self, keys: set[str]):
+        self.keys = keys
+        self.requests = []
+        self.meta = SimpleNamespace(client=self)
+
+    def Table(self, name: str):
+        return None
+
+    def batch_get_item(self, RequestItems: dict):
+        self.requests.append(RequestItems)
+        request = RequestItems["sheets_write_records"]
+        keys = [key["idempotency_key"] for key in request["Keys"]]
+        # 1回目は最後のキーを未処理として返す
+        unprocessed = keys[-1:] if len(self.requests) == 1 else []
+        return {
+            "Responses": {
+                "sheets_write_records": [
+                    {"idempotency_key": key}
+                    for key in keys
+                    if key in self.keys and key not in unprocessed
+                ]
+            },
+            "UnprocessedKeys": {
+                "sheets_write_records": {
+                    **request,
+                    "Keys": [{"idempotency_key": key} for key in unprocessed],
+                }
+            }
+            if unprocessed
+            else {},
+        }
+
+
+def test_get_written_keys_retries_unprocessed_keys():
+    dynamodb = FakeDynamoDB({"a", "c"})
+    target = SheetsWriteRecordsRepository(dynamodb)
+
+    assert target.get_written_keys(["a", "b", "c", "a"]) == {"a", "c"}
+    assert len(dynamodb.requests) == 2
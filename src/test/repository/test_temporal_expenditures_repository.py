@@ -1,5 +1,9 @@
+from types import SimpleNamespace
+
 import boto3
+import pytest
 from src.app.model.db_model import TemporalExpenditure
+from src.app.model.usecase_model import ReceiptResult
 from src.app.repository.temporal_expenditures_repository import (
     TemporalExpendituresRepository,
 )
@@ -18,3 +22,91 @@ def test_get_all_by_line_user_id():
     assert len(result) > 0
 
     target.delete_item(test.id)
+
+
+class FakeSummaryTable:
+    def __init__(self, items: list[dict]):
+        self.items = items
+        self.requests = []
+
+    def query(self, **kwargs):
+        self.requests.append(kwargs)
+        return {
+            "Items": [
+                {
+                    "id": item["id"],
+                    "status": item["status"],
+                    "created_at": item["created_at"],
+                    "data": {k: v for k, v in item["data"].items() if k != "items"},
+                }
+                for item in self.items
+            ]
+        }
+
+
+class FakeSummaryClient:
+    def __init__(self, items: list[dict]):
+        self.items = {item["id"]: item for item in items}
+        self.requests = []
+
+    def batch_get_item(self, RequestItems: dict):
+        self.requests.append(RequestItems)
+        keys = RequestItems["temporal_expenditures"]["Keys"]
+        return {
+            "Responses": {
+                "temporal_expenditures": [self.items[key["id"]] for key in keys]
+            }
+        }
+
+
+def create_summary_target(items: list[dict]):
+    table = FakeSummaryTable(items)
+    client = FakeSummaryClient(items)
+    dynamodb = SimpleNamespace(
+        Table=lambda name: table, meta=SimpleNamespace(client=client)
+    )
+    return TemporalExpendituresRepository(dynamodb), table, client
+
+
+def test_get_summaries_by_line_user_id_projects_summary_attributes():
+    record = TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED)
+    record.data.total = 300
+    record.data.items = [ReceiptResult.Item(price=100), ReceiptResult.Item(price=150)]
+    target, table, client = create_summary_target([record.model_dump()])
+
+    summaries = target.get_summaries_by_line_user_id("test")
+
+    request = table.requests[0]
+    assert "#items" not in request["ExpressionAttributeNames"]
+    assert "#data.#item_count" in request["ProjectionExpression"]
+    assert summaries[0].id == record.id
+    assert summaries[0].data.get_note() == record.data.get_note()
+    assert client.requests == []
+
+
+def test_get_summaries_by_line_user_id_reads_legacy_records():
+    legacy = TemporalExpenditure(status=TemporalExpenditure.Status.ANALYZED)
+    legacy.data.total = 100
+    legacy.data.items = [ReceiptResult.Item(price=100)]
+    item = legacy.model_dump()
+    del item["data"]["item_count"], item["data"]["item_price_sum"]
+    new = TemporalExpenditure(status=TemporalExpenditure.Status.NEW).model_dump()
+    target, _, client = create_summary_target([item, new])
+
+    summaries = target.get_summaries_by_line_user_id("test")
+
+    # 集計を持たない解析済みのレコードのみ、全ての属性を取得する
+    assert client.requests[0]["temporal_expenditures"]["Keys"] == [{"id": legacy.id}]
+    assert (summaries[0].data.item_count, summaries[0].data.item_price_sum) == (1, 100)
+    assert summaries[1].id == new["id"]
+
+
+def test_update_data_without_fields_raises():
+    table = SimpleNamespace(update_item=lambda **kwargs: pytest.fail("updated"))
+    repository = TemporalExpendituresRepository(
+        SimpleNamespace(Table=lambda name: table)
+    )
+
+    # 支出データ全体を空のマップで上書きしない
+    with pytest.raises(ValueError):
+        repository.update_data("id")
@@ -0,0 +1,36 @@
+from src.app.model.db_model import User
+from src.app.repository.users_reposioty import UsersRepository
+from src.test.dynamodb_stub import PagedDynamoDB, PagedTable
+
+table = PagedTable(
+    [
+        {"line_user_id": "U1", "line_name": "line1", "name": "name1"},
+        {"line_user_id": "U2", "line_name": "line2", "name": "name2"},
+    ],
+    page_length=10,
+)
+table.put_item = lambda Item: table.requests.append({"Item": Item})
+target = UsersRepository(PagedDynamoDB(table))
+
+
+def test_get_all_is_cached():
+    target.invalidate_cache()
+    table.requests.clear()
+    assert [u.name for u in target.get_all()] == ["name1", "name2"]
+    target.get_all()
+    target.get_item("U1")
+    assert len(table.requests) == 1
+
+
+def test_put_item_updates_cache():
+    target.invalidate_cache()
+    target.get_all()
+    user: User = target.get_item("U2")
+    user.name = "updated"
+    assert target.get_item("U2").name == "name2"
+
+    target.put_item(User(line_user_id="U3", name="name3").model_dump())
+    table.requests.clear()
+    assert [u.name for u in target.get_all()] == ["name1", "name2", "name3"]
+    assert target.get_item("U3").name == "name3"
+    assert len(table.requests) == 0
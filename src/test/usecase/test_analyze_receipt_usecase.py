@@ -0,0 +1,110 @@
+from src.app.model.db_model import ImageSet, TemporalExpenditure
+from src.app.model.usecase_model import ReceiptResult
+from src.app.usecase import analyze_receipt_usecase as target
+
+
+class FakeTemporalExpendituresRepository:
+    def __init__(self, record: TemporalExpenditure):
+        self.records = {record.id: record}
+
+    def get_item(self, id: str):
+        return self.records.get(id)
+
+    def update_analysis_success(self, id: str, result: ReceiptResult):
+        record = self.records[id].model_copy(deep=True)
+        record.status = TemporalExpenditure.Status.ANALYZED
+        record.data.total = result.total
+        self.records[id] = record
+        return record
+
+    def batch_write_items(self, items: list[dict]):
+        for item in items:
+            self.records[item["id"]] = TemporalExpenditure(**item)
+
+
+class FakeImageSetsRepository:
+    def __init__(self, image_set: ImageSet):
+        self.image_sets = {image_set.image_set_id: image_set}
+
+    def update_image_meta_data_status(self, image_set_id, line_image_id, status):
+        image_set = self.image_sets.get(image_set_id)
+        if image_set is None or line_image_id in image_set.image_statuses:
+            return None
+        image_set.image_statuses[line_image_id] = status
+        image_set.analyzed_count += 1
+        return image_set
+
+    def get_item(self, image_set_id: str):
+        return self.image_sets.get(image_set_id)
+
+    def delete_item(self, image_set_id: str):
+        self.image_sets.pop(image_set_id, None)
+
+
+def create_usecase(monkeypatch, record: TemporalExpenditure, results: list):
+    pushed = []
+    failures = []
+
+    def push(line_user_id, message):
+        if failures:
+            failures.pop()
+            raise RuntimeError("error")
+        pushed.append(line_user_id)
+
+    monkeypatch.setattr(target, "fetch_image", lambda line_image_id: b"image")
+    monkeypatch.setattr(target, "push_message", push)
+    monkeypatch.setattr(
+        target.AnalyzeReceiptUsecase,
+        "_AnalyzeReceiptUsecase__analyze_receipt",
+        lambda self, binary: (results, None),
+    )
+    usecase = target.AnalyzeReceiptUsecase()
+    usecase.temporal_expenditure_table_repository = FakeTemporalExpendituresRepository(
+        record
+    )
+    return usecase, pushed, failures
+
+
+def test_execute_retry_does_not_duplicate_split_receipts(monkeypatch):
+    record = TemporalExpenditure(line_user_id="user")
+    results = [ReceiptResult(total=100), ReceiptResult(total=200)]
+    usecase, pushed, failures = create_usecase(monkeypatch, record, results)
+    failures.append("push")
+
+    # 通知に失敗した場合は再実行され、分割したレシートは同じIDで上書きされる
+    assert usecase.execute(record.id) is False
+    assert usecase.execute(record.id) is True
+
+    records = usecase.temporal_expenditure_table_repository.records
+    assert len(records) == 2
+    assert records[TemporalExpenditure.get_split_id(record.id, 1)].data.total == 200
+    assert pushed == ["user"]
+
+
+def test_execute_retry_notifies_finished_image_set(monkeypatch):
+    record = TemporalExpenditure(
+        line_user_id="user", line_image_id="b", image_set_id="set"
+    )
+    image_set = ImageSet(
+        image_set_id="set",
+        total=2,
+        line_image_ids=["a", "b"],
+        image_statuses={"a": TemporalExpenditure.Status.ANALYZED},
+        analyzed_count=1,
+    )
+    usecase, pushed, failures = create_usecase(
+        monkeypatch, record, [ReceiptResult(total=100)]
+    )
+    usecase.image_sets_repository = FakeImageSetsRepository(image_set)
+    failures.append("push")
+
+    # 通知に失敗した場合は画像セットを残し、再実行で通知する
+    assert usecase.execute(record.id) is False
+    assert "set" in usecase.image_sets_repository.image_sets
+    assert usecase.execute(record.id) is True
+    assert pushed == ["user"]
+    assert usecase.image_sets_repository.image_sets == {}
+
+    # 通知済みの画像セットは再度通知しない
+    assert usecase.execute(record.id) is True
+    assert pushed == ["user"]
@@ -0,0 +1,81 @@
+from src.app.model.usecase_model import SheetsOutboxEntry
+from src.app.usecase import flush_sheets_outbox_usecase as target
+
+
+class FakeSheetsWriteRecordsRepository:
+    def __init__(self, written_keys: set[str]):
+        self.written_keys = set(written_keys)
+
+    def get_written_keys(self, idempotency_keys: list[str]) -> set[str]:
+        return self.written_keys & set(idempotency_keys)
+
+    def put_written_keys(self, idempotency_keys: list[str]):
+        self.written_keys.update(idempotency_keys)
+
+
+def create_record(message_id: str, key: str, sheet_name: str = "sheet") -> dict:
+    entry = SheetsOutboxEntry(
+        idempotency_key=key,
+        spreadsheet_id="id",
+        sheet_name=sheet_name,
+        rows=[[key, 100]],
+    )
+    return {"messageId": message_id, "body": entry.model_dump_json()}
+
+
+def create_usecase(monkeypatch, written_keys: set[str], fail_sheets: set[str] = ()):
+    calls = []
+
+    def append(spreadsheet_id, sheet_name, rows, deadline=None):
+        calls.append((sheet_name, rows))
+        if sheet_name in fail_sheets:
+            raise RuntimeError("error")
+
+    monkeypatch.setattr(target, "append_data_with_backoff", append)
+    usecase = target.FlushSheetsOutboxUsecase()
+    usecase.sheets_write_records_repository = FakeSheetsWriteRecordsRepository(
+        written_keys
+    )
+    return usecase, calls
+
+
+def test_execute_appends_rows_per_sheet_in_one_call(monkeypatch):
+    usecase, calls = create_usecase(monkeypatch, set())
+
+    failed = usecase.execute(
+        [
+            create_record("m1", "a"),
+            create_record("m2", "b", sheet_name="other"),
+            create_record("m3", "c"),
+        ]
+    )
+
+    assert failed == []
+    assert calls == [("sheet", [["a", 100], ["c", 100]]), ("other", [["b", 100]])]
+    assert usecase.sheets_write_records_repository.written_keys == {"a", "b", "c"}
+
+
+def test_execute_skips_written_and_duplicated_keys(monkeypatch):
+    usecase, calls = create_usecase(monkeypatch, {"a"})
+
+    failed = usecase.execute(
+        [create_record("m1", "a"), create_record("m2", "b"), create_record("m3", "b")]
+    )
+
+    assert failed == []
+    assert calls == [("sheet", [["b", 100]])]
+
+
+def test_execute_reports_failed_messages(monkeypatch):
+    usecase, _ = create_usecase(monkeypatch, set(), fail_sheets={"other"})
+
+    failed = usecase.execute(
+        [
+            create_record("m1", "a"),
+            create_record("m2", "b", sheet_name="other"),
+            {"messageId": "m3", "body": "invalid"},
+        ]
+    )
+
+    assert failed == ["m3", "m2"]
+    assert usecase.sheets_write_records_repository.written_keys == {"a"}
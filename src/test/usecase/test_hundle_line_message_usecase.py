@@ -65,3 +65,58 @@ def test_handle_postback_event():
     reslut: list[Message] = usecase.handle_postback_event(postback)
     print(reslut)
     assert len(reslut) > 0
+
+
+def test_handle_postback_event_register_all_analyzed(monkeypatch):
+    from src.app.model import db_model as db
+    from src.app.usecase import hundle_line_message_usecase as target
+
+    records = [
+        db.TemporalExpenditure(
+            status=db.TemporalExpenditure.Status.ANALYZED,
+            data=uc.AccountBookInput(
+                total=300,
+                items=[
+                    uc.ReceiptResult.Item(name="a", price=100),
+                    uc.ReceiptResult.Item(name="b", price=200),
+                ],
+            ),
+        ),
+        db.TemporalExpenditure(
+            status=db.TemporalExpenditure.Status.ANALYZED,
+            data=uc.AccountBookInput(total=500),
+        ),
+    ]
+
+    class FakeTemporalExpendituresRepository:
+        deleted = []
+
+        def get_analyzed_by_line_user_id(self, line_user_id: str):
+            return records
+
+        def batch_delete_items(self, ids: list[str]):
+            self.deleted.extend(ids)
+
+    appended = []
+    monkeypatch.setenv("SPREADSHEET_ID", "id")
+    monkeypatch.setenv("EXPENDITURE_SHEET_NAME", "sheet")
+    monkeypatch.delenv(target.SHEETS_OUTBOX_QUEUE_URL_ENV, raising=False)
+    monkeypatch.setattr(
+        target,
+        "append_data_to_spreadsheet",
+        lambda spreadsheet_id, sheet_name, rows: appended.append(rows),
+    )
+    usecase = HundleLineMessageUsecase()
+    usecase.temporal_expenditures_repository = FakeTemporalExpendituresRepository()
+
+    data = uc.RegisterExpenditurePostback(
+        type=uc.PostbackEventTypeEnum.REGISTER_ALL_ANALYZED
+    )
+    postback = PostbackContent(data=data.model_dump_json())
+    reslut: list[Message] = usecase.handle_postback_event(postback, "user_id")
+
+    assert reslut[0].text == "解析済みのレシート2件を家計簿に登録しました"
+    # 品目ごとの2行と、品目のないレシートの合計の1行を1回で書き込む
+    assert len(appended) == 1
+    assert [row[3] for row in appended[0]] == [100, 200, 500]
+    assert FakeTemporalExpendituresRepository.deleted == [r.id for r in records]
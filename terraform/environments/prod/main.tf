@@ -40,7 +40,7 @@ module "sqs" {
 module "iam" {
   source        = "../../modules/aws/iam"
   env           = local.env
-  sqs_arn       = module.sqs.analyse_receipt_queue.arn
+  sqs_arns      = [module.sqs.analyse_receipt_queue.arn, module.sqs.sheets_outbox_queue.arn]
   dynamodb_arns = module.dynamodb.dynamodb_arns
 }
 
@@ -52,6 +52,7 @@ module "cloudwatch" {
 module "lambda" {
   source                    = "../../modules/aws/lambda"
   analyse_receipt_queue     = module.sqs.analyse_receipt_queue
+  sheets_outbox_queue       = module.sqs.sheets_outbox_queue
   iam_role_arn              = module.iam.role_arn
   cloudwatch_log_group_name = module.cloudwatch.cloudwatch_log_group_name
   env_variables = {
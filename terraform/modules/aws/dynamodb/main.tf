@@ -21,6 +21,18 @@ resource "aws_dynamodb_table" "dynamodb_tables" {
     }
   }
 
+  dynamic "global_secondary_index" {
+    for_each = lookup(each.value, "global_secondary_indexes", [])
+    content {
+      name            = global_secondary_index.value.name
+      hash_key        = global_secondary_index.value.hash_key
+      range_key       = lookup(global_secondary_index.value, "range_key", null)
+      projection_type = global_secondary_index.value.projection_type
+      read_capacity   = 5
+      write_capacity  = 5
+    }
+  }
+
   server_side_encryption {
     enabled = true
   }
@@ -41,3 +53,18 @@ module "table_items" {
   items      = each.value.items
   depends_on = [aws_dynamodb_table.dynamodb_tables]
 }
+
+# line_user_id_index の追加前に作成され、created_at を持たない仮支出データにも作成日時を設定する
+# https://developer.hashicorp.com/terraform/language/resources/terraform-data
+resource "terraform_data" "backfill_temporal_expenditures_created_at" {
+  triggers_replace = [
+    aws_dynamodb_table.dynamodb_tables["temporal_expenditures"].arn,
+    filebase64("../../scripts/backfill_created_at.py"),
+  ]
+
+  provisioner "local-exec" {
+    command = "python ../../scripts/backfill_created_at.py ${aws_dynamodb_table.dynamodb_tables["temporal_expenditures"].name}"
+
+    on_failure = fail
+  }
+}
@@ -17,7 +17,12 @@ data "aws_iam_policy_document" "lambda_assume_role_policy" {
 data "aws_iam_policy_document" "lambda_permissions_policy" {
   version = "2012-10-17"
   statement {
-    resources = concat(var.dynamodb_arns, [var.sqs_arn])
+    resources = concat(
+      var.dynamodb_arns,
+      # グローバルセカンダリインデックスへのQuery用
+      [for arn in var.dynamodb_arns : "${arn}/index/*"],
+      var.sqs_arns,
+    )
     actions = [
       # SQS
       "sqs:DeleteMessage",
@@ -26,6 +31,7 @@ data "aws_iam_policy_document" "lambda_permissions_policy" {
       "sqs:GetQueueAttributes",
 
       # dynamodb 
+      "dynamodb:BatchGetItem",
       "dynamodb:BatchWriteItem",
       "dynamodb:PutItem",
       "dynamodb:DeleteItem",
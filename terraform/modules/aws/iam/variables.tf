@@ -3,8 +3,8 @@ variable "env" {
   description = "環境名"
 }
 
-variable "sqs_arn" {
-  type = string
+variable "sqs_arns" {
+  type = list(string)
 }
 
 variable "dynamodb_arns" {
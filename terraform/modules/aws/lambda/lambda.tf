@@ -9,6 +9,7 @@ data "archive_file" "python_code_zip" {
   output_path = "../../output/python_code.zip"
   excludes = [
     "terraform/**",
+    "benchmark/**",
     "requirements.txt",
     ".env",
     ".git/**",
@@ -59,7 +60,8 @@ resource "aws_lambda_function" "lambda_functions" {
       EXPENDITURE_SHEET_NAME = var.env_variables.expenditure_sheet_name
 
       # AWS関連
-      SQS_QUEUE_URL = var.analyse_receipt_queue.url
+      SQS_QUEUE_URL           = var.analyse_receipt_queue.url
+      SHEETS_OUTBOX_QUEUE_URL = var.sheets_outbox_queue.url
     }
   }
 }
@@ -72,6 +74,24 @@ locals {
 resource "aws_lambda_event_source_mapping" "default" {
   event_source_arn = var.analyse_receipt_queue.arn
   function_name    = local.lambda_arns["analyze_receipt_function"]
+
+  # 失敗したレコードのみを再実行する。成功したレコードはLambdaが削除する
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
+resource "aws_lambda_event_source_mapping" "sheets_outbox" {
+  event_source_arn = var.sheets_outbox_queue.arn
+  function_name    = local.lambda_arns["flush_sheets_outbox_function"]
+
+  # 依頼をまとめてから呼び出し、1回のappend_rowsで書き込む
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  # スプレッドシートの書き込み制限を超えないよう、同時実行数を最小にする
+  scaling_config {
+    maximum_concurrency = 2
+  }
 }
 
 # https://registry.terraform.io/providers/hashicorp/aws/latest/docs/resources/lambda_function_url
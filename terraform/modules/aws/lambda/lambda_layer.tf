@@ -9,6 +9,7 @@ resource "terraform_data" "pip_install" {
       rm -rf ../../output/layer/python &&
       pip install \
         --platform manylinux2014_aarch64 \
+        --platform manylinux_2_28_aarch64 \
         --target=../../output/layer/python/ \
         --implementation cp \
         --python-version 3.12 \
@@ -15,6 +15,15 @@ variable "analyse_receipt_queue" {
   })
 }
 
+variable "sheets_outbox_queue" {
+  type = object({
+    id       = string
+    arn      = string
+    tags_all = map(any)
+    url      = string
+  })
+}
+
 variable "env_variables" {
   description = "環境変数"
   type = object({
@@ -1,4 +1,36 @@
 # https://registry.terraform.io/providers/hashicorp/aws/latest/docs/resources/sqs_queue
+# 解析に失敗し続けたレシートは、再実行を繰り返さないようデッドレターキューに移す
+resource "aws_sqs_queue" "analyse_receipt_dead_letter_queue" {
+  name                      = "${var.env}_analyse_receipt_dead_letter_queue"
+  message_retention_seconds = 1209600
+}
+
 resource "aws_sqs_queue" "analyse_receipt_queue" {
   name = "${var.env}_analyse_receipt_queue"
+  # 関数のタイムアウトの6倍以上とする
+  visibility_timeout_seconds = 180
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.analyse_receipt_dead_letter_queue.arn
+    maxReceiveCount     = 3
+  })
+}
+
+# スプレッドシートへの書き込みの依頼
+# 書き込みに失敗し続けた依頼は、失われないようデッドレターキューに移す
+resource "aws_sqs_queue" "sheets_outbox_dead_letter_queue" {
+  name                      = "${var.env}_sheets_outbox_dead_letter_queue"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "sheets_outbox_queue" {
+  name = "${var.env}_sheets_outbox_queue"
+  # 関数のタイムアウトの6倍以上とする
+  visibility_timeout_seconds = 360
+  message_retention_seconds  = 1209600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.sheets_outbox_dead_letter_queue.arn
+    maxReceiveCount     = 5
+  })
 }
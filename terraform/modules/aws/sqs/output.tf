@@ -1,3 +1,7 @@
 output "analyse_receipt_queue" {
   value = aws_sqs_queue.analyse_receipt_queue
 }
+
+output "sheets_outbox_queue" {
+  value = aws_sqs_queue.sheets_outbox_queue
+}
@@ -0,0 +1,87 @@
+"""
+temporal_expenditures の created_at を持たないアイテムに、created_at を設定します。
+line_user_id_index は created_at をソートキーとするため、created_at を持たないアイテム
+（インデックスの追加前に作成されたもの）はインデックスに含まれず、一覧や一括登録に表示されません。
+    python backfill_created_at.py [テーブル名]
+何度実行しても、設定済みのアイテムは変更しません。
+"""
+
+import os
+import sys
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+DEFAULT_TABLE_NAME = "temporal_expenditures"
+# 作成時のTTL（calculate_ttl_timestampの既定値: 30日後）
+DEFAULT_TTL_SECONDS = 60 * 60 * 24 * 30
+
+
+def estimate_created_at(item: dict, now: int) -> int:
+    """
+    作成日時（エポックミリ秒）を推定します。
+    作成時のTTLは30日後のため、TTLから逆算します。解析失敗などでTTLが変更されている場合に
+    備え、30日前から現在時刻までの範囲に収めます。
+    Args:
+        item: アイテム
+        now: 現在時刻（エポック秒）
+    Returns:
+        int: 作成日時（エポックミリ秒）
+    """
+    ttl_timestamp = item.get("ttl_timestamp")
+    if ttl_timestamp is None:
+        return now * 1000
+    created_at = int(ttl_timestamp) - DEFAULT_TTL_SECONDS
+    return min(max(created_at, now - DEFAULT_TTL_SECONDS), now) * 1000
+
+
+def backfill_created_at(table_name: str) -> int:
+    """
+    created_at を持たないアイテムに、推定した作成日時を設定します。
+    Args:
+        table_name: テーブル名
+    Returns:
+        int: created_at を設定したアイテム数
+    """
+    dynamodb = boto3.resource(
+        "dynamodb", region_name=os.environ.get("AWS_DEFAULT_REGION", "ap-northeast-1")
+    )
+    table = dynamodb.Table(table_name)
+    now = int(time.time())
+    options = {
+        "FilterExpression": Attr("created_at").not_exists(),
+        "ProjectionExpression": "id, ttl_timestamp",
+    }
+    count = 0
+    while True:
+        response = table.scan(**options)
+        for item in response.get("Items", []):
+            try:
+                table.update_item(
+                    Key={"id": item["id"]},
+                    UpdateExpression="SET created_at = :created_at",
+                    ConditionExpression="attribute_exists(id) AND attribute_not_exists(created_at)",
+                    ExpressionAttributeValues={
+                        ":created_at": estimate_created_at(item, now)
+                    },
+                )
+                count += 1
+            except ClientError as e:
+                # 削除済み、または同時に作成日時が設定されたアイテムは対象外
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        if "LastEvaluatedKey" not in response:
+            break
+        options["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    print(f"{table_name}: {count}件のアイテムにcreated_atを設定しました。")
+    return count
+
+
+if __name__ == "__main__":
+    args = sys.argv
+    if len(args) <= 2:
+        backfill_created_at(args[1] if len(args) == 2 else DEFAULT_TABLE_NAME)
+    else:
+        print("Argument is invalid, args: ", args)